@@ -1,4 +1,6 @@
 import logging
+import multiprocessing
+import sys
 
 from PySide6.QtWidgets import QApplication
 
@@ -8,6 +10,12 @@ from . import constants as const
 
 
 def main():
+    # the batch packing worker processes start from this entry point when frozen
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        from . import cli
+        sys.exit(cli.main(sys.argv[1:]))
+
     logger = logging.getLogger(const.LogName.MAIN)
     logger.info('DigiSModEditor application started...')
 
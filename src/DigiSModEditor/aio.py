@@ -0,0 +1,266 @@
+"""
+asyncio API of the blocking scan, transfer and pack functions, for automation services running an event loop.
+
+The blocking calls run on a managed thread pool, see `get_executor`. Cancelling a scan, transfer, diff or pack
+task stops its blocking work at the next checkpoint, a walked directory, a compared file, a chunk of a large file
+copy or a packed file. The short calls, e.g. `read_metadata_mods`, have no checkpoint and run to completion.
+Either way the task only ends once the work has stopped, so no file is written after the cancellation returns.
+
+    async for record in aio.scan_assets(dsdb_dir):
+        ...
+    results = await aio.transfer_files(dsdb_dir, mods_dir / 'modfiles', file_names, concurrency = 8)
+    pack_result = await aio.pack_project_mods(mods_dir, packed_dir, 'Mods.zip')
+"""
+import asyncio
+import collections
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path, PurePath
+from typing import Union, Dict, List, Iterable, Callable, AsyncIterator
+
+from . import core
+from . import diff
+from . import digest
+from . import store as shared_store
+from . import errors as err
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'TransferProgress',
+    'get_executor',
+    'shutdown_executor',
+    'scan_assets',
+    'transfer_files',
+    'pack_project_mods',
+    'diff_project_mods',
+    'read_metadata_mods',
+]
+
+DEFAULT_TRANSFER_CONCURRENCY = 4
+SCAN_BATCH_SIZE = 256
+
+TransferProgress = collections.namedtuple(
+    'TransferProgress',
+    (
+        'done',
+        'total',
+        'result'
+    )
+)
+
+_executor: Union[ThreadPoolExecutor, None] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool the blocking calls run on, shared by every event loop of the process.
+
+    :return: The shared ThreadPoolExecutor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(min(32, (os.cpu_count() or 1) + 4), thread_name_prefix = 'DigiSAio')
+        return _executor
+
+
+def shutdown_executor(wait: bool = True):
+    """
+    Shuts the thread pool down, the next call creates a new one.
+
+    :param wait: Whether to wait for the running calls to finish
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait = wait, cancel_futures = True)
+
+
+def _get_checkpoint(cancel_event: threading.Event) -> Callable[[], None]:
+    def _checkpoint():
+        if cancel_event.is_set():
+            raise err.OperationCancelled('The operation has been cancelled')
+    return _checkpoint
+
+
+async def _run_blocking(func: Callable, *args, cancel_event: Union[threading.Event, None] = None, **kwargs):
+    """
+    Runs a blocking call on the executor, and stops it at its next checkpoint if the task is cancelled.
+
+    :param func: The blocking function
+    :param cancel_event: Set when the task is cancelled, the checkpoints of `func` raise once it is set
+    :return: The result of the call
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if cancel_event is not None:
+            cancel_event.set()
+        # wait for the call to stop, its OperationCancelled is expected and dropped
+        await asyncio.wait([future])
+        if not future.cancelled() and future.exception() is not None and \
+                not isinstance(future.exception(), err.OperationCancelled):
+            log.warning(f'Cancelled call failed: {func.__name__}, {future.exception()}')
+        raise
+
+
+def _get_asset_records(name_list: List[str], files_text: str) -> List[core.AssetRecord]:
+    return [core.get_asset_record(o, files_text) for o in name_list]
+
+
+async def scan_assets(dir_path: Union[PathLike, Path], batch_size: int = SCAN_BATCH_SIZE) -> AsyncIterator[core.AssetRecord]:
+    """
+    Scans a game data directory and yields the record of every asset, see `core.scan_asset_structures`.
+
+    The assets are grouped in batches on the executor, the event loop stays responsive during large scans.
+
+    :param dir_path: The DSDB directory or 'modfiles' directory of a project mods
+    :param batch_size: The number of assets grouped per executor call
+    :return: An async iterator of `core.AssetRecord`
+    """
+    cancel_event = threading.Event()
+    name_list, files_text = await _run_blocking(
+        core.walk_asset_files, dir_path, _get_checkpoint(cancel_event), cancel_event = cancel_event
+    )
+    # a batch is short, the cancellation is handled between batches
+    for i in range(0, len(name_list), batch_size):
+        for o in await _run_blocking(_get_asset_records, name_list[i:i + batch_size], files_text):
+            yield o
+
+
+async def transfer_files(
+        src_dir: Union[PathLike, Path],
+        dest_dir: Union[PathLike, Path],
+        file_names: Iterable[Union[str, PurePath]],
+        concurrency: int = DEFAULT_TRANSFER_CONCURRENCY,
+        replace: bool = True,
+        verify: bool = False,
+        store: Union[shared_store.SharedAssetStore, None] = None,
+        on_progress: Union[Callable[[TransferProgress], None], None] = None
+) -> List[core.CopyResult]:
+    """
+    Copies asset files with at most `concurrency` copies at a time, see `core.copy_asset_file`.
+
+    A failed copy is reported in its `core.CopyResult`, even if the copy raised, it doesn't stop the other copies.
+    Cancelling the task cancels the pending copies and interrupts the large file copies, which resume on the next
+    transfer.
+
+    :param src_dir: The source directory
+    :param dest_dir: The destination directory
+    :param file_names: The files to copy, relative to both directories, e.g. 'images/chr001_tex.img'
+    :param concurrency: The maximum number of concurrent copies
+    :param replace: Whether to overwrite the destination files which already exist
+    :param verify: Whether to compare the content digests of the source and the copied files
+    :param store: A shared asset store, if given the files are linked from the store instead of copied
+    :param on_progress: Called in the event loop with a `TransferProgress` after each copy
+    :return: A `core.CopyResult` per file, in the order of `file_names`
+    """
+    src_dir = Path(src_dir)
+    dest_dir = Path(dest_dir)
+    relative_paths = [PurePath(o) for o in file_names]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    cancel_event = threading.Event()
+    checkpoint = _get_checkpoint(cancel_event)
+    results: Dict[int, core.CopyResult] = {}
+
+    async def _copy(index: int, relative_path: PurePath):
+        async with semaphore:
+            try:
+                result = await _run_blocking(
+                    core.copy_asset_file,
+                    src_dir / relative_path.parent,
+                    dest_dir / relative_path.parent,
+                    relative_path.name,
+                    replace = replace,
+                    verify = verify,
+                    store = store,
+                    checkpoint = checkpoint,
+                    cancel_event = cancel_event
+                )
+            except Exception as e:
+                # the task group would cancel every other copy, only the cancellation of the task propagates
+                log.warning(f'Failed to copy {relative_path}: {e}')
+                result = core.CopyResult(False, src_dir / relative_path, dest_dir / relative_path, str(e))
+        results[index] = result
+        if on_progress is not None:
+            on_progress(TransferProgress(len(results), len(relative_paths), result))
+
+    async with asyncio.TaskGroup() as task_group:
+        for i, o in enumerate(relative_paths):
+            task_group.create_task(_copy(i, o))
+    return [results[i] for i in range(len(relative_paths))]
+
+
+async def pack_project_mods(
+        project_mods_dir: Union[PathLike, Path],
+        dest_dir: Union[PathLike, Path],
+        zip_file_name: str,
+        dsdb_dir: Union[PathLike, Path, None] = None,
+        cache: Union[digest.DigestCache, None] = None
+) -> core.PackResult:
+    """
+    Packs a project mods into a ZIP file, see `core.pack_project_mods`. A cancelled pack leaves no ZIP file.
+
+    :param project_mods_dir: The project mods directory to pack
+    :param dest_dir: The destination directory to create the ZIP file in
+    :param zip_file_name: The name of the ZIP file to create
+    :param dsdb_dir: The DSDB directory to compare with for delta packing, or None to pack every file
+    :param cache: The digest cache to use for delta packing, the application digest cache by default
+    :return: A `core.PackResult`
+    """
+    cancel_event = threading.Event()
+    return await _run_blocking(
+        core.pack_project_mods,
+        Path(project_mods_dir),
+        Path(dest_dir),
+        zip_file_name,
+        Path(dsdb_dir) if dsdb_dir is not None else None,
+        cache,
+        _get_checkpoint(cancel_event),
+        cancel_event = cancel_event
+    )
+
+
+async def diff_project_mods(
+        project_mods_dir: Union[PathLike, Path],
+        dsdb_dir: Union[PathLike, Path],
+        cache: Union[digest.DigestCache, None] = None
+) -> List[diff.FileDiff]:
+    """
+    Compares a project mods with the DSDB, see `core.diff_project_mods`.
+
+    :param project_mods_dir: The project mods directory
+    :param dsdb_dir: The DSDB directory the mods is based on
+    :param cache: The digest cache to use, the application digest cache by default
+    :return: A list of `diff.FileDiff` sorted by relative path
+    """
+    cancel_event = threading.Event()
+    return await _run_blocking(
+        core.diff_project_mods,
+        Path(project_mods_dir),
+        Path(dsdb_dir),
+        cache,
+        _get_checkpoint(cancel_event),
+        cancel_event = cancel_event
+    )
+
+
+async def read_metadata_mods(metadata_file: Union[PathLike, Path]) -> Dict:
+    """
+    Reads the metadata file of a project mods, see `core.read_metadata_mods`. A single small read, not interrupted
+    by a cancellation.
+
+    :param metadata_file: The metadata JSON file
+    :return: The metadata
+    """
+    return await _run_blocking(core.read_metadata_mods, Path(metadata_file))
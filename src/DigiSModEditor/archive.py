@@ -0,0 +1,309 @@
+import collections
+import json
+import logging
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from typing import Union, Dict, List, Tuple
+
+from . import core
+from . import errors as err
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'ModsArchive',
+    'ImportResult',
+    'read_archive_metadata',
+    'read_archive_description',
+    'get_archive_asset_index',
+    'import_mods_archive',
+]
+
+METADATA_FILE_NAME = 'METADATA.json'
+DESCRIPTION_FILE_NAME = 'DESCRIPTION.html'
+MODS_DIR_NAME = 'modfiles'
+METADATA_KEYS = ('name', 'author', 'version', 'category')
+
+# every entry is streamed through a buffer of this size, whatever the size of the entry
+EXTRACT_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+ImportResult = collections.namedtuple(
+    'ImportResult',
+    (
+        'project_dir',
+        'extracted_files',
+        'bytes_extracted',
+        'name_list',
+        'files_text'
+    )
+)
+
+
+def _open_archive(zip_path: Union[PathLike, Path]) -> zipfile.ZipFile:
+    if not zipfile.is_zipfile(zip_path):
+        raise err.InvalidModsArchive(f'File is not a ZIP archive: {zip_path}')
+    return zipfile.ZipFile(zip_path)
+
+
+def _get_safe_member_path(member_name: str) -> PurePosixPath:
+    # never let an entry escape the project mods directory
+    member_path = PurePosixPath(member_name)
+    # '' and '.' have no parts, they name no file
+    if not member_path.parts or member_path.is_absolute() or '..' in member_path.parts or ':' in member_path.parts[0]:
+        raise err.InvalidModsArchive(f'Unsafe path in archive: {member_name}')
+    return member_path
+
+
+def read_archive_metadata(zip_file: zipfile.ZipFile) -> Dict:
+    """
+    Reads and validates the METADATA.json of a packed mods without extracting it.
+
+    :param zip_file: The opened packed mods archive
+    :return: A dictionary containing the metadata, see `core.read_metadata_mods`
+    :raises InvalidModsArchive: If the metadata is missing or incomplete
+    """
+    try:
+        with zip_file.open(METADATA_FILE_NAME) as f:
+            metadata_dict = json.load(f)
+    except KeyError:
+        raise err.InvalidModsArchive(f'Missing {METADATA_FILE_NAME}: {zip_file.filename}')
+    except ValueError as e:
+        raise err.InvalidModsArchive(f'Invalid {METADATA_FILE_NAME}: {zip_file.filename}, {e}')
+
+    missing_keys = [o for o in METADATA_KEYS if o not in metadata_dict]
+    if missing_keys:
+        raise err.InvalidModsArchive(f'Missing metadata {missing_keys}: {zip_file.filename}')
+    metadata_dict['version'] = tuple(metadata_dict['version'])
+    return metadata_dict
+
+
+def read_archive_description(zip_file: zipfile.ZipFile) -> str:
+    """
+    Reads the DESCRIPTION.html of a packed mods without extracting it.
+
+    :param zip_file: The opened packed mods archive
+    :return: The description of the mods
+    :raises InvalidModsArchive: If the description is missing or not text
+    """
+    try:
+        return zip_file.read(DESCRIPTION_FILE_NAME).decode('utf-8')
+    except KeyError:
+        raise err.InvalidModsArchive(f'Missing {DESCRIPTION_FILE_NAME}: {zip_file.filename}')
+    except UnicodeDecodeError as e:
+        raise err.InvalidModsArchive(f'Invalid {DESCRIPTION_FILE_NAME}: {zip_file.filename}, {e}')
+
+
+def get_archive_asset_index(zip_file: zipfile.ZipFile) -> Tuple[List[str], str]:
+    """
+    Collects the scan index of the 'modfiles' of a packed mods from the archive central directory.
+
+    Nothing is decompressed, the result is the same as `core.walk_asset_files` on the extracted 'modfiles'.
+
+    :param zip_file: The opened packed mods archive
+    :return: A tuple of the '*.name' file names and a text of all file names separated by ';'
+    """
+    prefix = f'{MODS_DIR_NAME}/'
+    files = [
+        PurePosixPath(o.filename).name for o in zip_file.infolist()
+        if not o.is_dir() and o.filename.startswith(prefix)
+    ]
+    return [o for o in files if o.endswith('.name')], ';'.join(files)
+
+
+def _extract_members(zip_path: Path, members: List[zipfile.ZipInfo], dest_dir: Path, max_workers: int) -> int:
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def _extract(member: zipfile.ZipInfo) -> int:
+        # one handle per worker, a shared ZipFile serializes every read on its file lock
+        zip_file = getattr(local, 'zip_file', None)
+        if zip_file is None:
+            zip_file = local.zip_file = zipfile.ZipFile(zip_path)
+            with handles_lock:
+                handles.append(zip_file)
+
+        dest_path = dest_dir.joinpath(*_get_safe_member_path(member.filename).parts)
+        dest_path.parent.mkdir(parents = True, exist_ok = True)
+        with zip_file.open(member) as src, open(dest_path, 'wb') as dest:
+            shutil.copyfileobj(src, dest, EXTRACT_BUFFER_SIZE)
+        return member.file_size
+
+    try:
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            # the largest entries first, so a single huge file doesn't finish the batch alone
+            return sum(executor.map(_extract, sorted(members, key = lambda o: o.file_size, reverse = True)))
+    finally:
+        for o in handles:
+            o.close()
+
+
+def import_mods_archive(
+        zip_path: Union[PathLike, Path],
+        dest_dir: Union[PathLike, Path],
+        project_name: Union[str, None] = None,
+        max_workers: Union[int, None] = None
+) -> ImportResult:
+    """
+    Imports a packed mods, e.g. made by `core.pack_project_mods`, back into an editable project mods.
+
+    The metadata and description are validated from the archive before anything is written. The entries
+    are extracted in parallel and streamed through a fixed size buffer, into a temporary directory which is
+    renamed to the project mods directory once complete, so a failed import leaves nothing behind.
+
+    :param zip_path: The packed mods archive
+    :param dest_dir: The directory to create the project mods in, e.g. the project mods directory
+    :param project_name: The name of the project mods directory, the archive name by default
+    :param max_workers: The number of extracting threads
+    :return: An `ImportResult` with the scan index of the 'modfiles', see `get_archive_asset_index`
+    :raises InvalidModsArchive: If the archive is not a valid packed mods
+    :raises CreateProjectModsError: If the project mods directory already exists
+    """
+    zip_path = Path(zip_path)
+    dest_dir = Path(dest_dir)
+    project_dir = dest_dir / (project_name or zip_path.stem)
+    if project_dir.exists():
+        raise err.CreateProjectModsError(f'Project mods already exists: {project_dir}')
+
+    with _open_archive(zip_path) as zip_file:
+        read_archive_metadata(zip_file)
+        read_archive_description(zip_file)
+        members = [o for o in zip_file.infolist() if not o.is_dir()]
+        for o in members:
+            _get_safe_member_path(o.filename)
+        name_list, files_text = get_archive_asset_index(zip_file)
+
+    temp_dir = dest_dir / f'.{project_dir.name}.importing'
+    if temp_dir.exists():
+        shutil.rmtree(temp_dir)
+    (temp_dir / MODS_DIR_NAME).mkdir(parents = True)
+
+    workers = max_workers or min(8, (os.cpu_count() or 1) + 2)
+    log.info(f'Importing {len(members)} files with {workers} workers: {zip_path}')
+    try:
+        bytes_extracted = _extract_members(zip_path, members, temp_dir, workers)
+        os.replace(temp_dir, project_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors = True)
+        raise
+
+    log.info(f'Imported {len(members)} files, {bytes_extracted} bytes: {project_dir}')
+    return ImportResult(project_dir, len(members), bytes_extracted, name_list, files_text)
+
+
+class ModsArchive:
+    """
+    Read-only view of a packed mods archive, browsed in place without extracting it.
+
+    Opening an archive only reads its central directory, plus the small METADATA.json and DESCRIPTION.html
+    entries. The asset files are decompressed lazily, one by one, when they are read or copied out.
+    """
+    def __init__(self, zip_path: Union[PathLike, Path]):
+        self._zip_path = Path(zip_path)
+        self._zip_file = _open_archive(self._zip_path)
+        try:
+            self._metadata = read_archive_metadata(self._zip_file)
+            self._description = read_archive_description(self._zip_file)
+        except err.InvalidModsArchive:
+            self._zip_file.close()
+            raise
+
+        prefix = f'{MODS_DIR_NAME}/'
+        self._members: Dict[str, zipfile.ZipInfo] = {
+            PurePosixPath(o.filename).name: o for o in self._zip_file.infolist()
+            if not o.is_dir() and o.filename.startswith(prefix)
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, file_name: str):
+        return file_name in self._members
+
+    @property
+    def zip_path(self) -> Path: return self._zip_path
+
+    @property
+    def metadata(self) -> Dict: return self._metadata
+
+    @property
+    def description(self) -> str: return self._description
+
+    def close(self):
+        self._zip_file.close()
+
+    def get_asset_index(self) -> Tuple[List[str], str]:
+        """
+        Returns the scan index of the archive 'modfiles', see `get_archive_asset_index`.
+
+        :return: A tuple of the '*.name' file names and a text of all file names separated by ';'
+        """
+        return [o for o in self._members if o.endswith('.name')], ';'.join(self._members)
+
+    def get_file_size(self, file_name: str) -> int:
+        """
+        Returns the uncompressed size of an asset file, from the central directory.
+
+        :param file_name: The asset file name
+        :return: The size in bytes
+        :raises KeyError: If the file is not in the archive
+        """
+        return self._members[file_name].file_size
+
+    def read_file(self, file_name: str) -> bytes:
+        """
+        Decompresses a single asset file into memory.
+
+        :param file_name: The asset file name
+        :return: The file content
+        :raises KeyError: If the file is not in the archive
+        """
+        return self._zip_file.read(self._members[file_name])
+
+    def extract_file(
+            self,
+            file_name: str,
+            dest_dir: Union[PathLike, Path],
+            replace: bool = True
+    ) -> core.CopyResult:
+        """
+        Copies a single asset file out of the archive, streaming it through a fixed size buffer.
+
+        :param file_name: The asset file name
+        :param dest_dir: The destination directory
+        :param replace: Whether to replace the destination file if it already exists
+        :return: A `core.CopyResult` indicating the success and details of the copy operation
+        """
+        src_path = self._zip_path / MODS_DIR_NAME / file_name
+        dest_path = Path(dest_dir) / file_name
+        member = self._members.get(file_name)
+        if member is None:
+            return core.CopyResult(False, src_path, dest_path, f'Source file {file_name} is not in {self._zip_path}')
+        if dest_path.exists() and not replace:
+            return core.CopyResult(
+                False,
+                src_path,
+                dest_path,
+                f'Destination file {dest_path} already exists. Use the replace option to overwrite.'
+            )
+
+        dest_path.parent.mkdir(parents = True, exist_ok = True)
+        temp_path = dest_path.with_name(f'{file_name}.extracting')
+        try:
+            with self._zip_file.open(member) as src, open(temp_path, 'wb') as dest:
+                shutil.copyfileobj(src, dest, EXTRACT_BUFFER_SIZE)
+            os.replace(temp_path, dest_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            if temp_path.exists():
+                os.remove(temp_path)
+            return core.CopyResult(False, src_path, dest_path, f'Failed to extract {file_name}: {e}')
+        return core.CopyResult(True, src_path, dest_path, f'Successfully extracted {src_path} to {dest_path}.')
@@ -0,0 +1,180 @@
+import collections
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import PathLike
+from pathlib import Path
+from typing import Union, Iterable, List, Callable
+
+from . import core
+from . import errors as err
+from . import decorators as deco
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'BatchPackResult',
+    'find_project_mods_dirs',
+    'get_batch_workers',
+    'pack_many',
+    'write_batch_report',
+]
+
+# packing is mostly disk bound, more parallel writers than this only make the disk seek
+MAX_IO_WORKERS = 4
+
+BatchPackResult = collections.namedtuple(
+    'BatchPackResult',
+    (
+        'project_dir',
+        'success',
+        'zip_file',
+        'packed_files',
+        'skipped_files',
+        'bytes_saved',
+        'duration',
+        'error'
+    )
+)
+
+ProgressCallback = Callable[[int, int, BatchPackResult], None]
+
+
+@deco.validate_directory
+def find_project_mods_dirs(parent_dir: Union[PathLike, Path]) -> List[Path]:
+    """
+    Finds the project mods directly inside a directory, e.g. the project mods directory of the application.
+
+    :param parent_dir: The directory containing the project mods
+    :return: The project mods directories, sorted by name
+    :raises InvalidDirectoryPath: If the directory does not exist
+    """
+    return sorted(o for o in Path(parent_dir).iterdir() if o.is_dir() and core.is_project_mods_directory(o))
+
+
+def get_batch_workers(mods_count: int, max_workers: Union[int, None] = None) -> int:
+    """
+    Returns the number of worker processes for a batch, limited by the CPU count and the disk.
+
+    :param mods_count: The number of mods to pack
+    :param max_workers: An explicit upper limit, or None to use the CPU and I/O limits
+    :return: The number of worker processes, at least 1
+    """
+    limit = max_workers or min(os.cpu_count() or 1, MAX_IO_WORKERS)
+    return max(1, min(limit, mods_count))
+
+
+def _pack_one(project_dir: Path, dest_dir: Path, dsdb_dir: Union[Path, None]) -> BatchPackResult:
+    start_time = time.perf_counter()
+    try:
+        pack_result = core.pack_project_mods(project_dir, dest_dir, f'{project_dir.name}.zip', dsdb_dir)
+    except (err.BaseDigiSException, OSError) as e:
+        return BatchPackResult(project_dir, False, None, 0, 0, 0, time.perf_counter() - start_time, str(e))
+    return BatchPackResult(
+        project_dir,
+        True,
+        pack_result.zip_file,
+        pack_result.packed_files,
+        pack_result.skipped_files,
+        pack_result.bytes_saved,
+        time.perf_counter() - start_time,
+        None
+    )
+
+
+def pack_many(
+        project_dirs: Iterable[Union[PathLike, Path]],
+        dest_dir: Union[PathLike, Path],
+        dsdb_dir: Union[PathLike, Path, None] = None,
+        max_workers: Union[int, None] = None,
+        on_progress: Union[ProgressCallback, None] = None
+) -> List[BatchPackResult]:
+    """
+    Packs many project mods in parallel, each into '<mods name>.zip' in the destination directory.
+
+    Every mods is packed by `core.pack_project_mods` in a worker process. A failing mods doesn't stop the
+    batch, its error is reported in its result.
+
+    :param project_dirs: The project mods directories to pack
+    :param dest_dir: The destination directory of the ZIP files
+    :param dsdb_dir: The DSDB directory for delta packing, or None to pack every file
+    :param max_workers: The maximum number of worker processes, see `get_batch_workers`
+    :param on_progress: Called with (done count, total count, result) after each mods is packed
+    :return: The results in the order of `project_dirs`
+    :raises InvalidDirectoryPath: If the destination directory does not exist
+    """
+    project_dirs = [Path(o) for o in dict.fromkeys(project_dirs)]
+    dest_dir = Path(dest_dir)
+    dsdb_dir = Path(dsdb_dir) if dsdb_dir is not None else None
+    if not dest_dir.is_dir():
+        raise err.InvalidDirectoryPath(f'Invalid directory path: {dest_dir}')
+
+    workers = get_batch_workers(len(project_dirs), max_workers)
+    log.info(f'Batch packing {len(project_dirs)} mods with {workers} workers: {dest_dir}')
+
+    results = {}
+
+    def _done(result: BatchPackResult):
+        results[result.project_dir] = result
+        if result.success:
+            log.info(f'Packed {result.project_dir.name} in {result.duration:.2f}s: {result.zip_file}')
+        else:
+            log.error(f'Cannot pack {result.project_dir.name}: {result.error}')
+        if on_progress is not None:
+            on_progress(len(results), len(project_dirs), result)
+
+    if workers == 1:
+        # not worth the process start up
+        for project_dir in project_dirs:
+            _done(_pack_one(project_dir, dest_dir, dsdb_dir))
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = {executor.submit(_pack_one, o, dest_dir, dsdb_dir): o for o in project_dirs}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # e.g. a worker process died
+                    result = BatchPackResult(futures[future], False, None, 0, 0, 0, 0.0, repr(e))
+                _done(result)
+
+    return [results[o] for o in project_dirs]
+
+
+def write_batch_report(results: List[BatchPackResult], report_file: Union[PathLike, Path]) -> Path:
+    """
+    Writes the summary report of a batch as JSON.
+
+    :param results: The results of `pack_many`
+    :param report_file: The report file to write
+    :return: The report file path
+    """
+    report_file = Path(report_file)
+    failed = [o for o in results if not o.success]
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'mods_count': len(results),
+        'packed_count': len(results) - len(failed),
+        'failed_count': len(failed),
+        'bytes_saved': sum(o.bytes_saved for o in results),
+        'mods': [
+            {
+                'name': o.project_dir.name,
+                'project_dir': str(o.project_dir),
+                'success': o.success,
+                'zip_file': str(o.zip_file) if o.zip_file else None,
+                'packed_files': o.packed_files,
+                'skipped_files': o.skipped_files,
+                'bytes_saved': o.bytes_saved,
+                'duration': round(o.duration, 3),
+                'error': o.error,
+            } for o in results
+        ],
+    }
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent = 4)
+    log.info(f'Batch report: {len(results) - len(failed)} packed, {len(failed)} failed: {report_file}')
+    return report_file
@@ -0,0 +1,427 @@
+import bisect
+import collections
+import os
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Union, Dict, List, Set, Tuple, Generator
+
+from . import core
+from . import search
+from . import memory
+from . import constants as const
+
+if TYPE_CHECKING:
+    from . import layers
+
+__all__ = [
+    'AssetEntry',
+    'AssetCatalog',
+    'create_catalog',
+    'create_catalog_from_index',
+    'get_relative_file_path',
+]
+
+
+def get_relative_file_path(file_name: str) -> PurePosixPath:
+    """
+    Returns the path of an asset file relative to its game data directory. Images live in the 'images' subdirectory.
+
+    :param file_name: The asset file name
+    :return: The relative path, with '/' separators
+    """
+    if file_name.endswith(const.FileKind.IMAGE):
+        return PurePosixPath('images', file_name)
+    return PurePosixPath(file_name)
+
+
+def _to_file_kind(kind: str) -> const.FileKind:
+    if not kind.startswith('.'):
+        kind = f'.{kind}'
+    return const.FileKind(kind.lower())
+
+
+class AssetEntry:
+    """A single asset of the catalog, its files grouped by file kind and their sizes."""
+    __slots__ = ('name', 'files', 'sizes', 'anim_codes')
+
+    def __init__(self, name: str, files: Dict[const.FileKind, Tuple[str, ...]], sizes: Dict[str, int]):
+        self.name = name
+        self.files = files
+        self.sizes = sizes
+        self.anim_codes = frozenset(
+            o for o in (search.get_anim_code(f) for f in files.get(const.FileKind.ANIMATION, ())) if o
+        )
+
+    def __repr__(self):
+        return f'<AssetEntry {self.name}: {sum(len(o) for o in self.files.values())} files>'
+
+    @property
+    def kinds(self) -> Set[const.FileKind]: return {k for k, v in self.files.items() if v}
+
+    def iter_files(self) -> Generator[str, None, None]:
+        for files in self.files.values():
+            yield from files
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'files': {str(k): list(v) for k, v in self.files.items()},
+            'size': self.size_of(),
+        }
+
+    def size_of(self, kind: Union[str, None] = None) -> int:
+        """
+        Returns the total size in bytes of the asset files, or of the files of a single kind.
+
+        Files without a known size are counted as 0 bytes.
+
+        :param kind: The file kind, e.g. '.img' or 'img', or None for all files
+        :return: The total size in bytes
+        """
+        if kind is None:
+            files = self.iter_files()
+        else:
+            files = self.files.get(_to_file_kind(kind), ())
+        return sum(self.sizes.get(o, 0) for o in files)
+
+
+class AssetCatalog:
+    """
+    In-memory catalog of the assets of a game data directory.
+
+    The catalog is filled from scan results (asset structures) and keeps secondary indexes by
+    name prefix, file kind, animation code and size, so scripts can query the assets without the GUI.
+    Every query returns a set of asset names, which can be combined with the usual set operators.
+    """
+    def __init__(self, root_path: Union[PathLike, Path], src_path: Union[PathLike, Path, None] = None):
+        self._root_path = Path(root_path)
+        self._src_path = Path(src_path) if src_path is not None else Path(root_path)
+        self._entries: Dict[str, AssetEntry] = {}
+        self._by_kind: Dict[const.FileKind, Set[str]] = collections.defaultdict(set)
+        self._by_anim_code: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._sorted_names: List[str] = []
+        self._sorted_sizes: Dict[Union[const.FileKind, None], List[Tuple[int, str]]] = {}
+        self._dirty = False
+        self._layers: Union['layers.LayeredIndex', None] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, asset_name: str):
+        return asset_name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    @property
+    def root_path(self) -> Path: return self._root_path
+
+    @property
+    def src_path(self) -> Path: return self._src_path
+
+    @property
+    def asset_names(self) -> Set[str]: return set(self._entries)
+
+    def get(self, asset_name: str) -> Union[AssetEntry, None]:
+        return self._entries.get(asset_name, None)
+
+    @property
+    def layers(self) -> Union['layers.LayeredIndex', None]: return self._layers
+
+    def set_layers(self, layered_index: Union['layers.LayeredIndex', None]):
+        """
+        Resolve the file paths through the source layers of a layered DSDB, or through the source path again if None.
+
+        :param layered_index: The overlay of the source layers, see `layers.LayeredIndex`
+        """
+        self._layers = layered_index
+
+    def get_file_path(self, file_name: str) -> Path:
+        """
+        Returns the full path of an asset file. Images live in the 'images' subdirectory of the source path.
+
+        With source layers, the file is looked up in the layer which overrides it last, see `set_layers`.
+
+        :param file_name: The asset file name
+        :return: The full path of the file
+        """
+        if self._layers is not None:
+            return self._layers.get_file_path(file_name)
+        return self._src_path.joinpath(*get_relative_file_path(file_name).parts)
+
+    def add_asset_structure(
+            self,
+            asset_structure: Union[core.AssetRecord, Dict],
+            existing_files: Union[Set[str], None] = None,
+            with_sizes: bool = False
+    ) -> List[AssetEntry]:
+        """
+        Add or replace the assets of an asset structure.
+
+        :param asset_structure: An `core.AssetRecord`, or a dictionary where the top level keys are the asset names.
+                                The values are dictionaries where the keys are the asset group names and the values are lists of asset file names.
+        :param existing_files: The names of the files which exist on disk, files which are not in it are left out.
+                               If None, every file of the structure is considered to exist.
+        :param with_sizes: Whether to stat the files to index their sizes
+        :return: The added catalog entries
+        """
+        if isinstance(asset_structure, core.AssetRecord):
+            # the record already knows the kind of its files
+            assets = [(asset_structure.stem, self._get_record_files(asset_structure, existing_files))]
+        else:
+            assets = [(k, self._get_structure_files(v, existing_files)) for k, v in asset_structure.items()]
+
+        added = []
+        for asset_name, files in assets:
+            sizes = {}
+            if with_sizes:
+                for file_list in files.values():
+                    for file_name in file_list:
+                        try:
+                            sizes[file_name] = self.get_file_path(file_name).stat().st_size
+                        except OSError:
+                            pass
+
+            entry = AssetEntry(asset_name, files, sizes)
+            self.add_entry(entry)
+            added.append(entry)
+        return added
+
+    def has_same_files(self, record: core.AssetRecord) -> bool:
+        """
+        Whether the catalog already has the asset of a record, with the same files, e.g. to skip it on a rescan.
+
+        :param record: An `core.AssetRecord`
+        :return: True if the asset is in the catalog and its files are unchanged
+        """
+        entry = self._entries.get(record.stem, None)
+        return entry is not None and entry.files == self._get_record_files(record, None)
+
+    @staticmethod
+    def _get_record_files(
+            record: core.AssetRecord,
+            existing_files: Union[Set[str], None]
+    ) -> Dict[const.FileKind, Tuple[str, ...]]:
+        files = {}
+        for kind in core.ASSET_GROUP_KINDS.values():
+            file_list = record.get_files(kind)
+            if existing_files is not None:
+                file_list = tuple(o for o in file_list if o in existing_files)
+            if file_list:
+                files[kind] = file_list
+        return files
+
+    @staticmethod
+    def _get_structure_files(
+            asset_groups: Dict,
+            existing_files: Union[Set[str], None]
+    ) -> Dict[const.FileKind, Tuple[str, ...]]:
+        files = collections.defaultdict(list)
+        for file_list in asset_groups.values():
+            for file_name in file_list:
+                if existing_files is not None and file_name not in existing_files:
+                    continue
+                ext = os.path.splitext(file_name)[1]
+                try:
+                    files[const.FileKind(ext)].append(file_name)
+                except ValueError:
+                    continue
+        return {k: tuple(v) for k, v in files.items()}
+
+    def add_entry(self, entry: AssetEntry):
+        """
+        Add or replace a catalog entry and update the secondary indexes.
+
+        :param entry: The catalog entry
+        """
+        self.remove_asset(entry.name)
+        self._entries[entry.name] = entry
+        for kind in entry.kinds:
+            self._by_kind[kind].add(entry.name)
+        for code in entry.anim_codes:
+            self._by_anim_code[code].add(entry.name)
+        self._dirty = True
+
+    def remove_asset(self, asset_name: str):
+        """
+        Remove an asset from the catalog. Unknown asset names are ignored.
+
+        :param asset_name: The name of the asset
+        """
+        entry = self._entries.pop(asset_name, None)
+        if entry is None:
+            return
+        for kind in entry.kinds:
+            self._by_kind[kind].discard(asset_name)
+        for code in entry.anim_codes:
+            self._by_anim_code[code].discard(asset_name)
+        self._dirty = True
+
+    def clear(self):
+        self._entries.clear()
+        self._by_kind.clear()
+        self._by_anim_code.clear()
+        self._dirty = True
+
+    def get_memory_size(self) -> int:
+        """
+        Estimates the memory used by the entries and the secondary indexes, see `memory.get_container_size`.
+
+        :return: The estimated size in bytes
+        """
+        return sum(
+            memory.get_container_size(o, depth = 2)
+            for o in (self._entries, self._by_kind, self._by_anim_code, self._sorted_names, self._sorted_sizes)
+        )
+
+    def _build_sorted_indexes(self):
+        if self._dirty:
+            self._sorted_names = sorted(self._entries)
+            self._sorted_sizes = {}
+            self._dirty = False
+
+    def _get_sorted_sizes(self, kind: Union[const.FileKind, None]) -> List[Tuple[int, str]]:
+        self._build_sorted_indexes()
+        sorted_sizes = self._sorted_sizes.get(kind)
+        if sorted_sizes is None:
+            sorted_sizes = sorted((o.size_of(kind), o.name) for o in self._entries.values())
+            self._sorted_sizes[kind] = sorted_sizes
+        return sorted_sizes
+
+    def by_prefix(self, prefix: str) -> Set[str]:
+        """
+        Find the assets whose name starts with the given prefix.
+
+        :param prefix: The name prefix, case-sensitive
+        :return: A set of asset names
+        """
+        self._build_sorted_indexes()
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        end = bisect.bisect_left(self._sorted_names, prefix + '\uffff')
+        return set(self._sorted_names[start:end])
+
+    def by_kind(self, kind: str) -> Set[str]:
+        """
+        Find the assets which have at least one file of the given kind.
+
+        :param kind: The file kind, e.g. '.skel' or 'skel'
+        :return: A set of asset names
+        """
+        return set(self._by_kind.get(_to_file_kind(kind), ()))
+
+    def missing_kind(self, kind: str) -> Set[str]:
+        """
+        Find the assets which have no file of the given kind, e.g. the assets missing a '.skel'.
+
+        :param kind: The file kind, e.g. '.skel' or 'skel'
+        :return: A set of asset names
+        """
+        return self._entries.keys() - self._by_kind.get(_to_file_kind(kind), set())
+
+    def by_anim_code(self, code: str) -> Set[str]:
+        """
+        Find the assets which have an animation with the given code, e.g. 'bt01' for '<asset>_bt01.anim'.
+
+        :param code: The animation code, with or without the leading underscore
+        :return: A set of asset names
+        """
+        return set(self._by_anim_code.get(code.lstrip('_'), ()))
+
+    def by_size(
+            self,
+            min_bytes: Union[int, None] = None,
+            max_bytes: Union[int, None] = None,
+            kind: Union[str, None] = None
+    ) -> Set[str]:
+        """
+        Find the assets whose total file size, or total size of a single file kind, is within a range.
+
+        The catalog must be filled with `with_sizes=True` for the sizes to be known.
+
+        :param min_bytes: The minimum size in bytes, exclusive, or None for no minimum
+        :param max_bytes: The maximum size in bytes, inclusive, or None for no maximum
+        :param kind: The file kind to sum, e.g. '.img', or None for all files
+        :return: A set of asset names
+        """
+        sorted_sizes = self._get_sorted_sizes(_to_file_kind(kind) if kind else None)
+        start = 0 if min_bytes is None else bisect.bisect_right(sorted_sizes, (min_bytes, '\uffff'))
+        end = len(sorted_sizes) if max_bytes is None else bisect.bisect_right(sorted_sizes, (max_bytes, '\uffff'))
+        return {name for _, name in sorted_sizes[start:end]}
+
+    def query(
+            self,
+            prefix: Union[str, None] = None,
+            kind: Union[str, None] = None,
+            missing: Union[str, None] = None,
+            anim_code: Union[str, None] = None,
+            min_bytes: Union[int, None] = None,
+            max_bytes: Union[int, None] = None,
+            size_kind: Union[str, None] = None
+    ) -> List[AssetEntry]:
+        """
+        Combine the secondary indexes into a single query. Every given criterion must match.
+
+        :param prefix: The asset name prefix
+        :param kind: A file kind the asset must have
+        :param missing: A file kind the asset must not have
+        :param anim_code: An animation code the asset must have
+        :param min_bytes: The minimum size in bytes, exclusive
+        :param max_bytes: The maximum size in bytes, inclusive
+        :param size_kind: The file kind the size criteria apply to, or None for all files
+        :return: The matching catalog entries, sorted by asset name
+        """
+        results = []
+        if prefix is not None:
+            results.append(self.by_prefix(prefix))
+        if kind is not None:
+            results.append(self.by_kind(kind))
+        if missing is not None:
+            results.append(self.missing_kind(missing))
+        if anim_code is not None:
+            results.append(self.by_anim_code(anim_code))
+        if min_bytes is not None or max_bytes is not None:
+            results.append(self.by_size(min_bytes, max_bytes, size_kind))
+
+        if results:
+            results.sort(key = len)
+            names = results[0].intersection(*results[1:])
+        else:
+            names = self._entries.keys()
+        return [self._entries[o] for o in sorted(names)]
+
+
+def create_catalog(dir_path: Union[PathLike, Path], with_sizes: bool = False) -> AssetCatalog:
+    """
+    Scans a game data directory and creates its asset catalog.
+
+    Unlike the asset structures sent to the GUI, only the files which exist on disk are cataloged,
+    so the catalog can answer which assets are missing a file kind.
+
+    :param dir_path: The DSDB directory or 'modfiles' directory of a project mods
+    :param with_sizes: Whether to stat the files to index their sizes
+    :return: The asset catalog
+    """
+    name_list, files_text = core.walk_asset_files(dir_path)
+    return create_catalog_from_index(dir_path, name_list, files_text, with_sizes)
+
+
+def create_catalog_from_index(
+        dir_path: Union[PathLike, Path],
+        name_list: List[str],
+        files_text: str,
+        with_sizes: bool = False
+) -> AssetCatalog:
+    """
+    Creates the asset catalog of a game data directory from an already known scan index, see `create_catalog`.
+
+    :param dir_path: The DSDB directory or 'modfiles' directory of a project mods
+    :param name_list: The '*.name' file names
+    :param files_text: A text of all file names separated by ';'
+    :param with_sizes: Whether to stat the files to index their sizes
+    :return: The asset catalog
+    """
+    asset_catalog = AssetCatalog(Path(dir_path))
+    existing_files = set(files_text.split(';'))
+    for name in name_list:
+        asset_catalog.add_asset_structure(core.get_asset_record(name, files_text), existing_files, with_sizes)
+    return asset_catalog
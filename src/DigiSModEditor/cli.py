@@ -0,0 +1,224 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import List, Union
+
+from . import core
+from . import batch
+from . import archive
+from . import conflicts
+from . import utils as utl
+from . import catalog
+from . import diff
+from . import decorators as deco
+from . import service
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+MEGABYTE = 1024 * 1024
+
+
+def _get_asset_dir(dir_path: Path) -> Path:
+    if core.is_project_mods_directory(dir_path):
+        return dir_path / 'modfiles'
+    return dir_path
+
+
+def _get_service(args: argparse.Namespace) -> Union[service.ServiceClient, None]:
+    # the commands run in the catalog service while it is running, its caches are warm
+    if args.no_service:
+        return None
+    return service.connect()
+
+
+def run_query(args: argparse.Namespace) -> int:
+    criteria = {
+        'prefix': args.prefix,
+        'kind': args.kind,
+        'missing': args.missing,
+        'anim_code': args.anim_code,
+        'min_bytes': None if args.min_mb is None else int(args.min_mb * MEGABYTE),
+        'max_bytes': None if args.max_mb is None else int(args.max_mb * MEGABYTE),
+        'size_kind': args.size_kind,
+    }
+    client = _get_service(args)
+    if client is not None:
+        entries = client.query(_get_asset_dir(args.dir_path).resolve(), **criteria)
+    else:
+        asset_catalog = catalog.create_catalog(
+            _get_asset_dir(args.dir_path),
+            with_sizes = args.min_mb is not None or args.max_mb is not None or args.json
+        )
+        entries = [o.to_dict() for o in asset_catalog.query(**criteria)]
+
+    if args.json:
+        print(json.dumps(entries, indent = 2))
+    else:
+        for o in entries:
+            print(o['name'])
+    return 0
+
+
+def run_diff(args: argparse.Namespace) -> int:
+    client = _get_service(args)
+    if client is not None:
+        file_diffs = client.diff(args.project_dir.resolve(), args.dsdb_dir.resolve())
+    else:
+        file_diffs = core.diff_project_mods(args.project_dir, args.dsdb_dir)
+    for o in file_diffs:
+        if args.all or o.status != const.DiffStatus.UNCHANGED:
+            print(f'{o.status:<10} {o.relative_path}')
+
+    for status, (count, size) in diff.summarize_diff(file_diffs).items():
+        print(f'{count} {status} files, {size / MEGABYTE:.2f} MB')
+    return 0
+
+
+def run_pack(args: argparse.Namespace) -> int:
+    dest_dir = args.dest_dir or utl.get_default_packed_mods_dir()
+    client = _get_service(args)
+    if client is not None:
+        pack_result = client.pack(
+            args.project_dir.resolve(), dest_dir.resolve(), f'{args.project_dir.name}.zip',
+            args.dsdb.resolve() if args.dsdb is not None else None
+        )
+    else:
+        pack_result = core.pack_project_mods(args.project_dir, dest_dir, f'{args.project_dir.name}.zip', args.dsdb)
+    print(f'{pack_result.zip_file}: {pack_result.packed_files} files packed, '
+          f'{pack_result.skipped_files} unchanged files skipped, {pack_result.bytes_saved / MEGABYTE:.2f} MB saved')
+    return 0
+
+
+def run_pack_all(args: argparse.Namespace) -> int:
+    parent_dir = args.parent_dir or utl.get_default_project_mods_dir()
+    project_dirs = batch.find_project_mods_dirs(parent_dir)
+    if args.mods:
+        project_dirs = [o for o in project_dirs if o.name in args.mods]
+    dest_dir = args.dest_dir or utl.get_default_packed_mods_dir()
+
+    def _print_progress(done: int, total: int, result: batch.BatchPackResult):
+        status = 'packed' if result.success else f'FAILED: {result.error}'
+        print(f'[{done}/{total}] {result.project_dir.name} {status}')
+
+    results = batch.pack_many(project_dirs, dest_dir, args.dsdb, args.workers, _print_progress)
+    report_file = batch.write_batch_report(results, args.report or dest_dir / 'pack_report.json')
+
+    failed_count = sum(not o.success for o in results)
+    print(f'{len(results) - failed_count} mods packed, {failed_count} failed, report: {report_file}')
+    return 1 if failed_count else 0
+
+
+def run_import(args: argparse.Namespace) -> int:
+    dest_dir = args.dest_dir or utl.get_default_project_mods_dir()
+    import_result = archive.import_mods_archive(args.zip_file, dest_dir, args.name, args.workers)
+    print(f'{import_result.project_dir}: {import_result.extracted_files} files imported, '
+          f'{len(import_result.name_list)} assets, {import_result.bytes_extracted / MEGABYTE:.2f} MB')
+    return 0
+
+
+def run_conflicts(args: argparse.Namespace) -> int:
+    conflict_index = conflicts.build_conflict_index(args.parent_dir or utl.get_default_project_mods_dir())
+    conflict_report = conflict_index.get_conflict_report()
+    if args.json:
+        print(json.dumps([o._asdict() for o in conflict_report], indent = 2))
+    else:
+        for o in conflict_report:
+            print(f'{o.mods} <> {o.other_mods}: {len(o.files)} files')
+            for file in o.files:
+                print(f'    {file}')
+    return 1 if conflict_report else 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    catalog_service = service.CatalogService(args.socket)
+    try:
+        catalog_service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_stop(args: argparse.Namespace) -> int:
+    client = service.connect(args.socket)
+    if client is None:
+        print('The catalog service is not running')
+        return 1
+    client.shutdown()
+    return 0
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog = 'DigiSModEditor', description = 'DigiSModEditor command line tools.')
+    parser.add_argument('--trace', type = Path, metavar = 'FILE', help = 'write the timings of the hot paths as JSON')
+    parser.add_argument('--no-service', action = 'store_true', help = 'run in this process even if the catalog service is running')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    query_parser = commands.add_parser('query', help = 'Query the assets of a DSDB or project mods directory.')
+    query_parser.add_argument('dir_path', type = Path, help = 'DSDB or project mods directory')
+    query_parser.add_argument('--prefix', help = 'asset name prefix, e.g. chr')
+    query_parser.add_argument('--kind', help = 'file kind the asset must have, e.g. skel')
+    query_parser.add_argument('--missing', help = 'file kind the asset must not have, e.g. skel')
+    query_parser.add_argument('--anim-code', help = 'animation code the asset must have, e.g. bt01')
+    query_parser.add_argument('--min-mb', type = float, help = 'minimum size in MB, exclusive')
+    query_parser.add_argument('--max-mb', type = float, help = 'maximum size in MB, inclusive')
+    query_parser.add_argument('--size-kind', help = 'file kind the size options apply to, e.g. img')
+    query_parser.add_argument('--json', action = 'store_true', help = 'print the matching assets as JSON')
+    query_parser.set_defaults(func = run_query)
+
+    diff_parser = commands.add_parser('diff', help = 'Compare the files of a project mods with the DSDB.')
+    diff_parser.add_argument('project_dir', type = Path, help = 'project mods directory')
+    diff_parser.add_argument('dsdb_dir', type = Path, help = 'DSDB directory')
+    diff_parser.add_argument('--all', action = 'store_true', help = 'list the unchanged files too')
+    diff_parser.set_defaults(func = run_diff)
+
+    pack_parser = commands.add_parser('pack', help = 'Pack a project mods into a ZIP file.')
+    pack_parser.add_argument('project_dir', type = Path, help = 'project mods directory')
+    pack_parser.add_argument('--dest-dir', type = Path, help = 'directory of the ZIP file, the packed mods directory by default')
+    pack_parser.add_argument('--dsdb', type = Path, help = 'DSDB directory, leave out the files identical to it')
+    pack_parser.set_defaults(func = run_pack)
+
+    pack_all_parser = commands.add_parser('pack-all', help = 'Pack many project mods in parallel.')
+    pack_all_parser.add_argument('parent_dir', type = Path, nargs = '?', help = 'directory of the project mods, the project mods directory by default')
+    pack_all_parser.add_argument('--mods', nargs = '+', help = 'names of the mods to pack, every mods by default')
+    pack_all_parser.add_argument('--dest-dir', type = Path, help = 'directory of the ZIP files, the packed mods directory by default')
+    pack_all_parser.add_argument('--dsdb', type = Path, help = 'DSDB directory, leave out the files identical to it')
+    pack_all_parser.add_argument('--workers', type = int, help = 'maximum number of worker processes')
+    pack_all_parser.add_argument('--report', type = Path, help = 'summary report file, pack_report.json in the destination directory by default')
+    pack_all_parser.set_defaults(func = run_pack_all)
+
+    import_parser = commands.add_parser('import', help = 'Import a packed mods ZIP file as a project mods.')
+    import_parser.add_argument('zip_file', type = Path, help = 'packed mods ZIP file')
+    import_parser.add_argument('--dest-dir', type = Path, help = 'directory of the new project mods, the project mods directory by default')
+    import_parser.add_argument('--name', help = 'name of the new project mods, the ZIP file name by default')
+    import_parser.add_argument('--workers', type = int, help = 'number of extracting threads')
+    import_parser.set_defaults(func = run_import)
+
+    conflicts_parser = commands.add_parser('conflicts', help = 'List the files provided by more than one project mods.')
+    conflicts_parser.add_argument('parent_dir', type = Path, nargs = '?', help = 'directory of the project mods, the project mods directory by default')
+    conflicts_parser.add_argument('--json', action = 'store_true', help = 'print the conflicts as JSON')
+    conflicts_parser.set_defaults(func = run_conflicts)
+
+    serve_parser = commands.add_parser('serve', help = 'Run the catalog service, the other commands use its warm caches.')
+    serve_parser.add_argument('--socket', type = Path, help = f'socket path, {service.SOCKET_FILE_NAME} in the application directory by default')
+    serve_parser.set_defaults(func = run_serve)
+
+    stop_parser = commands.add_parser('stop', help = 'Stop the catalog service.')
+    stop_parser.add_argument('--socket', type = Path, help = f'socket path, {service.SOCKET_FILE_NAME} in the application directory by default')
+    stop_parser.set_defaults(func = run_stop)
+
+    return parser
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.trace is None:
+        return args.func(args)
+
+    deco.set_tracing(True)
+    try:
+        return args.func(args)
+    finally:
+        deco.dump_traces(args.trace)
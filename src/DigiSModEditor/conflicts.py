@@ -0,0 +1,177 @@
+import collections
+import itertools
+import logging
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from typing import Union, Dict, Iterable, List, Set
+
+from . import core
+from . import diff
+from . import catalog
+from . import references
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'ModsConflict',
+    'ConflictIndex',
+    'get_mods_relative_files',
+    'build_conflict_index',
+]
+
+ModsConflict = collections.namedtuple(
+    'ModsConflict',
+    (
+        'mods',
+        'other_mods',
+        'files'
+    )
+)
+
+
+def get_mods_relative_files(project_dir: Union[PathLike, Path]) -> Set[str]:
+    """
+    Returns the files a project mods provides, relative to its 'modfiles' directory.
+
+    The files inherited by reference are provided as well, they end up in the packed mods.
+
+    :param project_dir: The project mods directory
+    :return: A set of relative paths with '/' separators
+    """
+    project_dir = Path(project_dir)
+    files = {PurePosixPath(*Path(o).parts).as_posix() for o, _ in diff.iter_relative_files(project_dir / 'modfiles')}
+    files.update(o for o, _ in references.ReferenceManifest.load(project_dir).items())
+    return files
+
+
+class ConflictIndex:
+    """
+    Inverted index from the relative path of a 'modfiles' file to the mods which provide it.
+
+    Two mods providing the same file overwrite each other in game. The index is updated incrementally
+    per mods, and the conflict report is a single pass over the files provided more than once,
+    instead of comparing every pair of mods.
+    """
+    def __init__(self):
+        self._providers: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._mods_files: Dict[str, Set[str]] = {}
+        self._conflicted: Set[str] = set()
+
+    def __len__(self):
+        return len(self._providers)
+
+    @property
+    def mods_names(self) -> Set[str]: return set(self._mods_files)
+
+    def get_providers(self, relative_path: str) -> Set[str]:
+        """
+        Returns the mods which provide a file.
+
+        :param relative_path: The path of the file relative to 'modfiles', with '/' separators
+        :return: A set of mods names
+        """
+        return set(self._providers.get(relative_path, ()))
+
+    def _add(self, mods_name: str, relative_path: str):
+        providers = self._providers[relative_path]
+        providers.add(mods_name)
+        if len(providers) > 1:
+            self._conflicted.add(relative_path)
+
+    def _remove(self, mods_name: str, relative_path: str):
+        providers = self._providers.get(relative_path)
+        if providers is None:
+            return
+        providers.discard(mods_name)
+        if len(providers) < 2:
+            self._conflicted.discard(relative_path)
+        if not providers:
+            del self._providers[relative_path]
+
+    def add_file(self, mods_name: str, relative_path: str):
+        """
+        Record a single file provided by a mods, e.g. an asset file just copied into it.
+
+        :param mods_name: The name of the mods
+        :param relative_path: The path of the file relative to 'modfiles', with '/' separators
+        """
+        self._mods_files.setdefault(mods_name, set()).add(relative_path)
+        self._add(mods_name, relative_path)
+
+    def remove_file(self, mods_name: str, relative_path: str):
+        files = self._mods_files.get(mods_name)
+        if files is not None and relative_path in files:
+            files.discard(relative_path)
+            self._remove(mods_name, relative_path)
+
+    def set_mods_files(self, mods_name: str, relative_paths: Iterable[str]):
+        """
+        Replace the files provided by a mods. Only the difference with the previous files touches the index.
+
+        :param mods_name: The name of the mods
+        :param relative_paths: The paths of the files relative to 'modfiles', with '/' separators
+        """
+        new_files = set(relative_paths)
+        old_files = self._mods_files.get(mods_name, set())
+        for o in old_files - new_files:
+            self._remove(mods_name, o)
+        for o in new_files - old_files:
+            self._add(mods_name, o)
+        self._mods_files[mods_name] = new_files
+
+    def set_mods_scan(self, mods_name: str, files_text: str):
+        """
+        Replace the files provided by a mods from its scan result, see `core.walk_asset_files`.
+
+        :param mods_name: The name of the mods
+        :param files_text: A text of all file names separated by ';'
+        """
+        self.set_mods_files(
+            mods_name,
+            (catalog.get_relative_file_path(o).as_posix() for o in files_text.split(';') if o)
+        )
+
+    def remove_mods(self, mods_name: str):
+        for o in self._mods_files.pop(mods_name, set()):
+            self._remove(mods_name, o)
+
+    def clear(self):
+        self._providers.clear()
+        self._mods_files.clear()
+        self._conflicted.clear()
+
+    def get_conflicted_files(self) -> Dict[str, List[str]]:
+        """
+        Returns the files provided by more than one mods.
+
+        :return: A dictionary of relative path to the sorted names of the mods providing it
+        """
+        return {o: sorted(self._providers[o]) for o in sorted(self._conflicted)}
+
+    def get_conflict_report(self) -> List[ModsConflict]:
+        """
+        Lists which files each pair of mods fights over.
+
+        :return: A list of `ModsConflict`, sorted by mods names, with the sorted conflicting files of each pair
+        """
+        pairs = collections.defaultdict(list)
+        for relative_path, mods_names in self.get_conflicted_files().items():
+            for pair in itertools.combinations(mods_names, 2):
+                pairs[pair].append(relative_path)
+        return [ModsConflict(a, b, files) for (a, b), files in sorted(pairs.items())]
+
+
+def build_conflict_index(project_mods_dir: Union[PathLike, Path]) -> ConflictIndex:
+    """
+    Builds the conflict index of every project mods inside a directory.
+
+    :param project_mods_dir: The directory containing the project mods, e.g. the project mods directory
+    :return: The conflict index
+    """
+    conflict_index = ConflictIndex()
+    for o in Path(project_mods_dir).iterdir():
+        if o.is_dir() and core.is_project_mods_directory(o):
+            conflict_index.set_mods_files(o.name, get_mods_relative_files(o))
+    log.info(f'Indexed {len(conflict_index)} files of {len(conflict_index.mods_names)} mods: {project_mods_dir}')
+    return conflict_index
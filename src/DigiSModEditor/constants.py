@@ -8,11 +8,51 @@ class Pattern(StrEnum):
     IMG = r'(\w+)\.(img)'
 
 
+class AssetGroup(StrEnum):
+    NAME = 'Name'
+    GEOMETRY = 'Geometry'
+    SKELETON = 'Skeleton'
+    ANIMATION = 'Animation'
+    IMAGE = 'Image'
+
+
+class FileKind(StrEnum):
+    NAME = '.name'
+    GEOMETRY = '.geom'
+    SKELETON = '.skel'
+    ANIMATION = '.anim'
+    IMAGE = '.img'
+
+
+class DiffStatus(StrEnum):
+    UNCHANGED = 'unchanged'
+    MODIFIED = 'modified'
+    NEW = 'new'
+
+
+class IoJobClass(IntEnum):
+    # lower value, higher priority
+    INTERACTIVE = 0
+    PACK = 1
+    BACKGROUND = 2
+
+
+class IoJobState(StrEnum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
 class ItemData(IntEnum):
     NAME = 100
     EXT = 101
     FILENAME = 102
     FILEPATH = 103
+    SORT_KEY = 104
+    INHERITED = 105
 
 
 class LogName(StrEnum):
@@ -47,6 +87,7 @@ class UiPath(StrEnum):
     MODS_CREATE_BTN = f'{L_PANEL}.mods_create_btn'
     # Mods assets
     MODS_ASSET_TV = f'{L_PANEL}.mods_asset_tv'
+    MODS_ASSET_SEARCH_TXT = f'{L_PANEL}.mods_asset_search_text'
 
     # Main tab
     # Setup tab
@@ -55,13 +96,21 @@ class UiPath(StrEnum):
     DSDB_DIR_BTN = f'{SETUP_TAB}.dsdb_dir_btn'
     SETUP_PACK_DIR_TXT = f'{SETUP_TAB}.pack_mods_dir_text'
     SETUP_PACK_DIR_BTN = f'{SETUP_TAB}.pack_mods_dir_btn'
+    SETUP_SHARED_STORE_CHK = f'{SETUP_TAB}.shared_store_chk'
     # Transfer tab
     TRANS_TAB = 'transfer_tab_ui'
     TRANS_SPLIT = f'{TRANS_TAB}.transfer_splitter'
     SRC_ASSET_TV = f'{TRANS_TAB}.dsdb_asset_tv'
+    SRC_ASSET_SEARCH_TXT = f'{TRANS_TAB}.dsdb_asset_search_text'
     TRANS_SELECT_COUNTER = f'{TRANS_TAB}.transfer_selection_counter'
     TRANS_COPY_BTN = f'{TRANS_TAB}.transfer_copy_btn'
+    TRANS_REFERENCE_CHK = f'{TRANS_TAB}.transfer_reference_chk'
+    TRANS_OPEN_ARCHIVE_BTN = f'{TRANS_TAB}.transfer_open_archive_btn'
     # Pack tab
     PACK_TAB = 'pack_tab_ui'
     PACKING_BTN = f'{PACK_TAB}.pack_mods_btn'
+    PACK_DELTA_CHK = f'{PACK_TAB}.pack_delta_chk'
+    PACK_ALL_BTN = f'{PACK_TAB}.pack_all_mods_btn'
     PACK_OPEN_DIR_BTN = f'{PACK_TAB}.pack_open_dir_btn'
+    PACK_IMPORT_BTN = f'{PACK_TAB}.pack_import_btn'
+    PACK_CONFLICTS_BTN = f'{PACK_TAB}.pack_conflicts_btn'
@@ -3,20 +3,165 @@ import json
 import logging
 import os
 import re
+import sys
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from os import PathLike
-from typing import Union, Tuple, Dict, List, Generator
+from typing import Union, Tuple, Dict, List, Generator, Callable, Iterable
 
 import speedcopy
 
 from . import constants as const
 from . import errors as err
 from . import decorators as deco
+from . import digest
+from . import diff
+from . import store as shared_store
+from . import references
+from . import resumable
 
 log = logging.getLogger(const.LogName.MAIN)
 
 
+# the asset groups of the asset structures and their file kind, in display order
+ASSET_GROUP_KINDS = {
+    const.AssetGroup.NAME: const.FileKind.NAME,
+    const.AssetGroup.GEOMETRY: const.FileKind.GEOMETRY,
+    const.AssetGroup.SKELETON: const.FileKind.SKELETON,
+    const.AssetGroup.ANIMATION: const.FileKind.ANIMATION,
+    const.AssetGroup.IMAGE: const.FileKind.IMAGE,
+}
+
+
+class AssetRecord:
+    """
+    Compact scan result of a single asset, the file names are derived from the stem when they are needed.
+
+    Every asset has one '.name', '.geom' and '.skel' file named after its stem. The animations and images
+    only differ by their suffix, e.g. '_bt01' for '<stem>_bt01.anim' or '_tex' for '<stem>_tex.img'.
+    The stem and the suffixes are interned, so the thousands of records of a scan share the same suffix strings.
+    """
+    __slots__ = ('stem', 'anim_suffixes', 'image_suffixes')
+
+    def __init__(self, stem: str, anim_suffixes: Tuple[str, ...] = (), image_suffixes: Tuple[str, ...] = ()):
+        self.stem = sys.intern(stem)
+        self.anim_suffixes = tuple(sys.intern(o) for o in anim_suffixes)
+        self.image_suffixes = tuple(sys.intern(o) for o in image_suffixes)
+
+    def __repr__(self):
+        return f'<AssetRecord {self.stem}: {len(self)} files>'
+
+    def __len__(self):
+        return 3 + len(self.anim_suffixes) + len(self.image_suffixes)
+
+    def __eq__(self, other):
+        if not isinstance(other, AssetRecord):
+            return NotImplemented
+        return (self.stem, self.anim_suffixes, self.image_suffixes) == (other.stem, other.anim_suffixes, other.image_suffixes)
+
+    def __hash__(self):
+        return hash((self.stem, self.anim_suffixes, self.image_suffixes))
+
+    def get_files(self, kind: const.FileKind) -> Tuple[str, ...]:
+        """
+        Returns the file names of a file kind.
+
+        :param kind: The file kind
+        :return: The file names, sorted
+        """
+        if kind == const.FileKind.ANIMATION:
+            return tuple(f'{self.stem}{o}{kind}' for o in self.anim_suffixes)
+        if kind == const.FileKind.IMAGE:
+            return tuple(f'{self.stem}{o}{kind}' for o in self.image_suffixes)
+        return f'{self.stem}{kind}',
+
+    def iter_files(self) -> Generator[Tuple[const.FileKind, str], None, None]:
+        for kind in ASSET_GROUP_KINDS.values():
+            for file_name in self.get_files(kind):
+                yield kind, file_name
+
+    def get_groups(self) -> Dict[str, List[str]]:
+        """
+        Returns the asset groups of the asset, the values of an asset structure, see `to_structure`.
+
+        :return: A dictionary where the keys are the asset group names and the values are lists of asset file names
+        """
+        return {str(group): list(self.get_files(kind)) for group, kind in ASSET_GROUP_KINDS.items()}
+
+    def to_structure(self) -> Dict:
+        return {self.stem: self.get_groups()}
+
+
+def iter_asset_groups(asset: Union[AssetRecord, Dict]) -> Generator[Tuple[str, Dict[str, List[str]]], None, None]:
+    """
+    Iterates the assets of an asset record or an asset structure, so both can be given to the models and the catalog.
+
+    :param asset: An `AssetRecord` or an asset structure, see `get_asset_related_files`
+    :return: A generator of (asset name, asset groups)
+    """
+    if isinstance(asset, AssetRecord):
+        yield asset.stem, asset.get_groups()
+    else:
+        yield from asset.items()
+
+
+# the difference of a scan with the previous scan of the same directory, see `get_scan_delta`
+ScanDelta = collections.namedtuple(
+    'ScanDelta',
+    (
+        'records',
+        'updated',
+        'removed',
+        'base_id',
+        'snapshot_id'
+    )
+)
+
+
+def get_scan_delta(
+        previous: Dict[str, AssetRecord],
+        records: List[AssetRecord],
+        changed: Iterable[str] = ()
+) -> Tuple[List[AssetRecord], List[str]]:
+    """
+    Compares the records of a scan with the records of the previous scan, so the models only apply the difference.
+
+    Without a previous scan only the `changed` assets are returned as updated, there is nothing to compare with.
+
+    :param previous: The records of the previous scan by asset name, empty for a first scan
+    :param records: The records of the scan
+    :param changed: The names of assets to update even if their files are the same, e.g. files moved to another source layer
+    :return: A tuple of the records added or changed, and the names of the assets removed
+    """
+    changed = set(changed)
+    if not previous:
+        return [o for o in records if o.stem in changed], []
+    updated = [o for o in records if o.stem in changed or previous.get(o.stem) != o]
+    stems = {o.stem for o in records}
+    return updated, [o for o in previous if o not in stems]
+
+
+@deco.traced
+def get_asset_record(asset_name: str, files_text: str) -> AssetRecord:
+    """
+    Given an asset name and a text containing all files in a directory, returns the record of the asset.
+
+    This is the scan output sent from the scanner threads to the models, see `get_asset_related_files`
+    for the same result as nested dictionaries.
+
+    :param asset_name: The name of the asset, i.e. its '.name' file
+    :param files_text: A text containing all files in the directory
+    :return: The record of the asset
+    """
+    file_name, ext = os.path.splitext(asset_name)
+    r_anim = f'({file_name})' + const.Pattern.ANIM
+    r_img = f'({file_name})' + const.Pattern.IMG
+
+    anim_suffixes = sorted((o_mid for (_, o_mid, _) in re.findall(r_anim, files_text)), key = lambda o: f'{o}.anim')
+    img_suffixes = sorted((o_mid for (_, o_mid, _) in re.findall(r_img, files_text)), key = lambda o: f'{o}.img')
+    return AssetRecord(file_name, tuple(anim_suffixes), tuple(img_suffixes))
+
+
 def get_asset_related_files(asset_name, files_text) -> Dict:
     """
     Given an asset name and a text containing all files in a directory, returns a dictionary
@@ -33,30 +178,133 @@ def get_asset_related_files(asset_name, files_text) -> Dict:
     :param files_text: A text containing all files in the directory
     :return: A dictionary containing related files for the asset
     """
-    file_name, ext = os.path.splitext(asset_name)
-    # r_geo = f'({file_name})' + const.Pattern.GEO
-    # r_skel = f'({file_name})' + const.Pattern.SKEL
-    r_anim = f'({file_name})' + const.Pattern.ANIM
-    r_img = f'({file_name})' + const.Pattern.IMG
+    return get_asset_record(asset_name, files_text).to_structure()
 
-    result_data = {
-        file_name: {}
-    }
-    name_file = asset_name
-    geo_file = f'{file_name}.geom'
-    skel_file = f'{file_name}.skel'
-    # geo_files = [f'{o_name}.{o_ext}' for (o_name, o_ext) in re.findall(r_geo, files_text)]
-    # skel_files = [f'{o_name}.{o_ext}' for (o_name, o_ext) in re.findall(r_skel, files_text)]
-    anim_files = [f'{o_name}{o_mid}.{o_ext}' for (o_name, o_mid, o_ext) in re.findall(r_anim, files_text)]
-    img_files = [f'{o_name}{o_mid}.{o_ext}' for (o_name, o_mid, o_ext) in re.findall(r_img, files_text)]
 
-    result_data[file_name]['Name'] = [name_file]
-    result_data[file_name]['Geometry'] = [geo_file]
-    result_data[file_name]['Skeleton'] = [skel_file]
-    result_data[file_name]['Animation'] = sorted(anim_files)
-    result_data[file_name]['Image'] = sorted(img_files)
+def walk_asset_files(
+        dir_path: Union[PathLike, Path],
+        checkpoint: Union[Callable[[], None], None] = None
+) -> Tuple[List[str], str]:
+    """
+    Walks a game data directory and collects what is needed to group its files into assets.
+
+    :param dir_path: The directory to walk
+    :param checkpoint: Called before each directory, e.g. `IoScheduler.checkpoint`, it may raise to interrupt the walk
+    :return: A tuple of the '*.name' file names and a text of all file names separated by ';'
+    """
+    name_list = []
+    files_text = ''
+    for root, dirs, files in os.walk(dir_path):
+        if checkpoint is not None:
+            checkpoint()
+        if files:
+            name_list.extend([o for o in files if o.endswith('.name')])
+            temp_text = ';'.join(files)
+            if files_text:
+                files_text += f';{temp_text}'
+            else:
+                files_text += f'{temp_text}'
+
+    return _add_reference_files(dir_path, name_list, files_text)
+
+
+def _add_reference_files(dir_path: Union[PathLike, Path], name_list: List[str], files_text: str) -> Tuple[List[str], str]:
+    # files inherited by reference are part of the mods without being on disk
+    reference_names = get_reference_file_names(dir_path)
+    if reference_names:
+        reference_names -= set(files_text.split(';'))
+        name_list.extend([o for o in reference_names if o.endswith('.name')])
+        temp_text = ';'.join(reference_names)
+        files_text = f'{files_text};{temp_text}' if files_text else temp_text
+    return name_list, files_text
+
+
+def walk_project_mods_files(
+        project_mods_dir: Union[PathLike, Path],
+        checkpoint: Union[Callable[[], None], None] = None
+) -> Dict[Path, Tuple[List[str], str]]:
+    """
+    Walks every project mods of a directory at once, instead of one walk per project mods.
+
+    The directory is traversed a single time with `os.scandir`, depth first and in name order, and every file
+    is routed to its project mods by its path prefix '<mods>/modfiles/'. Only the 'modfiles' subdirectories
+    are descended into.
+
+    :param project_mods_dir: The directory containing the project mods, e.g. the project mods directory
+    :param checkpoint: Called before each directory, e.g. `IoScheduler.checkpoint`, it may raise to interrupt the walk
+    :return: A dictionary of 'modfiles' directory to the same tuple as `walk_asset_files`, for every valid project mods
+    """
+    mods_files: Dict[str, List[str]] = collections.defaultdict(list)
+    mods_entries: Dict[str, set] = collections.defaultdict(set)
+    # (directory, mods name, inside modfiles), None for the project mods directory itself
+    stack = [(os.fspath(project_mods_dir), None, False)]
+    while stack:
+        abs_dir, mods_name, in_mods = stack.pop()
+        if checkpoint is not None:
+            checkpoint()
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key = lambda o: o.name)
+        except OSError as e:
+            log.warning(f'Cannot walk directory: {abs_dir}, {e}')
+            continue
+
+        sub_dirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks = False):
+                if mods_name is None:
+                    sub_dirs.append((entry.path, entry.name, False))
+                elif in_mods:
+                    sub_dirs.append((entry.path, mods_name, True))
+                elif entry.name == 'modfiles':
+                    mods_entries[mods_name].add(entry.name)
+                    sub_dirs.append((entry.path, mods_name, True))
+            elif in_mods:
+                mods_files[mods_name].append(entry.name)
+            elif mods_name is not None:
+                mods_entries[mods_name].add(entry.name)
+        # reversed so the stack pops them in name order
+        stack.extend(reversed(sub_dirs))
+
+    result = {}
+    project_mods_dir = Path(project_mods_dir)
+    for mods_name, entries in mods_entries.items():
+        if not {'modfiles', 'METADATA.json', 'DESCRIPTION.html'} <= entries:
+            continue
+        files = mods_files.get(mods_name, [])
+        mods_dir = project_mods_dir / mods_name / 'modfiles'
+        result[mods_dir] = _add_reference_files(mods_dir, [o for o in files if o.endswith('.name')], ';'.join(files))
+    return result
+
+
+def get_reference_file_names(dir_path: Union[PathLike, Path]) -> set:
+    """
+    Returns the names of the files a 'modfiles' directory inherits by reference.
+
+    :param dir_path: The 'modfiles' directory of a project mods, any other directory has no references
+    :return: A set of file names
+    """
+    dir_path = Path(dir_path)
+    if dir_path.name != 'modfiles' or not (dir_path.parent / references.MANIFEST_FILE_NAME).exists():
+        return set()
+    manifest = references.ReferenceManifest.load(dir_path.parent)
+    return {PurePosixPath(o).name for o, _ in manifest.items()}
+
+
+def scan_asset_structures(dir_path: Union[PathLike, Path]) -> Generator[Dict, None, None]:
+    """
+    Scans a game data directory and yields the asset structure of every '*.name' file found.
+
+    This is the same scan the ScannerThread runs, without Qt, for scripts and the command line.
 
-    return result_data
+    :param dir_path: The directory to scan
+    :return: A generator of asset structures, see `get_asset_related_files`
+    """
+    name_list, files_text = walk_asset_files(dir_path)
+    for name in name_list:
+        asset_files = get_asset_related_files(name, files_text)
+        if asset_files:
+            yield asset_files
 
 
 def create_project_mods_structure(project_name: str, dir_path: Union[PathLike, Path]) -> Path:
@@ -264,11 +512,46 @@ CopyResult = collections.namedtuple(
 )
 
 
+def get_file_digests(
+        files: List[Union[PathLike, Path]],
+        cache: Union[digest.DigestCache, None] = None
+) -> Dict[Path, str]:
+    """
+    Returns the content digests of the given files.
+
+    The digests come from the persistent digest cache, so only the files which changed since
+    they were last hashed are read again.
+
+    :param files: The files to get the digests of
+    :param cache: The digest cache to use, the application digest cache by default
+    :return: A dictionary of file path to hexadecimal digest
+    """
+    if cache is None:
+        cache = digest.get_digest_cache()
+    return cache.get_digests(files)
+
+
+def get_file_digest(file: Union[PathLike, Path], cache: Union[digest.DigestCache, None] = None) -> str:
+    """
+    Returns the content digest of a single file, see `get_file_digests`.
+
+    :param file: The file to get the digest of
+    :param cache: The digest cache to use, the application digest cache by default
+    :return: The hexadecimal digest
+    """
+    return get_file_digests([file], cache)[Path(file)]
+
+
+@deco.traced
 def copy_asset_file(
         src_dir: Union[PathLike, Path],
         dest_dir: Union[PathLike, Path],
         file: str,
-        replace: bool = True
+        replace: bool = True,
+        verify: bool = False,
+        store: Union[shared_store.SharedAssetStore, None] = None,
+        on_progress: Union[resumable.ProgressCallback, None] = None,
+        checkpoint: Union[Callable[[], None], None] = None
 ) -> CopyResult:
     """
     Copies a file from a source directory to a destination directory.
@@ -282,10 +565,17 @@ def copy_asset_file(
 
     If the destination directory does not exist, it is created with parents.
 
+    Files of `resumable.LARGE_FILE_SIZE` or more are copied in chunks by `resumable.copy_file_resumable`
+    instead, an interrupted copy resumes on the next call and the destination is replaced in a single rename.
+
     :param src_dir: The source directory containing the file to copy
     :param dest_dir: The destination directory to copy the file to
     :param file: The name of the file to copy
     :param replace: Whether to overwrite the destination file if it already exists
+    :param verify: Whether to compare the content digests of the source and the copied file
+    :param store: A shared asset store, if given the file is linked from the store instead of copied
+    :param on_progress: Called with (copied bytes, total bytes) after each chunk of a large file
+    :param checkpoint: Called before each chunk of a large file, it may raise to interrupt the copy
     :return: A `CopyResult` indicating the success and details of the copy operation
     """
     src_path = src_dir / file
@@ -295,6 +585,13 @@ def copy_asset_file(
     if not src_path.exists():
         return CopyResult(False, src_path, dest_path, f'Source file {src_path} does not exist')
 
+    src_size = os.stat(src_path).st_size
+    if store is None and src_size >= resumable.LARGE_FILE_SIZE:
+        result = _copy_large_asset_file(src_path, dest_path, replace, verify, on_progress, checkpoint)
+        if result.success:
+            deco.trace_add(items = 1, bytes = src_size)
+        return result
+
     if dest_path.exists():
         if replace:
             os.rename(dest_path, dest_old)
@@ -306,13 +603,24 @@ def copy_asset_file(
                 f'Destination file {dest_path} already exists. Use the replace option to overwrite.'
             )
 
-    if not dest_dir.exists():
-        dest_dir.mkdir(parents = True)
-    result = speedcopy.copyfile(str(src_path), str(dest_path))
+    # concurrent copies into the same new directory, e.g. `aio.transfer_files`, all try to create it
+    dest_dir.mkdir(parents = True, exist_ok = True)
+    if store is not None:
+        result = store.link_file(src_path, dest_path)
+    else:
+        result = speedcopy.copyfile(str(src_path), str(dest_path))
+    if result and verify:
+        digests = get_file_digests([src_path, dest_path])
+        if digests[src_path] != digests[dest_path]:
+            log.error(f'Copied file content differs from source: {dest_path}')
+            shared_store.remove_file(dest_path)
+            result = False
     if result:
         if dest_old.exists():
-            os.remove(dest_old)
+            # the replaced file may be a read only link to the shared store
+            shared_store.remove_file(dest_old)
 
+        deco.trace_add(items = 1, bytes = src_size)
         return CopyResult(True, src_path, dest_path, f'Successfully copied {src_path} to {dest_path}.')
     else:
         if dest_old.exists():
@@ -321,10 +629,43 @@ def copy_asset_file(
         return CopyResult(False, src_path, dest_path, f'Failed to copy {src_path} to {dest_path}.')
 
 
+def _copy_large_asset_file(
+        src_path: Path,
+        dest_path: Path,
+        replace: bool,
+        verify: bool,
+        on_progress: Union[resumable.ProgressCallback, None],
+        checkpoint: Union[Callable[[], None], None]
+) -> CopyResult:
+    # no '.old' backup, the previous file stays in place until the complete copy is renamed over it
+    if dest_path.exists() and not replace:
+        return CopyResult(
+            False,
+            src_path,
+            dest_path,
+            f'Destination file {dest_path} already exists. Use the replace option to overwrite.'
+        )
+
+    dest_path.parent.mkdir(parents = True, exist_ok = True)
+    try:
+        resumable.copy_file_resumable(src_path, dest_path, on_progress = on_progress, checkpoint = checkpoint)
+    except OSError as e:
+        log.error(f'Copy interrupted, it resumes on the next copy: {dest_path}, {e}')
+        return CopyResult(False, src_path, dest_path, f'Failed to copy {src_path} to {dest_path}.')
+    if verify:
+        digests = get_file_digests([src_path, dest_path])
+        if digests[src_path] != digests[dest_path]:
+            log.error(f'Copied file content differs from source: {dest_path}')
+            os.remove(dest_path)
+            return CopyResult(False, src_path, dest_path, f'Failed to copy {src_path} to {dest_path}.')
+    return CopyResult(True, src_path, dest_path, f'Successfully copied {src_path} to {dest_path}.')
+
+
 def copy_asset(
         src_files: List[Union[PathLike, Path]],
         dest_dir: Union[PathLike, Path],
-        replace: bool = True
+        replace: bool = True,
+        store: Union[shared_store.SharedAssetStore, None] = None
 ) -> Generator[CopyResult, None, None]:
     """
     Copies all files in the given list from their respective source directories to a single destination directory.
@@ -334,10 +675,146 @@ def copy_asset(
     for src_file in src_files:
         src_dir = src_file.parent
         file_name = src_file.name
-        yield copy_asset_file(src_dir, dest_dir, file_name, replace = replace)
+        yield copy_asset_file(src_dir, dest_dir, file_name, replace = replace, store = store)
+
+
+def reference_asset_file(
+        src_dir: Union[PathLike, Path],
+        dest_dir: Union[PathLike, Path],
+        file: str,
+        manifest: references.ReferenceManifest,
+        replace: bool = True,
+        cache: Union[digest.DigestCache, None] = None
+) -> CopyResult:
+    """
+    Records a file of a project mods as a reference to its DSDB source instead of copying it.
+
+    The reference is added to the given manifest, the caller saves the manifest once all files are
+    referenced. An existing file at the destination is only replaced if it is identical to the source,
+    a modified file is never discarded for a reference, since the reference keeps no copy of it.
+
+    :param src_dir: The source directory containing the file
+    :param dest_dir: The destination directory inside the 'modfiles' directory of the manifest
+    :param file: The name of the file
+    :param manifest: The reference manifest of the project mods
+    :param replace: Whether to replace the destination file if it already exists and is identical to the source
+    :param cache: The digest cache to compare an existing destination file with, the application digest cache by default
+    :return: A `CopyResult` indicating the success and details of the operation
+    """
+    src_path = Path(src_dir) / file
+    dest_path = Path(dest_dir) / file
+
+    if not src_path.exists():
+        return CopyResult(False, src_path, dest_path, f'Source file {src_path} does not exist')
+
+    if dest_path.exists():
+        if replace:
+            if not _is_same_content(src_path, dest_path, cache):
+                return CopyResult(
+                    False,
+                    src_path,
+                    dest_path,
+                    f'Destination file {dest_path} is modified, copy the file instead of referencing it to replace it.'
+                )
+            shared_store.remove_file(dest_path)
+        else:
+            return CopyResult(
+                False,
+                src_path,
+                dest_path,
+                f'Destination file {dest_path} already exists. Use the replace option to overwrite.'
+            )
+
+    manifest.add(manifest.get_relative_path(dest_path), src_path)
+    return CopyResult(True, src_path, dest_path, f'Successfully referenced {src_path} as {dest_path}.')
+
+
+def _is_same_content(file_a: Path, file_b: Path, cache: Union[digest.DigestCache, None] = None) -> bool:
+    # the sizes first, a modified file rarely keeps its size and is not read then
+    if os.stat(file_a).st_size != os.stat(file_b).st_size:
+        return False
+    digests = get_file_digests([file_a, file_b], cache)
+    return digests[file_a] == digests[file_b]
+
+
+def materialize_reference(
+        manifest: references.ReferenceManifest,
+        relative_path: str,
+        store: Union[shared_store.SharedAssetStore, None] = None
+) -> CopyResult:
+    """
+    Copies a referenced file into the 'modfiles' directory and removes its reference.
+
+    :param manifest: The reference manifest of the project mods
+    :param relative_path: The path of the file relative to 'modfiles'
+    :param store: A shared asset store, if given the file is linked from the store instead of copied
+    :return: A `CopyResult` indicating the success and details of the copy operation
+    """
+    dest_path = manifest.mods_dir / relative_path
+    source = manifest.get_source(relative_path)
+    if source is None:
+        return CopyResult(False, None, dest_path, f'File {dest_path} is not a reference')
+
+    result = copy_asset_file(source.parent, dest_path.parent, dest_path.name, store = store)
+    if result.success:
+        manifest.remove(relative_path)
+        manifest.save()
+    return result
+
+
+def prepare_asset_file_for_edit(
+        file_path: Union[PathLike, Path],
+        manifest: Union[references.ReferenceManifest, None] = None
+) -> Path:
+    """
+    Makes sure a project mods file can be modified in place without side effects.
+
+    A file inherited by reference is materialized from its DSDB source first, and a file shared
+    through the shared asset store is broken out into a private copy.
+
+    :param file_path: The mods file about to be modified
+    :param manifest: The reference manifest of the project mods, loaded from disk if not given
+    :return: The path of the file, ready to be modified
+    :raises CopyAssetError: If a referenced file cannot be materialized
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        if manifest is None:
+            project_dir = references.find_project_mods_dir(file_path)
+            if project_dir is not None:
+                manifest = references.ReferenceManifest.load(project_dir)
+        if manifest is not None:
+            relative_path = manifest.get_relative_path(file_path)
+            if relative_path in manifest:
+                result = materialize_reference(manifest, relative_path)
+                if not result.success:
+                    raise err.CopyAssetError(result.message)
+                return file_path
+
+    shared_store.detach_file(file_path)
+    return file_path
+
+
+PackResult = collections.namedtuple(
+    'PackResult',
+    (
+        'zip_file',
+        'packed_files',
+        'skipped_files',
+        'bytes_saved'
+    )
+)
 
 
-def pack_project_mods(project_mods_dir: Union[PathLike, Path], dest_dir: Union[PathLike, Path], zip_file_name: str):
+@deco.traced
+def pack_project_mods(
+        project_mods_dir: Union[PathLike, Path],
+        dest_dir: Union[PathLike, Path],
+        zip_file_name: str,
+        dsdb_dir: Union[PathLike, Path, None] = None,
+        cache: Union[digest.DigestCache, None] = None,
+        checkpoint: Union[Callable[[], None], None] = None
+) -> PackResult:
     """
     Packs all files in the given project mods directory into a ZIP file.
 
@@ -345,19 +822,89 @@ def pack_project_mods(project_mods_dir: Union[PathLike, Path], dest_dir: Union[P
     The contents of the project mods directory are recursively added to the ZIP file,
     maintaining their relative directory structure.
 
+    If a DSDB directory is given, the mods files which are byte-identical to their DSDB
+    counterpart are left out of the ZIP file (delta packing), see `diff_project_mods`.
+
     :param project_mods_dir: The project mods directory to pack
     :param dest_dir: The destination directory to create the ZIP file in
     :param zip_file_name: The name of the ZIP file to create
+    :param dsdb_dir: The DSDB directory to compare with for delta packing, or None to pack every file
+    :param cache: The digest cache to use for delta packing, the application digest cache by default
+    :param checkpoint: Called before each packed file and during the delta comparison, it may raise to interrupt the packing, the incomplete ZIP file is removed
+    :return: A `PackResult` with the packed and skipped file counts and the bytes saved by delta packing
     :raises InvalidProjectModsDirectory: If `project_mods_dir` is not a valid project mods directory
     """
     if not is_project_mods_directory(project_mods_dir):
         raise err.InvalidModsDirectory(f'Directory is not project mods directory: {project_mods_dir}')
     zip_file_path = dest_dir / zip_file_name
 
-    with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
-        for o in project_mods_dir.rglob('*'):
-            if not o.is_dir():
-                relative_path = o.relative_to(project_mods_dir)
-                zip_file.write(o, relative_path)
+    unchanged_files = set()
+    bytes_saved = 0
+    if dsdb_dir is not None:
+        for o in diff_project_mods(project_mods_dir, dsdb_dir, cache, checkpoint):
+            if o.status == const.DiffStatus.UNCHANGED:
+                unchanged_files.add(o.mods_file)
+                bytes_saved += o.size
+
+    manifest = references.ReferenceManifest.load(project_mods_dir)
+    skipped_count = 0
+
+    packed_files = 0
+    try:
+        with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
+            for o in project_mods_dir.rglob('*'):
+                if o.is_dir() or o == manifest.manifest_file or resumable.is_partial_file(o):
+                    continue
+                if o in unchanged_files:
+                    skipped_count += 1
+                else:
+                    if checkpoint is not None:
+                        checkpoint()
+                    relative_path = o.relative_to(project_mods_dir)
+                    zip_file.write(o, relative_path)
+                    packed_files += 1
+
+            # resolve the files inherited by reference, they are DSDB files by definition
+            for relative_path, source in manifest.items():
+                if (manifest.mods_dir / relative_path).exists():
+                    continue
+                if dsdb_dir is not None:
+                    skipped_count += 1
+                    bytes_saved += source.stat().st_size
+                else:
+                    if checkpoint is not None:
+                        checkpoint()
+                    zip_file.write(source, f'modfiles/{relative_path}')
+                    packed_files += 1
+    except BaseException:
+        # interrupted by the checkpoint, an I/O error or the user, an incomplete ZIP file is never left behind
+        zip_file_path.unlink(missing_ok = True)
+        raise
+
+    deco.trace_add(items = packed_files, bytes = zip_file_path.stat().st_size)
+    if dsdb_dir is not None:
+        log.info(f'Delta packing left out {skipped_count} unchanged files, {bytes_saved} bytes saved: {zip_file_path}')
+    return PackResult(zip_file_path, packed_files, skipped_count, bytes_saved)
+
+
+def diff_project_mods(
+        project_mods_dir: Union[PathLike, Path],
+        dsdb_dir: Union[PathLike, Path],
+        cache: Union[digest.DigestCache, None] = None,
+        checkpoint: Union[Callable[[], None], None] = None
+) -> List[diff.FileDiff]:
+    """
+    Reports which files of a project mods are unchanged, modified or new compared to the DSDB.
 
+    See `diff.diff_mods_files` for how the files are compared.
 
+    :param project_mods_dir: The project mods directory
+    :param dsdb_dir: The DSDB directory the mods is based on
+    :param cache: The digest cache to use, the application digest cache by default
+    :param checkpoint: Called regularly during the comparison, it may raise to interrupt it
+    :return: A list of `diff.FileDiff` sorted by relative path
+    :raises InvalidModsDirectory: If `project_mods_dir` is not a valid project mods directory
+    """
+    if not is_project_mods_directory(project_mods_dir):
+        raise err.InvalidModsDirectory(f'Directory is not project mods directory: {project_mods_dir}')
+    return diff.diff_mods_files(project_mods_dir / 'modfiles', dsdb_dir, cache, checkpoint)
@@ -1,9 +1,26 @@
+import bisect
+import json
+import os
+import threading
+import time
 from os import PathLike
 from pathlib import Path
 from functools import wraps
+from typing import Union, Dict, Tuple
 
 from . import errors as err
 
+# set to a non empty value to trace from start up, see `set_tracing`
+TRACE_ENV_VAR = 'DIGIS_TRACE'
+# upper bounds of the latency histogram buckets, in microseconds, the last bucket is unbounded
+HISTOGRAM_BOUNDS_US = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+_tracing = bool(os.environ.get(TRACE_ENV_VAR))
+_trace_lock = threading.Lock()
+_trace_stats: Dict[str, 'TraceStats'] = {}
+_trace_totals = [0, 0]
+_trace_local = threading.local()
+
 
 def validate_directory(func):
     @wraps(func)
@@ -19,3 +36,184 @@ def validate_directory(func):
             raise err.InvalidDirectoryPath(f'Invalid directory path: {dir_path}')
         return func(*args, **kwargs)
     return wrapper
+
+
+class TraceStats:
+    """Aggregated measurements of a traced function or span."""
+    __slots__ = ('count', 'total_time', 'max_time', 'items', 'bytes', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_US) + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 3),
+            'mean_us': round(self.total_time * 1000000 / self.count, 1) if self.count else 0.0,
+            'max_us': round(self.max_time * 1000000, 1),
+            'items': self.items,
+            'bytes': self.bytes,
+            'histogram_us': {
+                **{f'<={o}': n for o, n in zip(HISTOGRAM_BOUNDS_US, self.histogram)},
+                f'>{HISTOGRAM_BOUNDS_US[-1]}': self.histogram[-1],
+            },
+        }
+
+
+class Span:
+    """A timed section of code, its items and bytes are added with `trace_add`, see `span`."""
+    __slots__ = ('name', 'items', 'bytes', '_start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+        self._start = 0.0
+
+    def __enter__(self):
+        stack = getattr(_trace_local, 'stack', None)
+        if stack is None:
+            stack = _trace_local.stack = []
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._start
+        _trace_local.stack.pop()
+        with _trace_lock:
+            stats = _trace_stats.get(self.name)
+            if stats is None:
+                stats = _trace_stats[self.name] = TraceStats()
+            stats.count += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            stats.items += self.items
+            stats.bytes += self.bytes
+            stats.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_US, elapsed * 1000000)] += 1
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def set_tracing(enabled: bool):
+    """
+    Turns tracing on or off. While off, traced functions and spans cost a single flag check.
+
+    :param enabled: Whether to record the traced functions and spans
+    """
+    global _tracing
+    _tracing = enabled
+
+
+def is_tracing() -> bool:
+    return _tracing
+
+
+def span(name: str):
+    """
+    Times a section of code under a name, e.g. `with deco.span('scan'):`.
+
+    :param name: The name the measurements are aggregated under
+    :return: A context manager, it does nothing while tracing is off
+    """
+    if not _tracing:
+        return _NULL_SPAN
+    return Span(name)
+
+
+def trace_add(items: int = 0, bytes: int = 0):
+    """
+    Counts items, e.g. files, and bytes processed by the innermost span of the calling thread.
+
+    The totals, see `get_trace_totals`, are updated at once, so a long span, e.g. a whole scan, shows a live
+    throughput. The span statistics are only updated when the span exits.
+
+    :param items: The number of items processed
+    :param bytes: The number of bytes processed
+    """
+    if not _tracing:
+        return
+    stack = getattr(_trace_local, 'stack', None)
+    if stack:
+        stack[-1].items += items
+        stack[-1].bytes += bytes
+        with _trace_lock:
+            _trace_totals[0] += items
+            _trace_totals[1] += bytes
+
+
+def traced(func = None, *, name: Union[str, None] = None):
+    """
+    Times every call of a function, used as `@traced` or `@traced(name = 'scan')`.
+
+    :param func: The function to trace
+    :param name: The name the measurements are aggregated under, the function qualified name by default
+    """
+    if func is None:
+        return lambda o: traced(o, name = name)
+    span_name = name or f'{func.__module__.rsplit(".", 1)[-1]}.{func.__qualname__}'
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _tracing:
+            return func(*args, **kwargs)
+        with Span(span_name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def get_trace_stats() -> Dict[str, Dict]:
+    """
+    Returns the measurements of every traced function and span.
+
+    :return: A dictionary of span name to its call count, latencies, items, bytes and latency histogram
+    """
+    with _trace_lock:
+        return {k: _trace_stats[k].to_dict() for k in sorted(_trace_stats)}
+
+
+def get_trace_totals() -> Tuple[int, int]:
+    """
+    Returns the items and bytes counted by `trace_add` since the start, sample it to get the throughput.
+
+    :return: A tuple of the items count and the bytes count
+    """
+    with _trace_lock:
+        return _trace_totals[0], _trace_totals[1]
+
+
+def reset_traces():
+    with _trace_lock:
+        _trace_stats.clear()
+        _trace_totals[0] = _trace_totals[1] = 0
+
+
+def dump_traces(file_path: Union[PathLike, Path, None] = None) -> str:
+    """
+    Dumps the measurements, see `get_trace_stats`, as JSON.
+
+    :param file_path: The file to write the JSON to, or None to only return it
+    :return: The JSON text
+    """
+    text = json.dumps(get_trace_stats(), indent = 4)
+    if file_path is not None:
+        with open(file_path, 'w') as f:
+            f.write(text)
+    return text
@@ -0,0 +1,129 @@
+import collections
+import logging
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Union, Dict, List, Generator, Tuple, Callable
+
+from . import digest
+from . import resumable
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+# the files of equal size are hashed in batches, with a checkpoint between batches
+DIGEST_BATCH_SIZE = 256
+
+__all__ = [
+    'FileDiff',
+    'iter_relative_files',
+    'diff_mods_files',
+    'summarize_diff',
+]
+
+FileDiff = collections.namedtuple(
+    'FileDiff',
+    (
+        'relative_path',
+        'status',
+        'mods_file',
+        'source_file',
+        'size'
+    )
+)
+
+
+def iter_relative_files(dir_path: Union[PathLike, Path]) -> Generator[Tuple[str, os.DirEntry], None, None]:
+    """
+    Walks a directory with `os.scandir` and yields every file with its path relative to the directory.
+
+    The DirEntry is yielded as well, its stat result is cached by the walk on most platforms. The files left by an
+    interrupted resumable copy are not mods files and are skipped, see `resumable.is_partial_file`.
+
+    :param dir_path: The directory to walk
+    :return: A generator of (relative path, DirEntry) tuples, relative paths use the OS separator
+    """
+    stack = [('', os.fspath(dir_path))]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks = False):
+                    stack.append((rel_path, entry.path))
+                elif entry.is_file() and not resumable.is_partial_file(entry.name):
+                    yield rel_path, entry
+
+
+def diff_mods_files(
+        mods_dir: Union[PathLike, Path],
+        source_dir: Union[PathLike, Path],
+        cache: Union[digest.DigestCache, None] = None,
+        checkpoint: Union[Callable[[], None], None] = None
+) -> List[FileDiff]:
+    """
+    Compares every file of a 'modfiles' directory with its counterpart in the DSDB directory.
+
+    Files are paired by their path relative to each directory. A file without counterpart is new,
+    a file whose size differs is modified without reading it, and only the files of equal size
+    are compared by content digest, computed in parallel through the digest cache.
+
+    :param mods_dir: The 'modfiles' directory of a project mods
+    :param source_dir: The DSDB directory the mods is based on
+    :param cache: The digest cache to use, the application digest cache by default
+    :param checkpoint: Called before each compared file and each batch of digests, it may raise to interrupt the diff
+    :return: A list of `FileDiff` sorted by relative path
+    """
+    mods_dir = Path(mods_dir)
+    source_dir = Path(source_dir)
+    result = []
+    same_size = []
+    for rel_path, entry in iter_relative_files(mods_dir):
+        if checkpoint is not None:
+            checkpoint()
+        mods_file = Path(entry.path)
+        source_file = source_dir / rel_path
+        size = entry.stat().st_size
+        try:
+            source_size = os.stat(source_file).st_size
+        except FileNotFoundError:
+            result.append(FileDiff(rel_path, const.DiffStatus.NEW, mods_file, None, size))
+            continue
+
+        if source_size != size:
+            result.append(FileDiff(rel_path, const.DiffStatus.MODIFIED, mods_file, source_file, size))
+        else:
+            same_size.append((rel_path, mods_file, source_file, size))
+
+    if same_size:
+        if cache is None:
+            cache = digest.get_digest_cache()
+        digests = {}
+        for i in range(0, len(same_size), DIGEST_BATCH_SIZE):
+            if checkpoint is not None:
+                checkpoint()
+            digests.update(cache.get_digests([p for o in same_size[i:i + DIGEST_BATCH_SIZE] for p in o[1:3]]))
+        for rel_path, mods_file, source_file, size in same_size:
+            if digests[mods_file] == digests[source_file]:
+                status = const.DiffStatus.UNCHANGED
+            else:
+                status = const.DiffStatus.MODIFIED
+            result.append(FileDiff(rel_path, status, mods_file, source_file, size))
+
+    result.sort(key = lambda o: o.relative_path)
+    log.debug(f'Compared {len(result)} mods files, {len(same_size)} by content: {mods_dir}')
+    return result
+
+
+def summarize_diff(file_diffs: List[FileDiff]) -> Dict[const.DiffStatus, Tuple[int, int]]:
+    """
+    Counts the files and bytes of each diff status.
+
+    :param file_diffs: The result of `diff_mods_files`
+    :return: A dictionary of status to (file count, total bytes)
+    """
+    summary = {o: (0, 0) for o in const.DiffStatus}
+    for o in file_diffs:
+        count, size = summary[o.status]
+        summary[o.status] = (count + 1, size + o.size)
+    return summary
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import Union, Dict, Iterable, List, Tuple
+
+from . import utils as utl
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'hash_file',
+    'DigestCache',
+    'get_digest_cache',
+]
+
+READ_BUFFER_SIZE = 4 * 1024 * 1024  # 4MB
+DIGEST_SIZE = 20
+SQLITE_MAX_VARIABLES = 900
+
+FileStamp = Tuple[int, int, int]
+
+
+def hash_file(file_path: Union[PathLike, Path], buffer_size: int = READ_BUFFER_SIZE) -> str:
+    """
+    Returns the BLAKE2b digest of a file content.
+
+    The file is read with large `readinto` calls into a single reused buffer, with Python's own buffering
+    disabled. The reads are already larger than any useful buffer, so an `io.BufferedReader` would only add a
+    copy of every chunk, and a new bytes object per read.
+
+    :param file_path: The file to hash
+    :param buffer_size: The size of each read
+    :return: The hexadecimal digest
+    """
+    file_hash = hashlib.blake2b(digest_size = DIGEST_SIZE)
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(file_path, 'rb', buffering = 0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            file_hash.update(view[:size])
+    return file_hash.hexdigest()
+
+
+def get_file_stamp(file_path: Union[PathLike, Path]) -> FileStamp:
+    """
+    Returns the (inode, size, mtime_ns) stamp of a file, which changes whenever the file content may have changed.
+
+    :param file_path: The file to stamp
+    :return: A tuple of inode, size and modification time in nanoseconds
+    """
+    stat = os.stat(file_path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class DigestCache:
+    """
+    Persistent cache of file content digests.
+
+    Digests are stored in SQLite and keyed by (path, inode, size, mtime_ns), a cached digest is only
+    returned while the file keeps the same stamp. Cache misses are hashed in parallel worker threads.
+    The cache can be shared between threads, every process should open its own instance.
+    """
+    def __init__(self, db_path: Union[PathLike, Path, None] = None, max_workers: Union[int, None] = None):
+        self._db_path = Path(db_path) if db_path is not None else utl.get_app_dir() / 'digest_cache.sqlite3'
+        self._max_workers = max_workers or min(8, (os.cpu_count() or 1) + 2)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._db_path, timeout = 30, check_same_thread = False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS digests ('
+                'path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, digest TEXT)'
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def db_path(self) -> Path: return self._db_path
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, Tuple[int, int, int, str]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[i:i + SQLITE_MAX_VARIABLES]
+                rows = self._connection.execute(
+                    f'SELECT path, inode, size, mtime_ns, digest FROM digests WHERE path IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                for path, inode, size, mtime_ns, digest in rows:
+                    found[path] = (inode, size, mtime_ns, digest)
+        return found
+
+    def _store(self, rows: List[Tuple[str, int, int, int, str]]):
+        if not rows:
+            return
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO digests (path, inode, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def get_digest(self, file_path: Union[PathLike, Path]) -> str:
+        """
+        Returns the digest of a file, hashing it only if it changed since it was last hashed.
+
+        :param file_path: The file to get the digest of
+        :return: The hexadecimal digest
+        :raises FileNotFoundError: If the file does not exist
+        """
+        return self.get_digests([file_path])[Path(file_path)]
+
+    def get_digests(self, file_paths: Iterable[Union[PathLike, Path]]) -> Dict[Path, str]:
+        """
+        Returns the digests of many files. Unchanged files are answered from the cache,
+        the others are hashed in parallel and stored.
+
+        :param file_paths: The files to get the digests of
+        :return: A dictionary of file path to hexadecimal digest
+        :raises FileNotFoundError: If one of the files does not exist
+        """
+        keys: Dict[Path, str] = {}
+        stamps: Dict[str, FileStamp] = {}
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            keys[Path(file_path)] = key
+            stamps[key] = get_file_stamp(key)
+
+        result = {}
+        misses = []
+        cached = self._lookup(list(stamps))
+        for key, stamp in stamps.items():
+            row = cached.get(key)
+            if row is not None and row[:3] == stamp:
+                result[key] = row[3]
+            else:
+                misses.append(key)
+
+        if misses:
+            log.debug(f'Hashing {len(misses)} files, {len(result)} digests found in cache')
+            if len(misses) == 1:
+                digests = [hash_file(misses[0])]
+            else:
+                with ThreadPoolExecutor(max_workers = self._max_workers) as executor:
+                    digests = list(executor.map(hash_file, misses))
+            # a file rewritten while it was hashed keeps its digest out of the cache, it no longer matches the stamp
+            rows = []
+            for key, digest in zip(misses, digests):
+                try:
+                    if get_file_stamp(key) == stamps[key]:
+                        rows.append((key, *stamps[key], digest))
+                except FileNotFoundError:
+                    pass
+            self._store(rows)
+            result.update(zip(misses, digests))
+
+        return {path: result[key] for path, key in keys.items()}
+
+    def invalidate(self, file_paths: Iterable[Union[PathLike, Path]]):
+        """
+        Forget the cached digests of the given files.
+
+        :param file_paths: The files to forget
+        """
+        keys = [(os.path.abspath(o),) for o in file_paths]
+        with self._lock, self._connection:
+            self._connection.executemany('DELETE FROM digests WHERE path = ?', keys)
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM digests')
+
+
+_digest_cache: Union[DigestCache, None] = None
+_digest_cache_lock = threading.Lock()
+
+
+def get_digest_cache() -> DigestCache:
+    """
+    Returns the digest cache of the application, stored in the application directory.
+
+    :return: The shared DigestCache instance of this process
+    """
+    global _digest_cache
+    with _digest_cache_lock:
+        if _digest_cache is None:
+            _digest_cache = DigestCache()
+        return _digest_cache
@@ -46,3 +46,26 @@ class CreateProjectModsError(BaseDigiSException):
 
 class EditProjectModsInfoError(BaseDigiSException):
     """Raised if editing project mods information fails."""
+
+
+class InvalidModsArchive(BaseDigiSException):
+    """Raised when the specified file is not a valid packed mods archive."""
+    def __init__(self, message: str):
+        info = 'The archive does not contain valid METADATA.json, DESCRIPTION.html files and modfiles entries.'
+        self.message = f'{message}. {info}'
+
+
+class IoJobCancelled(BaseDigiSException):
+    """Raised inside a job of the I/O scheduler when the job has been cancelled."""
+
+
+class IoJobBusy(BaseDigiSException):
+    """Raised when a job of the I/O scheduler cannot start before its timeout, its device is busy."""
+
+
+class ServiceError(BaseDigiSException):
+    """Raised when the catalog service cannot be reached or fails to serve a request."""
+
+
+class OperationCancelled(BaseDigiSException):
+    """Raised inside a blocking operation of the asyncio API when its task has been cancelled."""
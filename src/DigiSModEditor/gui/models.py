@@ -1,34 +1,60 @@
+import bisect
 import logging
 import os
+import sys
 from os import PathLike
 from pathlib import Path
-from typing import Union, Tuple, Dict, Generator
+from typing import Union, Tuple, Dict, List, Generator, Iterable
 
-from PySide6.QtCore import QTimer
-from PySide6.QtGui import QStandardItemModel, QStandardItem
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QFont
 
 from .. import core
+from .. import search
+from .. import catalog
+from .. import references
+from .. import archive
 from .. import constants as const
 from .. import errors as err
 from .. import decorators as deco
+from .. import memory
 
 __all__ = [
     'create_game_data_model',
     'create_dsdb_model',
     'create_project_mods_model',
+    'create_archive_model',
 ]
 
 log = logging.getLogger(const.LogName.MAIN)
 
+# a rescan changing more assets than this share of the rows is applied under a single model reset, not row by row
+SNAPSHOT_RESET_RATIO = 0.2
+SNAPSHOT_RESET_MIN_CHANGES = 64
+
 
 class AsukaModel(QStandardItemModel):
     """Model which hold DSDB information, files, and folders structure"""
+    # emitted once a scan snapshot is applied, the views restore their expanded rows
+    snapshot_applied = Signal()
+
     def __init__(self, dir_path: Union[PathLike, Path]):
         super().__init__()
         self._root_path = Path(dir_path)
         self._src_path = Path(dir_path)
 
         self._queue = []
+        self._asset_items: Dict[str, QStandardItem] = {}
+        # items count and estimated string bytes of every asset, and their running totals, for the memory accounting
+        self._asset_sizes: Dict[str, Tuple[int, int]] = {}
+        self._size_totals = [0, 0]
+        self._evicted = False
+        self._catalog = catalog.AssetCatalog(self._root_path, self._src_path)
+        self._search_index = search.AssetSearchIndex()
+        self._sort_pending = False
+        # the id of the last scan snapshot applied, see `apply_delta`
+        self._snapshot_id = None
+        self.setSortRole(const.ItemData.SORT_KEY)
 
         self._timer = QTimer()
         self._timer.setInterval(5)
@@ -41,15 +67,30 @@ class AsukaModel(QStandardItemModel):
     @property
     def src_path(self) -> Path: return self._src_path
 
-    def add_to_queue(self, asset_structure):
+    @property
+    def search_index(self) -> search.AssetSearchIndex: return self._search_index
+
+    @property
+    def catalog(self) -> catalog.AssetCatalog: return self._catalog
+
+    @property
+    def read_only(self) -> bool: return False
+
+    @property
+    def evicted(self) -> bool: return self._evicted
+
+    def add_to_queue(self, asset_structure: Union[core.AssetRecord, Dict]):
         """
         Add asset structure to the queue for processing.
 
-        :param asset_structure: A dictionary where the top level keys are the asset names.
+        :param asset_structure: An `core.AssetRecord` as sent by the scanners, or a dictionary where the top level keys are the asset names.
                                 The values are dictionaries where the keys are the asset group names and the values are lists of asset file names.
         """
-        log.debug(f'Add to queue: {asset_structure}')
+        log.debug('Add to queue: %s', asset_structure)
         self._queue.append(asset_structure)
+        # the queued assets are appended, then sorted once the queue is drained
+        self._sort_pending = True
+        self._evicted = False
 
     def process_queue(self):
         """
@@ -59,10 +100,13 @@ class AsukaModel(QStandardItemModel):
         """
         if self._queue:
             asset_structure = self._queue.pop(0)
-            log.debug(f'Process queue: {self._queue}')
+            log.debug('Process queue: %d pending', len(self._queue))
             self.add_asset_item(asset_structure)
+            if not self._queue and self._sort_pending:
+                self.sort_assets()
 
-    def add_asset_item(self, asset_structure):
+    @deco.traced
+    def add_asset_item(self, asset_structure: Union[core.AssetRecord, Dict]):
         """
         Add a new asset item to the model.
 
@@ -78,48 +122,280 @@ class AsukaModel(QStandardItemModel):
             - const.ItemData.FILENAME: The full name of the asset file
             - const.ItemData.FILEPATH: The full path of the asset file
 
-        :param asset_structure: A dictionary where the top level keys are the asset names.
+        :param asset_structure: An `core.AssetRecord` as sent by the scanners, or a dictionary where the top level keys are the asset names.
                                 The values are dictionaries where the keys are the asset group names and the values are lists of asset file names.
         """
-        for k, v in asset_structure.items():
-            # asset root item
-            root_item = QStandardItem(k)
-            root_item.setCheckable(True)
-
-            for child_grp, child_list in v.items():
-                # asset group item
-                group_item = QStandardItem(child_grp)
-                for child_item in child_list:
-                    name, ext = os.path.splitext(child_item)
-                    # asset files item
-                    file_item = QStandardItem(child_item)
-                    file_item.setData(name, const.ItemData.NAME)
-                    file_item.setData(ext, const.ItemData.EXT)
-                    file_item.setData(child_item, const.ItemData.FILENAME)
-                    if ext == '.img':
-                        file_item.setData(os.path.join(self.root_path, 'images', child_item), const.ItemData.FILEPATH)
-                    else:
-                        file_item.setData(os.path.join(self.src_path, child_item), const.ItemData.FILEPATH)
-                    group_item.appendRow(file_item)
-                root_item.appendRow(group_item)
-
-            self.appendRow(root_item)
+        self._catalog.add_asset_structure(asset_structure)
+        self._evicted = False
+        for k, v in core.iter_asset_groups(asset_structure):
+            self._set_asset_item(k, v)
+
+    def _set_asset_item(self, asset_name: str, asset_groups: Dict):
+        """
+        Build the items of an asset, an asset already in the model is replaced in its row and keeps its check state.
+
+        A new asset is inserted at its sorted row, or appended while a sort is pending, e.g. while the queue fills the model.
+
+        :param asset_name: The name of the asset
+        :param asset_groups: The asset group names and their lists of asset file names
+        """
+        # asset root item
+        root_item = QStandardItem(asset_name)
+        root_item.setCheckable(True)
+        self._search_index.add_asset(asset_name, asset_groups)
+        sort_key = self._search_index.sort_key(asset_name)
+        root_item.setData(sort_key, const.ItemData.SORT_KEY)
+        item_count = 1
+        string_chars = len(asset_name) * 2
+
+        for child_grp, child_list in asset_groups.items():
+            # asset group item
+            group_item = QStandardItem(child_grp)
+            for child_item in child_list:
+                name, ext = os.path.splitext(child_item)
+                # asset files item
+                file_item = QStandardItem(child_item)
+                file_item.setData(name, const.ItemData.NAME)
+                file_item.setData(ext, const.ItemData.EXT)
+                file_item.setData(child_item, const.ItemData.FILENAME)
+                file_path = str(self._catalog.get_file_path(child_item))
+                file_item.setData(file_path, const.ItemData.FILEPATH)
+                string_chars += len(child_item) * 3 + len(file_path)
+                source = self.get_file_reference(child_item)
+                if source is not None:
+                    self._set_inherited_item(file_item, source)
+                group_item.appendRow(file_item)
+            root_item.appendRow(group_item)
+            item_count += 1 + len(child_list)
+            string_chars += len(child_grp)
+
+        # QString is UTF-16
+        self._set_asset_size(asset_name, (item_count, string_chars * 2))
+        old_item = self._asset_items.get(asset_name, None)
+        self._asset_items[asset_name] = root_item
+        if old_item is None:
+            if self._sort_pending:
+                self.appendRow(root_item)
+            else:
+                self.insertRow(self._get_sorted_row(sort_key), root_item)
+            return
+
+        # replace the asset in place, the rows around it and their view state are untouched
+        root_item.setCheckState(old_item.checkState())
+        row = old_item.row()
+        self.removeRow(row)
+        self.insertRow(row, root_item)
+
+    def _get_sorted_row(self, sort_key: str) -> int:
+        # the rows are in the order of their sort keys, see `sort_assets`
+        root_item = self.invisibleRootItem()
+        return bisect.bisect_right(
+            range(root_item.rowCount()), sort_key, key = lambda o: root_item.child(o).data(const.ItemData.SORT_KEY)
+        )
+
+    @deco.traced
+    def apply_delta(self, delta: core.ScanDelta):
+        """
+        Update the model to a scan, with the difference the scanner thread computed from its previous scan.
+
+        The difference is only applied if the model applied that previous scan and has no queued assets left,
+        otherwise, e.g. after an eviction, the model is compared with every record of the scan, see `apply_snapshot`.
+
+        :param delta: A `core.ScanDelta`
+        """
+        if self._snapshot_id is None or self._snapshot_id != delta.base_id or self._queue:
+            self.apply_snapshot(delta.records, (o.stem for o in delta.updated), delta.snapshot_id)
+            return
+        self._snapshot_id = delta.snapshot_id
+        self._apply_changes(delta.updated, delta.removed)
+
+    @deco.traced
+    def apply_snapshot(
+            self,
+            asset_records: Iterable[core.AssetRecord],
+            changed: Iterable[str] = (),
+            snapshot_id: Union[int, None] = None
+    ):
+        """
+        Update the model to the assets of a full scan, built on the scanner thread.
+
+        Only the assets which were added, removed or whose files changed are touched, the check states of the
+        replaced assets are kept. When the changes are more than `SNAPSHOT_RESET_RATIO` of the rows, they are
+        applied under a single model reset instead of row by row. An empty model queues the assets instead,
+        so a first scan fills the view progressively.
+
+        :param asset_records: Every asset of the scan, as `core.AssetRecord`
+        :param changed: The names of assets to rebuild even if their files are the same, e.g. files moved to another source layer
+        :param snapshot_id: The id of the scan, see `apply_delta`, None if the scan has no id
+        """
+        records = {o.stem: o for o in asset_records}
+        self._snapshot_id = snapshot_id
+        # the queue holds an older scan, the snapshot supersedes it, the rows it already added may still need sorting
+        self._queue.clear()
+        if not self._asset_items:
+            for o in records.values():
+                self.add_to_queue(o)
+            self.sort_assets()
+            self.snapshot_applied.emit()
+            return
+
+        changed = set(changed)
+        removed = [o for o in self._asset_items if o not in records]
+        updated = [v for k, v in records.items() if k in changed or not self._catalog.has_same_files(v)]
+        self._apply_changes(updated, removed)
+
+    def _apply_changes(self, updated: List[core.AssetRecord], removed: List[str]):
+        change_count = len(removed) + len(updated)
+        if not change_count:
+            if self._sort_pending:
+                self.sort_assets()
+            self.snapshot_applied.emit()
+            return
+
+        reset = change_count > max(SNAPSHOT_RESET_MIN_CHANGES, self.rowCount() * SNAPSHOT_RESET_RATIO)
+        if reset:
+            # the views only see the reset, not every row removed and inserted meanwhile
+            self.beginResetModel()
+            self.blockSignals(True)
+        try:
+            for o in removed:
+                self.remove_asset_item(o)
+            for o in updated:
+                self._catalog.add_asset_structure(o)
+                for k, v in core.iter_asset_groups(o):
+                    self._set_asset_item(k, v)
+            if self._sort_pending:
+                self.sort_assets()
+        finally:
+            if reset:
+                self.blockSignals(False)
+                self.endResetModel()
+        self._evicted = False
+        log.info(
+            f'Applied scan snapshot, {len(updated)} assets updated and {len(removed)} removed'
+            f'{" under a model reset" if reset else ""}: {self.src_path}'
+        )
+        self.snapshot_applied.emit()
+
+    def remove_asset_item(self, asset_name: str):
+        """
+        Remove an asset item from the model and the indexes. Unknown asset names are ignored.
+
+        :param asset_name: The name of the asset
+        """
+        item = self._asset_items.pop(asset_name, None)
+        if item is None:
+            return
+        self.removeRow(item.row())
+        self._set_asset_size(asset_name, None)
+        self._catalog.remove_asset(asset_name)
+        self._search_index.remove_asset(asset_name)
+
+    def _set_asset_size(self, asset_name: str, size: Union[Tuple[int, int], None]):
+        old_size = self._asset_sizes.pop(asset_name, None)
+        if old_size is not None:
+            self._size_totals[0] -= old_size[0]
+            self._size_totals[1] -= old_size[1]
+        if size is not None:
+            self._asset_sizes[asset_name] = size
+            self._size_totals[0] += size[0]
+            self._size_totals[1] += size[1]
+
+    def get_memory_usage(self, exact: bool = False) -> memory.ModelMemory:
+        """
+        Estimates the memory used by the model: its Qt items and their strings, the queue and the indexes.
+
+        The estimate is kept up to date as the assets are added and removed, so it is cheap enough for a timer.
+        The exact sizes of the queue and the indexes need to walk every container, seconds for a large DSDB.
+
+        :param exact: Walk the queue and the indexes instead of estimating them from the items count
+        :return: A `memory.ModelMemory` of the estimated sizes in bytes
+        """
+        items, string_bytes = self._size_totals
+        item_bytes = items * memory.ESTIMATED_ITEM_BYTES
+        if exact:
+            queue_bytes = memory.get_container_size(self._queue, depth = 5)
+            index_bytes = (
+                memory.get_container_size(self._asset_items, depth = 1)
+                + memory.get_container_size(self._asset_sizes, depth = 2)
+                + self._catalog.get_memory_size()
+                + self._search_index.get_memory_size()
+            )
+        else:
+            queue_bytes = sys.getsizeof(self._queue) + len(self._queue) * memory.ESTIMATED_QUEUED_ASSET_BYTES
+            index_bytes = items * memory.ESTIMATED_INDEX_BYTES
+        return memory.ModelMemory(
+            items, item_bytes, string_bytes, queue_bytes, index_bytes,
+            item_bytes + string_bytes + queue_bytes + index_bytes
+        )
+
+    def evict(self):
+        """
+        Drop the items, the queue and the indexes to free their memory, the model stays usable and empty.
+
+        The owner keeps the scan index of the model to add the assets again when it is needed.
+        """
+        self.removeRows(0, self.rowCount())
+        self._queue.clear()
+        self._asset_items.clear()
+        self._asset_sizes.clear()
+        self._size_totals = [0, 0]
+        self._catalog.clear()
+        self._search_index.clear()
+        self._sort_pending = False
+        self._snapshot_id = None
+        self._evicted = True
+
+    def get_file_reference(self, file_name: str) -> Union[Path, None]:
+        """
+        Returns the source file an asset file is inherited from, if the file is a reference.
+
+        :param file_name: The asset file name
+        :return: The source file, or None if the file is not a reference
+        """
+        return None
+
+    @staticmethod
+    def _set_inherited_item(file_item: QStandardItem, source: Path):
+        font = QFont()
+        font.setItalic(True)
+        file_item.setFont(font)
+        file_item.setForeground(Qt.gray)
+        file_item.setToolTip(f'Inherited from {source}')
+        file_item.setData(True, const.ItemData.INHERITED)
+
+    def sort_assets(self):
+        """
+        Sort the asset items in natural order, using the sort keys precomputed by the search index.
+
+        If the queue still has assets to process, the sort is deferred until the queue is empty.
+        """
+        if self._queue:
+            self._sort_pending = True
+            return
+        self._sort_pending = False
+        self.sort(0)
+        self._search_index.prepare()
+
+    def search_assets(self, query: str) -> set:
+        """
+        Find the names of all assets whose name, group contents or animation codes contain the query.
+
+        :param query: The search text
+        :return: A set of matching asset names, every asset if the query is empty
+        """
+        return self._search_index.search(query)
 
     def find_item_by_name(self, asset_name: str) -> Union[QStandardItem, None]:
         """
         Find a QStandardItem with the given asset name.
 
-        Iterate through all the root items and check if the text of each item matches the given asset name.
-        If a match is found, return the item. Otherwise, return None.
+        The root items are tracked by name when they are added, so the lookup doesn't iterate the model.
 
         :param asset_name: The name of the asset to find
         :return: The QStandardItem with the given asset name, or None if not found
         """
-        for row in range(self.rowCount()):
-            item = self.item(row)
-            if item.text() == asset_name:
-                return item
-        return None
+        return self._asset_items.get(asset_name, None)
 
     def get_files_item_by_asset_item(self, asset_item: QStandardItem) -> Generator[QStandardItem, None, None]:
         """
@@ -146,8 +422,11 @@ class AsukaModel(QStandardItemModel):
         :param asset_item: The asset item to get the files from
         :return: A generator of all asset file paths
         """
-        for each_item in self.get_files_item_by_asset_item(asset_item):
-            yield Path(each_item.data(const.ItemData.FILEPATH))
+        entry = self._catalog.get(asset_item.text())
+        if entry is None:
+            return
+        for file_name in entry.iter_files():
+            yield self._catalog.get_file_path(file_name)
 
     def get_files_name_by_asset_item(self, asset_item: QStandardItem) -> Generator[str, None, None]:
         """
@@ -156,8 +435,10 @@ class AsukaModel(QStandardItemModel):
         :param asset_item: The asset item to get the files from
         :return: A generator of all asset file names
         """
-        for each_item in self.get_files_item_by_asset_item(asset_item):
-            yield each_item.data(const.ItemData.FILENAME)
+        entry = self._catalog.get(asset_item.text())
+        if entry is None:
+            return
+        yield from entry.iter_files()
 
     @staticmethod
     def get_asset_structure_by_asset_item(asset_item: QStandardItem) -> Dict:
@@ -198,6 +479,7 @@ class AmaterasuModel(AsukaModel):
         self._category = metadata.get('category')
         self._description = description
         self._mods_info_changes = False
+        self._references = references.ReferenceManifest.load(self._root_path)
 
     @property
     def title(self) -> str: return self._name
@@ -214,6 +496,13 @@ class AmaterasuModel(AsukaModel):
     @property
     def description(self) -> str: return self._description
 
+    @property
+    def references(self) -> references.ReferenceManifest: return self._references
+
+    def get_file_reference(self, file_name: str) -> Union[Path, None]:
+        relative_path = self.catalog.get_file_path(file_name).relative_to(self.src_path)
+        return self._references.get_source(relative_path)
+
     def set_title(self, title: str):
         if title == '':
             raise err.EditProjectModsInfoError('Title shouldn\'t empty!')
@@ -255,6 +544,36 @@ class AmaterasuModel(AsukaModel):
             core.write_description_mods(self.description, self.root_path)
 
 
+class ArchiveModel(AmaterasuModel):
+    """Read-only model which hold a packed mods archive information, browsed in place without extraction"""
+    def __init__(self, mods_archive: archive.ModsArchive):
+        self._archive = mods_archive
+        super().__init__(mods_archive.zip_path / 'modfiles', mods_archive.metadata, mods_archive.description)
+        # the central directory already lists every file, no scanner needed
+        name_list, files_text = mods_archive.get_asset_index()
+        for name in name_list:
+            self.add_to_queue(core.get_asset_record(name, files_text))
+        self.sort_assets()
+
+    @property
+    def archive(self) -> archive.ModsArchive: return self._archive
+
+    @property
+    def read_only(self) -> bool: return True
+
+    def close(self):
+        """Closes the archive file, the files can't be copied out anymore, e.g. once the model is replaced."""
+        self._archive.close()
+
+    def _raise_read_only(self, *args):
+        raise err.EditProjectModsInfoError(f'Packed mods is read only: {self._archive.zip_path}')
+
+    set_title = set_author = set_version = set_category = set_description = _raise_read_only
+
+    def save_information(self):
+        pass
+
+
 @deco.validate_directory
 def create_dsdb_model(dir_path: Union[PathLike, Path]) -> AsukaModel:
     """
@@ -295,19 +614,38 @@ def create_project_mods_model(dir_path: Union[PathLike, Path]) -> AmaterasuModel
     return model
 
 
-@deco.validate_directory
+def create_archive_model(zip_path: Union[PathLike, Path]) -> ArchiveModel:
+    """
+    Creates a read-only ArchiveModel from a packed mods archive, e.g. made by `core.pack_project_mods`.
+
+    Only the central directory of the archive is read, the asset files stay compressed until they are copied out.
+
+    :param zip_path: The path of the packed mods archive
+    :return: An ArchiveModel object containing the packed mods metadata and description
+    :raises err.InvalidModsArchive: If the file is not a valid packed mods archive
+    """
+    return ArchiveModel(archive.ModsArchive(zip_path))
+
+
 def create_game_data_model(dir_path: Union[PathLike, Path]) -> Union[AsukaModel, AmaterasuModel]:
     """
-    Creates an AsukaModel or AmaterasuModel from a game data directory.
+    Creates an AsukaModel or AmaterasuModel from a game data directory or a packed mods archive.
 
     Given a directory path that is a valid DSDB directory or a valid project mods directory,
     creates an AsukaModel or AmaterasuModel object from the metadata and description information
-    in the directory.
+    in the directory. Given a '.zip' file, creates a read-only ArchiveModel, see `create_archive_model`.
 
-    :param dir_path: The directory path of the game data directory
+    :param dir_path: The directory path of the game data directory, or the path of a packed mods archive
     :return: An AsukaModel or AmaterasuModel object containing the game data metadata and description
     :raises err.InvalidGameDataDirectory: If the directory path is not a valid DSDB directory nor a valid project mods directory
     """
+    if isinstance(dir_path, (Path, PathLike)) and Path(dir_path).suffix.lower() == '.zip' and Path(dir_path).is_file():
+        return create_archive_model(dir_path)
+    return _create_directory_model(dir_path)
+
+
+@deco.validate_directory
+def _create_directory_model(dir_path: Union[PathLike, Path]) -> Union[AsukaModel, AmaterasuModel]:
     if core.is_dsdb_directory(dir_path):
         model = create_dsdb_model(dir_path)
     elif core.is_project_mods_directory(dir_path):
@@ -1,4 +1,7 @@
+from typing import Set, Tuple, Union
+
 from PySide6 import QtUiTools, QtCore
+from PySide6.QtWidgets import QLineEdit, QTreeView
 
 
 class UiLoader(QtUiTools.QUiLoader):
@@ -22,3 +25,141 @@ class UiLoader(QtUiTools.QUiLoader):
         widget = self.load(ui_file)
         QtCore.QMetaObject.connectSlotsByName(base_widget)
         return widget
+
+
+class AssetTreeFilter(QtCore.QObject):
+    """
+    Filter the asset rows of a tree view from a search line edit.
+
+    The matching is done by the search index of the view model, and only the rows whose
+    visibility changed since the last keystroke are hidden or shown again.
+    """
+    def __init__(self, search_txt: QLineEdit, tree_view: QTreeView):
+        super().__init__(tree_view)
+        self._search_txt = search_txt
+        self._tree_view = tree_view
+        self._model = None
+        self._hidden: Set[str] = set()
+
+        self._search_txt.textChanged.connect(self.apply_filter)
+
+    def refresh(self):
+        """
+        Re-apply the current search text, e.g. after the view model was changed or new assets were added.
+        """
+        self.apply_filter(self._search_txt.text())
+
+    def _bind_model(self, model):
+        if self._model is not None and hasattr(self._model, 'search_assets'):
+            self._model.rowsInserted.disconnect(self._filter_inserted_rows)
+            self._model.modelReset.disconnect(self._filter_reset_model)
+        # QTreeView.setModel already shows every row of the new model
+        self._model = model
+        self._hidden = set()
+        if model is not None and hasattr(model, 'search_assets'):
+            model.rowsInserted.connect(self._filter_inserted_rows)
+            model.modelReset.connect(self._filter_reset_model)
+
+    def _filter_reset_model(self):
+        if self._model is not self._tree_view.model():
+            return
+        # the view shows every row again after a reset
+        self._hidden = set()
+        self.refresh()
+
+    def _filter_inserted_rows(self, parent: QtCore.QModelIndex, first: int, last: int):
+        if parent.isValid() or self._model is not self._tree_view.model():
+            return
+        text = self._search_txt.text()
+        for row in range(first, last + 1):
+            asset_name = self._model.item(row).text()
+            is_hidden = not self._model.search_index.matches(asset_name, text)
+            if is_hidden:
+                self._hidden.add(asset_name)
+            else:
+                self._hidden.discard(asset_name)
+            self._tree_view.setRowHidden(row, parent, is_hidden)
+
+    def apply_filter(self, text: str):
+        model = self._tree_view.model()
+        if model is not self._model:
+            self._bind_model(model)
+        if model is None or not hasattr(model, 'search_assets'):
+            return
+
+        matches = model.search_assets(text)
+        hidden = model.search_index.asset_names - matches
+
+        root_index = QtCore.QModelIndex()
+        for asset_name, is_hidden in (
+                *((o, True) for o in hidden - self._hidden),
+                *((o, False) for o in self._hidden - hidden)
+        ):
+            item = model.find_item_by_name(asset_name)
+            if item is not None:
+                self._tree_view.setRowHidden(item.row(), root_index, is_hidden)
+        self._hidden = hidden
+
+
+class AssetTreeExpansion(QtCore.QObject):
+    """
+    Keep the expanded rows of an asset tree view when its model applies a scan snapshot.
+
+    The expanded rows are tracked by their item texts, the asset then the group name, so they are found again
+    after the rows were replaced or the model was reset, see `AsukaModel.apply_delta`.
+    """
+    def __init__(self, tree_view: QTreeView):
+        super().__init__(tree_view)
+        self._tree_view = tree_view
+        self._model = None
+        self._expanded: Set[Tuple[str, ...]] = set()
+
+        self._tree_view.expanded.connect(self._on_expanded)
+        self._tree_view.collapsed.connect(self._on_collapsed)
+
+    def _bind_model(self, model):
+        if self._model is not None and hasattr(self._model, 'snapshot_applied'):
+            self._model.snapshot_applied.disconnect(self.restore)
+        # QTreeView.setModel collapses every row of the new model
+        self._model = model
+        self._expanded = set()
+        if model is not None and hasattr(model, 'snapshot_applied'):
+            model.snapshot_applied.connect(self.restore)
+
+    @staticmethod
+    def _get_path(index: QtCore.QModelIndex) -> Tuple[str, ...]:
+        path = []
+        while index.isValid():
+            path.append(index.data())
+            index = index.parent()
+        return tuple(reversed(path))
+
+    def _on_expanded(self, index: QtCore.QModelIndex):
+        if self._tree_view.model() is not self._model:
+            self._bind_model(self._tree_view.model())
+        self._expanded.add(self._get_path(index))
+
+    def _on_collapsed(self, index: QtCore.QModelIndex):
+        self._expanded.discard(self._get_path(index))
+
+    def _find_index(self, path: Tuple[str, ...]) -> Union[QtCore.QModelIndex, None]:
+        item = self._model.find_item_by_name(path[0])
+        for text in path[1:]:
+            if item is None:
+                break
+            item = next((item.child(o) for o in range(item.rowCount()) if item.child(o).text() == text), None)
+        return item.index() if item is not None else None
+
+    def restore(self):
+        """
+        Expand the tracked rows again, the rows of removed assets are forgotten.
+        """
+        if self._model is None or self._tree_view.model() is not self._model:
+            return
+        # the parents first, expanding a row under a collapsed parent doesn't show it
+        for path in sorted(self._expanded, key = len):
+            index = self._find_index(path)
+            if index is None:
+                self._expanded.discard(path)
+            elif not self._tree_view.isExpanded(index):
+                self._tree_view.setExpanded(index, True)
@@ -1,19 +1,20 @@
+import collections
 import logging
 import os
 import time
 from os import PathLike
 from pathlib import Path
-from typing import Union
+from typing import Union, List, Tuple
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QStandardItem
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QStandardItem, QKeySequence, QShortcut
 from PySide6.QtWidgets import (
     QMainWindow, QVBoxLayout, QFileDialog, QComboBox, QLineEdit, QDoubleSpinBox,
-    QSplitter, QPushButton, QToolButton, QTextEdit, QTreeView, QSpinBox,
+    QSplitter, QPushButton, QToolButton, QTextEdit, QTreeView, QSpinBox, QMenu, QLabel,
 )
 
 from . import widgets, models
-from .. import utils as utl, core, constants as const, errors as err, threads as th
+from .. import utils as utl, core, decorators as deco, constants as const, errors as err, threads as th, store as shared_store, archive, conflicts, memory, catalog, layers, service
 from ..constants import UiPath as UIP
 
 log = logging.getLogger(const.LogName.MAIN)
@@ -48,6 +49,22 @@ class MainWindow(QMainWindow):
         self._ui.pack_tab_ui = loader.load_ui(pack_tab_ui_file)
         self._mods_model_data = {}
         self._asset_src_model_data = {}
+        self._propagating_check_state = False
+        self._shared_store = None
+        self._batch_pack_thread = None
+        self._transfer_thread = None
+        self._pack_thread = None
+        # the target and the asset structures of the running transfer, the structures are added to the mods model
+        # once their files are transferred
+        self._transfer_mods_title = ''
+        self._transfer_structures = {}
+        self._conflict_index = conflicts.ConflictIndex()
+        # scans of the DSDB source layers, kept across the source models so only the changed layers are walked
+        self._layer_scans = {}
+        # attach to the catalog service when it is running, the DSDB scans come from its warm index
+        self._service_client = service.connect()
+        if self._service_client is not None:
+            log.info(f'Attached to the catalog service: {self._service_client.socket_path}')
 
         # Left panel
         left_lay = QVBoxLayout(self._ui.left_panel)
@@ -75,12 +92,20 @@ class MainWindow(QMainWindow):
         transfer_split: QSplitter = self.ui(UIP.TRANS_SPLIT)
         transfer_split.setSizes([1, self._ui.transfer_tab_ui.size().width() - 540])
 
+        # asset search filters
+        self._src_asset_filter = widgets.AssetTreeFilter(self.ui(UIP.SRC_ASSET_SEARCH_TXT), self.ui(UIP.SRC_ASSET_TV))
+        self._mods_asset_filter = widgets.AssetTreeFilter(self.ui(UIP.MODS_ASSET_SEARCH_TXT), self.ui(UIP.MODS_ASSET_TV))
+        # the expanded rows are kept when a rescan replaces them
+        self._src_asset_expansion = widgets.AssetTreeExpansion(self.ui(UIP.SRC_ASSET_TV))
+        self._mods_asset_expansion = widgets.AssetTreeExpansion(self.ui(UIP.MODS_ASSET_TV))
         # connect left panel signals
         self.ui(UIP.PROJECT_DIR_TXT).textChanged.connect(self.populate_mods_list)
         self.ui(UIP.MODS_DROPDOWN).currentIndexChanged.connect(self.mods_dropdown_index_changed)
         self.ui(UIP.PROJECT_DIR_BTN).clicked.connect(self.browse_project_directory)
         self.ui(UIP.MODS_CREATE_BTN).clicked.connect(self.create_project_mods)
         self.ui(UIP.MODS_EDIT_BTN).toggled.connect(self.edit_project_mods)
+        self.ui(UIP.MODS_ASSET_TV).setContextMenuPolicy(Qt.CustomContextMenu)
+        self.ui(UIP.MODS_ASSET_TV).customContextMenuRequested.connect(self.mods_asset_context_menu)
         self.ui(UIP.PROJECT_DIR_TXT).setText(str(utl.get_default_project_mods_dir()))
         # connect setup tab signals
         self.ui(UIP.DSDB_DIR_TXT).textChanged.connect(self.populate_source_asset)
@@ -89,9 +114,47 @@ class MainWindow(QMainWindow):
         self.ui(UIP.SETUP_PACK_DIR_TXT).setText(str(utl.get_default_packed_mods_dir()))
         # connect transfer tab signals
         self.ui(UIP.TRANS_COPY_BTN).clicked.connect(self.copy_src_asset_to_mods)
+        self.ui(UIP.TRANS_OPEN_ARCHIVE_BTN).clicked.connect(self.open_packed_mods_source)
         # connect pack tab signals
         self.ui(UIP.PACKING_BTN).clicked.connect(self.packing_mods)
+        self.ui(UIP.PACK_ALL_BTN).clicked.connect(self.packing_all_mods)
         self.ui(UIP.PACK_OPEN_DIR_BTN).clicked.connect(self.open_pack_mods_dir)
+        self.ui(UIP.PACK_IMPORT_BTN).clicked.connect(self.import_packed_mods)
+        self.ui(UIP.PACK_CONFLICTS_BTN).clicked.connect(self.check_mods_conflicts)
+
+        # I/O scheduler queue state
+        self._io_status_lbl = QLabel()
+        self.statusBar().addPermanentWidget(self._io_status_lbl)
+        th.get_io_scheduler().queue_changed.connect(self.update_io_status, Qt.QueuedConnection)
+
+        # live throughput of the traced hot paths, see `deco.set_tracing`
+        self._trace_status_lbl = QLabel()
+        self._trace_totals = deco.get_trace_totals()
+        self._trace_time = time.perf_counter()
+        self._trace_timer = QTimer(self)
+        self._trace_timer.timeout.connect(self.update_trace_status)
+        if deco.is_tracing():
+            self.statusBar().addPermanentWidget(self._trace_status_lbl)
+            self._trace_timer.start(1000)
+
+        # opt-in detection of the event loop stalls, see `th.StallWatchdog`
+        self._stall_watchdog = None
+        stall_ms = os.environ.get(th.STALL_WATCHDOG_ENV_VAR)
+        if stall_ms:
+            self._stall_watchdog = th.StallWatchdog(int(stall_ms) / 1000, parent = self)
+            self._stall_watchdog.start()
+
+        # memory accounting of the models, the idle mods models are evicted above the budget
+        self._memory_budget = memory.get_memory_budget()
+        self._memory_tracer = memory.MemoryTracer()
+        self._memory_report_count = 0
+        self._memory_timer = QTimer(self)
+        self._memory_timer.timeout.connect(self.enforce_memory_budget)
+        if self._memory_budget is not None:
+            self._memory_timer.start(30000)
+        QShortcut(QKeySequence('Ctrl+Shift+M'), self, self.log_memory_report)
+        QShortcut(QKeySequence('F5'), self, self.rescan_source_layers)
+        QShortcut(QKeySequence('Ctrl+F5'), self, lambda: self.rescan_source_layers(True))
 
         # populate left panel
         self.populate_mods_list()
@@ -99,10 +162,10 @@ class MainWindow(QMainWindow):
         # Dev
         # self.ui(UIP.DSDB_DIR_TXT).setText(r'D:\IDrive\Project\2024\DigimonStory\original-content\DSDB')
 
-        # start thread
-        for mods_name, data in self._mods_model_data.items():
-            mods_thread = data.get('thread')
-            self.scan_project_contents(mods_thread)
+        # start thread, a single walk for every project mods instead of one scanner per mods
+        self._mods_scanner = th.ProjectModsScannerThread(Path(self.ui(UIP.PROJECT_DIR_TXT).text()))
+        self._mods_scanner.mods_scanned.connect(self.project_mods_scanned)
+        self._mods_scanner.start()
 
     def ui(self, ui_name: str = ''):
         if ui_name == '':
@@ -117,6 +180,39 @@ class MainWindow(QMainWindow):
 
         return ui_widget
 
+    def update_io_status(self):
+        jobs = th.get_io_scheduler().get_state()
+        if not jobs:
+            self._io_status_lbl.clear()
+            self._io_status_lbl.setToolTip('')
+            return
+        counter = collections.Counter(o.state for o in jobs)
+        self._io_status_lbl.setText(
+            f'I/O: {counter[const.IoJobState.RUNNING]} running, {counter[const.IoJobState.QUEUED]} queued, '
+            f'{counter[const.IoJobState.PAUSED]} paused'
+        )
+        self._io_status_lbl.setToolTip('\n'.join(f'{o.name} ({o.job_class.name.lower()}, {o.state})' for o in jobs))
+
+    def update_trace_status(self):
+        items, bytes_count = deco.get_trace_totals()
+        now = time.perf_counter()
+        elapsed = max(now - self._trace_time, 1e-6)
+        last_items, last_bytes = self._trace_totals
+        self._trace_status_lbl.setText(
+            f'{(items - last_items) / elapsed:.0f} files/s, {(bytes_count - last_bytes) / elapsed / 1048576:.1f} MB/s'
+        )
+        self._trace_totals = (items, bytes_count)
+        self._trace_time = now
+
+    def closeEvent(self, event):
+        if self._stall_watchdog is not None:
+            self._stall_watchdog.stop()
+        if deco.is_tracing():
+            trace_file = utl.get_app_dir() / 'trace.json'
+            deco.dump_traces(trace_file)
+            log.info(f'Trace dumped: {trace_file}')
+        super().closeEvent(event)
+
     def browse_project_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Project Directory")
         log.info(f"Selected directory: {directory}")
@@ -138,33 +234,46 @@ class MainWindow(QMainWindow):
             self.ui(UIP.SETUP_PACK_DIR_TXT).setText(f"{directory}")
 
     def src_asset_selection_counter(self, top_left, bottom_right, roles):
-        if Qt.CheckStateRole in roles:
+        # the check states set below emit dataChanged again, only the outer call counts
+        if Qt.CheckStateRole in roles and not self._propagating_check_state:
             asset_src_data = self._asset_src_model_data.get('DSDB', {})
             asset_src_model: Union[models.AsukaModel, None] = asset_src_data.get('asset_model', None)
             if asset_src_model is None:
                 return
-            counter_ui: QSpinBox = self.ui(UIP.TRANS_SELECT_COUNTER)
             asset_src_tv: QTreeView = self.ui(UIP.SRC_ASSET_TV)
 
             # Change check state on selection
             selected_indexes = asset_src_tv.selectedIndexes()
             item_state = asset_src_model.itemFromIndex(top_left).checkState()
-            for index in selected_indexes:
-                selected_item: QStandardItem = asset_src_model.itemFromIndex(index)
-                if selected_item.isCheckable():
-                    selected_item.setCheckState(item_state)
-
-            # Update checked counter
-            temp_index_list = []
-            for i in range(asset_src_model.invisibleRootItem().rowCount()):
-                child = asset_src_model.invisibleRootItem().child(i)
-                if child.checkState() == Qt.Checked:
-                    temp_index_list.append(i)
-
-            asset_src_data['checked_index_list'] = temp_index_list
-            counter = len(temp_index_list)
-            counter_ui.setValue(counter)
-            log.info(f'Asset checked counter: {counter}')
+            self._propagating_check_state = True
+            try:
+                for index in selected_indexes:
+                    selected_item: QStandardItem = asset_src_model.itemFromIndex(index)
+                    if selected_item.isCheckable():
+                        selected_item.setCheckState(item_state)
+            finally:
+                self._propagating_check_state = False
+            self.update_src_checked_counter()
+
+    def update_src_checked_counter(self):
+        # the checked rows move when a rescan removes or sorts assets, they are counted again after every snapshot
+        asset_src_data = self._asset_src_model_data.get('DSDB', {})
+        asset_src_model: Union[models.AsukaModel, None] = asset_src_data.get('asset_model', None)
+        if asset_src_model is None:
+            return
+        counter_ui: QSpinBox = self.ui(UIP.TRANS_SELECT_COUNTER)
+
+        # Update checked counter
+        temp_index_list = []
+        for i in range(asset_src_model.invisibleRootItem().rowCount()):
+            child = asset_src_model.invisibleRootItem().child(i)
+            if child.checkState() == Qt.Checked:
+                temp_index_list.append(i)
+
+        asset_src_data['checked_index_list'] = temp_index_list
+        counter = len(temp_index_list)
+        counter_ui.setValue(counter)
+        log.info(f'Asset checked counter: {counter}')
 
     @staticmethod
     def scan_project_contents(scanner: th.ScannerThread):
@@ -179,14 +288,102 @@ class MainWindow(QMainWindow):
         new_data = {
             'asset_model': asset_model,
             'thread': new_scanner,
-            'checked_index_list': []
+            'checked_index_list': [],
+            'files_text': None,
+            'last_used': 0.0,
         }
-        new_scanner.asset_file_found.connect(asset_model.add_to_queue)
+        new_scanner.assets_scanned.connect(asset_model.apply_delta)
+        new_scanner.files_indexed.connect(self.mods_files_indexed)
 
         self._mods_model_data[title] = new_data
 
     def _remove_mods_model(self, title: str):
         del self._mods_model_data[title]
+        self._conflict_index.remove_mods(title)
+
+    def project_mods_scanned(self, dir_path: str, asset_records: list, files_text: str):
+        title = Path(dir_path).parent.name
+        data = self._mods_model_data.get(title)
+        if data is None:
+            return
+        asset_model: models.AmaterasuModel = data['asset_model']
+        asset_model.apply_snapshot(asset_records)
+        self.mods_files_indexed(dir_path, files_text)
+        # the mods scanner is only needed for later rescans
+        data['thread'].mark_scanned()
+
+    def mods_files_indexed(self, dir_path: str, files_text: str):
+        # the scanner walks 'modfiles', the mods is named after its parent directory
+        title = Path(dir_path).parent.name
+        self._conflict_index.set_mods_scan(title, files_text)
+        # the scan index is all an evicted model needs to be restored
+        data = self._mods_model_data.get(title)
+        if data is not None:
+            data['files_text'] = files_text
+
+    def get_memory_report(self) -> List[Tuple[str, memory.ModelMemory]]:
+        """
+        Measures the memory used by every loaded model, walking their indexes, see `AsukaModel.get_memory_usage`.
+
+        :return: A list of (model name, `memory.ModelMemory`), the largest first
+        """
+        report = [
+            (f'DSDB {o["asset_model"].src_path}', o['asset_model'].get_memory_usage(exact = True))
+            for o in self._asset_src_model_data.values() if o.get('asset_model') is not None
+        ]
+        report.extend((k, v['asset_model'].get_memory_usage(exact = True)) for k, v in self._mods_model_data.items())
+        return sorted(report, key = lambda o: o[1].total_bytes, reverse = True)
+
+    def log_memory_report(self):
+        report = self.get_memory_report()
+        total = sum(o.total_bytes for _, o in report)
+        log.info(f'Models memory: {memory.format_size(total)} estimated in {len(report)} models')
+        for name, o in report:
+            log.info(
+                f'    {name}: {memory.format_size(o.total_bytes)}, {o.items} items '
+                f'({memory.format_size(o.item_bytes)} + {memory.format_size(o.string_bytes)} strings), '
+                f'queue {memory.format_size(o.queue_bytes)}, indexes {memory.format_size(o.index_bytes)}'
+            )
+        # tracemalloc starts on the first report, the next ones show what was allocated since
+        self._memory_report_count += 1
+        label = f'report {self._memory_report_count}'
+        for o in self._memory_tracer.snapshot(label):
+            log.info(f'    {o}')
+        self.statusBar().showMessage(f'Models memory: {memory.format_size(total)}, see the log for details', 10000)
+
+    def enforce_memory_budget(self):
+        if self._memory_budget is None:
+            return
+        current_title = self.ui(UIP.MODS_DROPDOWN).currentText()
+        entries = [
+            memory.EvictionEntry(
+                f'DSDB {o["asset_model"].src_path}', o['asset_model'].get_memory_usage().total_bytes, 0.0, False
+            )
+            for o in self._asset_src_model_data.values() if o.get('asset_model') is not None
+        ]
+        for title, data in self._mods_model_data.items():
+            asset_model: models.AmaterasuModel = data['asset_model']
+            scanner: th.ScannerThread = data['thread']
+            evictable = (
+                title != current_title and not asset_model.evicted and data['files_text'] is not None
+                and not scanner.isRunning()
+            )
+            entries.append(
+                memory.EvictionEntry(title, asset_model.get_memory_usage().total_bytes, data['last_used'], evictable)
+            )
+
+        for title in memory.get_eviction_candidates(entries, self._memory_budget):
+            self._mods_model_data[title]['asset_model'].evict()
+            log.info(f'Evicted idle mods model, over the memory budget: {title}')
+
+    def _restore_mods_model(self, title: str):
+        data = self._mods_model_data[title]
+        asset_model: models.AmaterasuModel = data['asset_model']
+        files_text = data['files_text']
+        asset_model.apply_snapshot(
+            core.get_asset_record(o, files_text) for o in files_text.split(';') if o.endswith('.name')
+        )
+        log.info(f'Restored evicted mods model: {title}')
 
     def _get_mods_model(self, title: str) -> Union[models.AmaterasuModel, None]:
         return self._mods_model_data.get(title, {}).get('asset_model', None)
@@ -265,8 +462,15 @@ class MainWindow(QMainWindow):
             elif isinstance(wgt, QDoubleSpinBox):
                 wgt.setValue(val)
 
+        if proj_mods_model is not None:
+            mods_data = self._mods_model_data[mods_title]
+            mods_data['last_used'] = time.monotonic()
+            if proj_mods_model.evicted:
+                self._restore_mods_model(mods_title)
+
         log.info(f'Set mods asset model: {proj_mods_model}')
         asset_tv.setModel(proj_mods_model)
+        self._mods_asset_filter.refresh()
 
     def create_project_mods(self):
         title: QLineEdit = self.ui(UIP.MODS_TITLE_TXT)
@@ -353,27 +557,83 @@ class MainWindow(QMainWindow):
             wgt.setReadOnly(read_only)
 
     def populate_source_asset(self):
+        # the base DSDB then its patch and DLC layers, separated by os.pathsep, later layers override earlier ones
         dsdb_txt: QLineEdit = self.ui(UIP.DSDB_DIR_TXT)
-        dsdb_dir: Path = Path(dsdb_txt.text())
-        if not dsdb_dir.is_dir():
-            raise err.InvalidDirectoryPath(f'Invalid directory path: {dsdb_dir}')
-
-        dsdb_model = models.create_dsdb_model(dsdb_dir)
-        new_scanner = th.ScannerThread(dsdb_model.src_path)
+        layer_dirs = layers.parse_layer_dirs(dsdb_txt.text())
+        if not layer_dirs:
+            raise err.InvalidDirectoryPath(f'Invalid directory path: {dsdb_txt.text()}')
+        for dsdb_dir in layer_dirs:
+            if not dsdb_dir.is_dir():
+                raise err.InvalidDirectoryPath(f'Invalid directory path: {dsdb_dir}')
+
+        dsdb_model = models.create_dsdb_model(layer_dirs[0])
+        layered_index = None
+        if len(layer_dirs) > 1:
+            layered_index = layers.LayeredIndex(layer_dirs, self._layer_scans)
+            dsdb_model.catalog.set_layers(layered_index)
+            log.info(f'DSDB source layers: {", ".join(str(o) for o in layer_dirs)}')
+        new_scanner = th.ScannerThread(dsdb_model.src_path, layered_index)
+        new_scanner.set_service(self._service_client)
         new_data = {
             'asset_model': dsdb_model,
             'thread': new_scanner,
             'checked_index_list': [],
         }
-        new_scanner.asset_file_found.connect(dsdb_model.add_to_queue)
+        new_scanner.assets_scanned.connect(dsdb_model.apply_delta)
         self.scan_project_contents(new_scanner)
 
-        self.ui(UIP.SRC_ASSET_TV).setModel(dsdb_model)
-        dsdb_model.dataChanged.connect(self.src_asset_selection_counter)
+        self._set_source_model(dsdb_model, new_data)
 
-        self._asset_src_model_data['DSDB'] = new_data
+    def rescan_source_layers(self, full: bool = False):
+        src_data = self._asset_src_model_data.get('DSDB', {})
+        scanner: Union[th.ScannerThread, None] = src_data.get('thread', None)
+        if scanner is None or scanner.layered_index is None or scanner.isRunning():
+            return
+        # the layers are stamped by their directories mtime, the unchanged ones are not walked again,
+        # a full rescan walks every layer for the changes the stamps miss
+        if full:
+            scanner.layered_index.invalidate()
+        scanner.start()
+
+    def _get_delta_dsdb_dir(self) -> Path:
+        layer_dirs = layers.parse_layer_dirs(self.ui(UIP.DSDB_DIR_TXT).text())
+        if len(layer_dirs) != 1:
+            raise err.InvalidDirectoryPath(f'Delta packing needs a single DSDB directory, not source layers: {layer_dirs}')
+        if not layer_dirs[0].is_dir():
+            raise err.InvalidDirectoryPath(f'Delta packing needs a DSDB directory: {layer_dirs[0]}')
+        return layer_dirs[0]
+
+    def _set_source_model(self, src_model: models.AsukaModel, src_data: dict):
+        # a browsed archive stays open, close it once replaced so it can be deleted or repacked on Windows
+        old_model = self._asset_src_model_data.get('DSDB', {}).get('asset_model', None)
+        if isinstance(old_model, models.ArchiveModel) and old_model is not src_model:
+            old_model.close()
+        self.ui(UIP.SRC_ASSET_TV).setModel(src_model)
+        self._src_asset_filter.refresh()
+        src_model.dataChanged.connect(self.src_asset_selection_counter)
+        src_model.snapshot_applied.connect(self.update_src_checked_counter)
+
+        self._asset_src_model_data['DSDB'] = src_data
+
+    def open_packed_mods_source(self):
+        pack_dir_path = self.ui(UIP.SETUP_PACK_DIR_TXT).text()
+        zip_file, _ = QFileDialog.getOpenFileName(self, 'Select packed mods', pack_dir_path, 'Packed mods (*.zip)')
+        if not zip_file:
+            return
+
+        archive_model = models.create_archive_model(Path(zip_file))
+        log.info(f'Browsing packed mods: {zip_file}')
+        self._set_source_model(archive_model, {
+            'asset_model': archive_model,
+            'thread': None,
+            'checked_index_list': [],
+        })
 
     def copy_src_asset_to_mods(self):
+        if self._transfer_thread is not None and self._transfer_thread.isRunning():
+            log.warning('A transfer is already running')
+            return
+
         src_data = self._asset_src_model_data.get('DSDB', {})
         src_model: Union[models.AsukaModel, None] = src_data.get('asset_model', None)
         if src_model is None:
@@ -386,26 +646,87 @@ class MainWindow(QMainWindow):
         if tgt_model is None:
             raise err.CopyAssetError(f'Cannot find mods information: {mods_title}')
 
-        selection_checked_list = src_data.get('checked_index_list', [])
-        for i in selection_checked_list:
-            src_item: QStandardItem = src_model.invisibleRootItem().child(i)
-            # for file_name in src_model.get_files_name_by_asset_item(src_item):
-            #     copy_result = core.copy_asset_file(src_model.src_path, tgt_model.src_path, file_name)
-            #     log.info(copy_result.message)
+        store = None
+        if self.ui(UIP.SETUP_SHARED_STORE_CHK).isChecked():
+            if self._shared_store is None:
+                self._shared_store = shared_store.SharedAssetStore()
+            store = self._shared_store
 
-            for file_path in src_model.get_files_path_by_asset_item(src_item):
-                src_dir = file_path.parent
-                file_name = file_path.name
-                tgt_dir = tgt_model.src_path / src_dir.relative_to(src_model.src_path)
-                copy_result = core.copy_asset_file(src_dir, tgt_dir, file_name)
-                log.info(copy_result.message)
+        reference = self.ui(UIP.TRANS_REFERENCE_CHK).isChecked()
 
-            src_structure = src_model.get_asset_structure_by_asset_item(src_item)
-            tgt_model.add_asset_item(src_structure)
+        # the files are listed before the transfer, the rows of the checked assets may move meanwhile
+        asset_files = []
+        self._transfer_mods_title = mods_title
+        self._transfer_structures = {}
+        for i in src_data.get('checked_index_list', []):
+            src_item: QStandardItem = src_model.invisibleRootItem().child(i)
+            asset_files.append((src_item.text(), list(src_model.get_files_path_by_asset_item(src_item))))
+            self._transfer_structures[src_item.text()] = src_model.get_asset_structure_by_asset_item(src_item)
 
+        mods_archive = src_model.archive if isinstance(src_model, models.ArchiveModel) else None
+        self._transfer_thread = th.TransferThread(
+            mods_title, asset_files, tgt_model.references, mods_archive, reference, store
+        )
+        self._transfer_thread.asset_transferred.connect(self.asset_transferred)
+        self._transfer_thread.copy_progress.connect(self.large_copy_progress)
+        self._transfer_thread.transfer_finished.connect(self.transfer_finished)
+        self.ui(UIP.TRANS_COPY_BTN).setEnabled(False)
+        self._transfer_thread.start()
+
+    def asset_transferred(self, asset_name: str, relative_paths: List[str]):
+        mods_title = self._transfer_mods_title
+        tgt_model = self._get_mods_model(mods_title)
+        if tgt_model is not None:
+            tgt_model.add_asset_item(self._transfer_structures.pop(asset_name))
+        for o in relative_paths:
+            self._conflict_index.add_file(mods_title, o)
+
+        src_model: Union[models.AsukaModel, None] = self._asset_src_model_data.get('DSDB', {}).get('asset_model', None)
+        src_item = src_model.find_item_by_name(asset_name) if src_model is not None else None
+        if src_item is not None:
             src_item.setCheckState(Qt.Unchecked)
 
+    def transfer_finished(self, copied: int, failed: int):
+        self.ui(UIP.TRANS_COPY_BTN).setEnabled(True)
+        message = f'Transferred {copied} files to {self._transfer_mods_title}, {failed} failed'
+        log.info(message)
+        self.statusBar().showMessage(message, 10000)
+
+    def mods_asset_context_menu(self, pos):
+        asset_tv: QTreeView = self.ui(UIP.MODS_ASSET_TV)
+        menu = QMenu(asset_tv)
+        menu.addAction('Make Editable', self.make_mods_asset_editable)
+        menu.exec(asset_tv.viewport().mapToGlobal(pos))
+
+    def make_mods_asset_editable(self):
+        mods_dd: QComboBox = self.ui(UIP.MODS_DROPDOWN)
+        tgt_model = self._get_mods_model(mods_dd.currentText())
+        if tgt_model is None:
+            return
+        asset_tv: QTreeView = self.ui(UIP.MODS_ASSET_TV)
+
+        asset_items = {}
+        for index in asset_tv.selectedIndexes():
+            # walk up to the asset root item
+            while index.parent().isValid():
+                index = index.parent()
+            item = tgt_model.itemFromIndex(index)
+            asset_items[item.text()] = item
+
+        for asset_name, asset_item in asset_items.items():
+            for file_path in tgt_model.get_files_path_by_asset_item(asset_item):
+                try:
+                    core.prepare_asset_file_for_edit(file_path, tgt_model.references)
+                except err.CopyAssetError as e:
+                    log.error(e)
+            tgt_model.add_asset_item(tgt_model.get_asset_structure_by_asset_item(asset_item))
+            log.info(f'Asset is editable: {asset_name}')
+
     def packing_mods(self):
+        if self._pack_thread is not None and self._pack_thread.isRunning():
+            log.warning('Packing is already running')
+            return
+
         mods_dd: QComboBox = self.ui(UIP.MODS_DROPDOWN)
         mods_title = mods_dd.currentText()
         tgt_data = self._mods_model_data.get(mods_title, {})
@@ -418,7 +739,62 @@ class MainWindow(QMainWindow):
         if not pack_dir_path.is_dir():
             raise err.InvalidDirectoryPath(f'Invalid directory path: {pack_dir_path}')
 
-        core.pack_project_mods(tgt_model.root_path, pack_dir_path, f'{mods_title}.zip')
+        dsdb_dir_path = None
+        if self.ui(UIP.PACK_DELTA_CHK).isChecked():
+            dsdb_dir_path = self._get_delta_dsdb_dir()
+
+        self._pack_thread = th.PackThread(tgt_model.root_path, pack_dir_path, f'{mods_title}.zip', dsdb_dir_path)
+        self._pack_thread.pack_finished.connect(self.mods_packed)
+        self._pack_thread.pack_failed.connect(self.mods_packing_failed)
+        self.ui(UIP.PACKING_BTN).setEnabled(False)
+        self._pack_thread.start()
+
+    def mods_packed(self, pack_result: core.PackResult):
+        self.ui(UIP.PACKING_BTN).setEnabled(True)
+        message = (
+            f'Packed {pack_result.packed_files} files, skipped {pack_result.skipped_files} unchanged files '
+            f'({pack_result.bytes_saved / 1048576:.2f} MB saved): {pack_result.zip_file}'
+        )
+        log.info(message)
+        self.statusBar().showMessage(message, 10000)
+
+    def mods_packing_failed(self, message: str):
+        self.ui(UIP.PACKING_BTN).setEnabled(True)
+        self.statusBar().showMessage(f'Packing failed: {message}', 10000)
+
+    def large_copy_progress(self, copied: int, total: int):
+        self.statusBar().showMessage(f'Copying {copied / 1048576:.0f}/{total / 1048576:.0f} MB')
+
+    def packing_all_mods(self):
+        if self._batch_pack_thread is not None and self._batch_pack_thread.isRunning():
+            log.warning('Batch packing is already running')
+            return
+
+        pack_dir_path = Path(self.ui(UIP.SETUP_PACK_DIR_TXT).text())
+        if not pack_dir_path.is_dir():
+            raise err.InvalidDirectoryPath(f'Invalid directory path: {pack_dir_path}')
+
+        dsdb_dir_path = None
+        if self.ui(UIP.PACK_DELTA_CHK).isChecked():
+            dsdb_dir_path = self._get_delta_dsdb_dir()
+
+        project_dirs = [o['asset_model'].root_path for o in self._mods_model_data.values()]
+        if not project_dirs:
+            log.warning('No project mods to pack')
+            return
+
+        self._batch_pack_thread = th.BatchPackThread(project_dirs, pack_dir_path, dsdb_dir_path)
+        self._batch_pack_thread.mods_packed.connect(self.batch_mods_packed)
+        self._batch_pack_thread.batch_finished.connect(self.batch_packing_finished)
+        self.ui(UIP.PACK_ALL_BTN).setEnabled(False)
+        self._batch_pack_thread.start()
+
+    def batch_mods_packed(self, done: int, total: int, mods_name: str):
+        self.statusBar().showMessage(f'Packing mods {done}/{total}: {mods_name}')
+
+    def batch_packing_finished(self, report_file: str):
+        self.ui(UIP.PACK_ALL_BTN).setEnabled(True)
+        self.statusBar().showMessage(f'Batch packing finished, report: {report_file}', 10000)
 
     def open_pack_mods_dir(self):
         pack_dir_ui: QLineEdit = self.ui(UIP.SETUP_PACK_DIR_TXT)
@@ -429,6 +805,39 @@ class MainWindow(QMainWindow):
         log.info(f'Opening directory: {pack_dir_path}')
         os.startfile(pack_dir_path)
 
+    def check_mods_conflicts(self):
+        conflict_report = self._conflict_index.get_conflict_report()
+        for o in conflict_report:
+            log.warning(f'{o.mods} and {o.other_mods} both provide {len(o.files)} files: {", ".join(o.files)}')
+        conflicted_count = len(self._conflict_index.get_conflicted_files())
+        message = f'{conflicted_count} files are provided by more than one mods, {len(conflict_report)} mods pairs conflict'
+        log.info(message)
+        self.statusBar().showMessage(message, 10000)
+
+    def import_packed_mods(self):
+        pack_dir_path = self.ui(UIP.SETUP_PACK_DIR_TXT).text()
+        zip_file, _ = QFileDialog.getOpenFileName(self, 'Select packed mods', pack_dir_path, 'Packed mods (*.zip)')
+        if not zip_file:
+            return
+
+        project_mods_dir = Path(self.ui(UIP.PROJECT_DIR_TXT).text())
+        if not project_mods_dir.is_dir():
+            raise err.InvalidDirectoryPath(f'Invalid directory path: {project_mods_dir}')
+
+        import_result = archive.import_mods_archive(zip_file, project_mods_dir)
+        title = import_result.project_dir.name
+        index = self._add_new_mods(title, import_result.project_dir)
+        if index < 0:
+            return
+
+        # the archive central directory already told us every file, no need to walk the new mods
+        scanner: th.ScannerThread = self._mods_model_data[title]['thread']
+        scanner.seed_index(import_result.name_list, import_result.files_text)
+        self.scan_project_contents(scanner)
+
+        mods_dd: QComboBox = self.ui(UIP.MODS_DROPDOWN)
+        mods_dd.setCurrentIndex(mods_dd.findText(title))
+
 
 # TODO: more logs in core, and gui
 # TODO: duplicate code need to be addressed
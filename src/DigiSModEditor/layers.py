@@ -0,0 +1,167 @@
+import collections
+import logging
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Union, Dict, List, Tuple, Iterable, Callable, Set
+
+from . import core
+from . import catalog
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'LayerScan',
+    'LayeredIndex',
+    'parse_layer_dirs',
+]
+
+LayerScan = collections.namedtuple(
+    'LayerScan',
+    (
+        'dir_path',
+        'stamp',
+        'files',
+        'files_text'
+    )
+)
+
+
+def parse_layer_dirs(text: str) -> List[Path]:
+    """
+    Splits the text of the DSDB directory field into its source layers, separated by `os.pathsep`.
+
+    :param text: The DSDB directory field, e.g. 'DSDB;Patch;DLC' on Windows
+    :return: The layer directories, the base DSDB first
+    """
+    return [Path(o.strip()) for o in text.split(os.pathsep) if o.strip()]
+
+
+def _get_layer_stamp(dir_path: Path) -> Tuple[int, ...]:
+    # adding, removing or renaming a file changes the mtime of its directory, the layers only have the root and
+    # 'images'. Overwriting a file in place doesn't, but the scan only records file names, see `LayeredIndex`
+    stamp = []
+    for o in (dir_path, dir_path / 'images'):
+        try:
+            stamp.append(os.stat(o).st_mtime_ns)
+        except OSError:
+            stamp.append(0)
+    return tuple(stamp)
+
+
+class LayeredIndex:
+    """
+    Overlay of ordered DSDB source layers, e.g. the base DSDB then its patch and DLC directories.
+
+    Every layer is scanned on its own and its scan is kept in `scans`, which can be shared between indexes,
+    so a changed patch directory is the only one walked again. The merged index maps every file name to
+    the last layer which has it, later layers override earlier ones per file.
+
+    A layer is only walked again when the mtime of its root or 'images' directory changes, i.e. when a file is
+    added, removed or renamed there. Files overwritten in place keep their scan valid, the index has no file
+    content, but a file changed in any other subdirectory, or a file system which doesn't update the directory
+    mtime, e.g. some network shares, is missed: call `invalidate` to walk the layers again.
+    """
+    def __init__(self, layer_dirs: Iterable[Union[PathLike, Path]], scans: Union[Dict[Path, LayerScan], None] = None):
+        self._layer_dirs = [Path(o) for o in layer_dirs]
+        if not self._layer_dirs:
+            raise ValueError('A layered index needs at least one layer')
+        self._scans = scans if scans is not None else {}
+        # file name to the index of its winning layer
+        self._winners: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._layer_dirs)
+
+    @property
+    def layer_dirs(self) -> List[Path]: return list(self._layer_dirs)
+
+    @property
+    def base_dir(self) -> Path: return self._layer_dirs[0]
+
+    @property
+    def scans(self) -> Dict[Path, LayerScan]: return self._scans
+
+    def is_stale(self, layer_dir: Path) -> bool:
+        scan = self._scans.get(layer_dir)
+        return scan is None or scan.stamp != _get_layer_stamp(layer_dir)
+
+    def invalidate(self, layer_dir: Union[PathLike, Path, None] = None):
+        """
+        Drop the cached scan of a layer, the next `scan` walks it again.
+
+        :param layer_dir: The layer directory, or None to drop the scans of every layer of this index
+        """
+        for o in self._layer_dirs if layer_dir is None else [Path(layer_dir)]:
+            self._scans.pop(o, None)
+
+    def scan(self, checkpoint: Union[Callable[[], None], None] = None) -> Tuple[List[str], str]:
+        """
+        Walks the layers without an up-to-date scan and merges every layer into the overlay.
+
+        :param checkpoint: Called before walking each layer and each of its directories, e.g. `IoScheduler.checkpoint` to pause or cancel
+        :return: The same tuple as `core.walk_asset_files`, for the merged layers
+        """
+        for layer_dir in self._layer_dirs:
+            if not self.is_stale(layer_dir):
+                continue
+            if checkpoint is not None:
+                checkpoint()
+            stamp = _get_layer_stamp(layer_dir)
+            _, files_text = core.walk_asset_files(layer_dir, checkpoint)
+            files = tuple(dict.fromkeys(files_text.split(';'))) if files_text else ()
+            self._scans[layer_dir] = LayerScan(layer_dir, stamp, files, files_text)
+            log.info(f'Scanned source layer, {len(files)} files: {layer_dir}')
+        return self.merge()
+
+    def merge(self) -> Tuple[List[str], str]:
+        """
+        Merges the cached layer scans, the layers must have been scanned.
+
+        :return: The same tuple as `core.walk_asset_files`, for the merged layers
+        :raises KeyError: If a layer has not been scanned
+        """
+        winners = {}
+        for i, layer_dir in enumerate(self._layer_dirs):
+            winners.update(dict.fromkeys(self._scans[layer_dir].files, i))
+        self._winners = winners
+        return [o for o in winners if o.endswith('.name')], ';'.join(winners)
+
+    def get_changed_assets(self, old_winners: Dict[str, int]) -> Set[str]:
+        """
+        Compares the overlay with a previous one, e.g. to update the assets of a model after a layer changed.
+
+        :param old_winners: The `winners` before the layer changed
+        :return: The stems of the assets which have a file added, removed or moved to another layer
+        """
+        changed = {k for k, v in self._winners.items() if old_winners.get(k) != v}
+        changed.update(old_winners.keys() - self._winners.keys())
+        asset_stems = {
+            o[:-len(const.FileKind.NAME)] for o in (*self._winners, *old_winners) if o.endswith(const.FileKind.NAME)
+        }
+        # the files are grouped by their stem prefix, see `core.get_asset_record`
+        return {
+            file_name[:i] for file_name in changed for i in range(1, len(file_name)) if file_name[:i] in asset_stems
+        }
+
+    @property
+    def winners(self) -> Dict[str, int]: return dict(self._winners)
+
+    def get_layer_dir(self, file_name: str) -> Path:
+        """
+        Returns the layer a file is read from, the base layer for unknown files.
+
+        :param file_name: The asset file name
+        :return: The layer directory
+        """
+        return self._layer_dirs[self._winners.get(file_name, 0)]
+
+    def get_file_path(self, file_name: str) -> Path:
+        """
+        Returns the full path of an asset file in its winning layer, see `catalog.get_relative_file_path`.
+
+        :param file_name: The asset file name
+        :return: The full path of the file
+        """
+        return self.get_layer_dir(file_name).joinpath(*catalog.get_relative_file_path(file_name).parts)
@@ -1,4 +1,7 @@
+import atexit
 import logging.config
+import logging.handlers
+import queue
 
 from . import utils as utl
 
@@ -61,4 +64,33 @@ logging_config = {
     }
 }
 
+_listeners = []
+
+
+def _queue_handlers(logger: logging.Logger):
+    # the hot threads only put the records in a queue, a listener thread writes them to the actual handlers
+    handlers = list(logger.handlers)
+    if not handlers:
+        return
+    log_queue = queue.SimpleQueue()
+    for o in handlers:
+        logger.removeHandler(o)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level = True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def stop_listeners():
+    """
+    Writes the queued records and stops the listener threads, called at exit.
+    """
+    while _listeners:
+        _listeners.pop().stop()
+
+
 logging.config.dictConfig(logging_config)
+_queue_handlers(logging.getLogger())
+for _logger_name in logging_config['loggers']:
+    _queue_handlers(logging.getLogger(_logger_name))
+atexit.register(stop_listeners)
@@ -0,0 +1,183 @@
+import collections
+import logging
+import os
+import sys
+import tracemalloc
+from typing import Union, Dict, Iterable, List
+
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'ModelMemory',
+    'EvictionEntry',
+    'MemoryTracer',
+    'get_memory_budget',
+    'get_container_size',
+    'get_eviction_candidates',
+    'format_size',
+]
+
+# set to a budget in MB to evict the idle mods models above it, see `get_eviction_candidates`
+MEMORY_BUDGET_ENV_VAR = 'DIGIS_MEMORY_BUDGET_MB'
+# estimated C++ size of a QStandardItem with its data roles, measured with tests/model_benchmark.py
+ESTIMATED_ITEM_BYTES = 1200
+# estimated size of the catalog and search index entries per Qt item, measured with `get_container_size`
+ESTIMATED_INDEX_BYTES = 460
+# estimated size of an asset structure waiting in the queue of a model
+ESTIMATED_QUEUED_ASSET_BYTES = 1450
+
+ModelMemory = collections.namedtuple(
+    'ModelMemory',
+    (
+        'items',
+        'item_bytes',
+        'string_bytes',
+        'queue_bytes',
+        'index_bytes',
+        'total_bytes'
+    )
+)
+
+EvictionEntry = collections.namedtuple(
+    'EvictionEntry',
+    (
+        'name',
+        'total_bytes',
+        'last_used',
+        'evictable'
+    )
+)
+
+
+def format_size(size: int) -> str:
+    return f'{size / 1048576:.1f} MB' if size >= 1048576 else f'{size / 1024:.1f} KB'
+
+
+def get_memory_budget() -> Union[int, None]:
+    """
+    Returns the memory budget of the models, from the `MEMORY_BUDGET_ENV_VAR` environment variable.
+
+    :return: The budget in bytes, or None if there is no budget
+    """
+    budget_mb = os.environ.get(MEMORY_BUDGET_ENV_VAR)
+    if not budget_mb:
+        return None
+    try:
+        return int(float(budget_mb) * 1048576)
+    except ValueError:
+        log.warning(f'Invalid memory budget {MEMORY_BUDGET_ENV_VAR}={budget_mb}, no budget')
+        return None
+
+
+def get_container_size(container, depth: int = 3) -> int:
+    """
+    Estimates the size of a container with the strings, tuples, lists, sets and dicts it holds.
+
+    Shared objects are counted once, the nested containers are followed up to `depth` levels.
+
+    :param container: The container to measure
+    :param depth: The number of nested levels to follow
+    :return: The estimated size in bytes
+    """
+    seen = set()
+
+    def _size(o, level: int) -> int:
+        if id(o) in seen:
+            return 0
+        seen.add(id(o))
+        size = sys.getsizeof(o)
+        if level >= depth:
+            return size
+        if isinstance(o, dict):
+            size += sum(_size(k, level + 1) + _size(v, level + 1) for k, v in o.items())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            size += sum(_size(v, level + 1) for v in o)
+        return size
+
+    return _size(container, 0)
+
+
+def get_eviction_candidates(entries: Iterable[EvictionEntry], budget: int) -> List[str]:
+    """
+    Picks the least recently used evictable models to evict until the total fits in the budget.
+
+    :param entries: An `EvictionEntry` per model
+    :param budget: The budget in bytes
+    :return: The names of the models to evict, least recently used first
+    """
+    entries = list(entries)
+    total = sum(o.total_bytes for o in entries)
+    evicted = []
+    for o in sorted((o for o in entries if o.evictable), key = lambda o: o.last_used):
+        if total <= budget:
+            break
+        total -= o.total_bytes
+        evicted.append(o.name)
+    return evicted
+
+
+class MemoryTracer:
+    """
+    On demand `tracemalloc` snapshots, each one compared with the previous one.
+
+    Tracing only starts with the first snapshot, so it costs nothing until it is needed. Only the latest
+    `max_snapshots` snapshots are kept, a snapshot holds every traced allocation.
+    """
+    def __init__(self, frames: int = 5, max_snapshots: int = 2):
+        """
+        :param frames: The number of frames traced per allocation
+        :param max_snapshots: The number of the latest snapshots kept, at least 2 to compare them
+        """
+        self._frames = frames
+        self._max_snapshots = max(2, max_snapshots)
+        self._snapshots: Dict[str, tracemalloc.Snapshot] = collections.OrderedDict()
+        self._last_label = None
+
+    @property
+    def labels(self) -> List[str]: return list(self._snapshots)
+
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, label: str) -> List[str]:
+        """
+        Takes a snapshot, starting the tracing if needed, and compares it with the previous one.
+
+        :param label: The label of the snapshot
+        :return: The top differences with the previous snapshot, empty for the first one
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        self._snapshots.pop(label, None)
+        self._snapshots[label] = snapshot
+        while len(self._snapshots) > self._max_snapshots:
+            self._snapshots.popitem(last = False)
+        previous_label, self._last_label = self._last_label, label
+        if previous_label is None:
+            return []
+        return self.diff(previous_label, label)
+
+    def diff(self, old_label: str, new_label: str, limit: int = 20) -> List[str]:
+        """
+        Compares two snapshots by allocation line.
+
+        :param old_label: The label of the older snapshot
+        :param new_label: The label of the newer snapshot
+        :param limit: The number of lines to return
+        :return: The largest differences, formatted by `tracemalloc`
+        :raises KeyError: If a snapshot doesn't exist, or was dropped for a newer one
+        """
+        stats = self._snapshots[new_label].compare_to(self._snapshots[old_label], 'lineno')
+        return [str(o) for o in stats[:limit]]
+
+    def stop(self):
+        self._snapshots.clear()
+        self._last_label = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
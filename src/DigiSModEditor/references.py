@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from typing import Union, Dict, Generator, Tuple
+
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'ReferenceManifest',
+    'find_project_mods_dir',
+]
+
+MANIFEST_FILE_NAME = 'REFERENCES.json'
+MANIFEST_VERSION = 1
+
+
+def find_project_mods_dir(file_path: Union[PathLike, Path]) -> Union[Path, None]:
+    """
+    Finds the project mods directory a 'modfiles' file belongs to.
+
+    :param file_path: A file path inside the 'modfiles' directory of a project mods
+    :return: The project mods directory, or None if the file is not inside a 'modfiles' directory
+    """
+    for parent in Path(file_path).parents:
+        if parent.name == 'modfiles':
+            return parent.parent
+    return None
+
+
+class ReferenceManifest:
+    """
+    Per project mods manifest of the files inherited from the DSDB without being copied.
+
+    The manifest is stored as 'REFERENCES.json' in the project mods directory and maps the path of each
+    referenced file, relative to 'modfiles' and with '/' separators, to its DSDB source file.
+    """
+    def __init__(self, project_dir: Union[PathLike, Path]):
+        self._project_dir = Path(project_dir)
+        self._files: Dict[str, str] = {}
+        self._changed = False
+
+    @classmethod
+    def load(cls, project_dir: Union[PathLike, Path]) -> 'ReferenceManifest':
+        """
+        Loads the manifest of a project mods, an empty manifest if the project mods doesn't have one.
+
+        :param project_dir: The project mods directory
+        :return: The reference manifest
+        """
+        manifest = cls(project_dir)
+        if manifest.manifest_file.exists():
+            with open(manifest.manifest_file, 'r') as f:
+                data = json.load(f)
+            manifest._files = {k: v['source'] for k, v in data.get('files', {}).items()}
+        return manifest
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, relative_path: str):
+        return self._normalize(relative_path) in self._files
+
+    @property
+    def project_dir(self) -> Path: return self._project_dir
+
+    @property
+    def mods_dir(self) -> Path: return self._project_dir / 'modfiles'
+
+    @property
+    def manifest_file(self) -> Path: return self._project_dir / MANIFEST_FILE_NAME
+
+    @staticmethod
+    def _normalize(relative_path: Union[str, PathLike]) -> str:
+        return PurePosixPath(*Path(relative_path).parts).as_posix()
+
+    def get_relative_path(self, mods_file: Union[PathLike, Path]) -> str:
+        """
+        Returns the manifest key of a file inside the 'modfiles' directory.
+
+        :param mods_file: The file path inside the 'modfiles' directory
+        :return: The path relative to 'modfiles' with '/' separators
+        """
+        return self._normalize(Path(mods_file).relative_to(self.mods_dir))
+
+    def items(self) -> Generator[Tuple[str, Path], None, None]:
+        for relative_path, source in self._files.items():
+            yield relative_path, Path(source)
+
+    def get_source(self, relative_path: str) -> Union[Path, None]:
+        source = self._files.get(self._normalize(relative_path))
+        return Path(source) if source is not None else None
+
+    def add(self, relative_path: str, source_file: Union[PathLike, Path]):
+        """
+        Record a file of the mods as a reference to a DSDB file.
+
+        :param relative_path: The path of the file relative to 'modfiles'
+        :param source_file: The DSDB source file
+        """
+        self._files[self._normalize(relative_path)] = os.path.abspath(source_file)
+        self._changed = True
+
+    def remove(self, relative_path: str) -> Union[Path, None]:
+        """
+        Forget a reference, e.g. once the file has been materialized.
+
+        :param relative_path: The path of the file relative to 'modfiles'
+        :return: The DSDB source file of the reference, or None if the file was not referenced
+        """
+        source = self._files.pop(self._normalize(relative_path), None)
+        if source is not None:
+            self._changed = True
+            return Path(source)
+        return None
+
+    def save(self):
+        """
+        Write the manifest if it changed. An empty manifest removes the manifest file.
+        """
+        if not self._changed:
+            return
+        if self._files:
+            data = {
+                'version': MANIFEST_VERSION,
+                'files': {k: {'source': v} for k, v in sorted(self._files.items())}
+            }
+            with open(self.manifest_file, 'w') as f:
+                json.dump(data, f, indent = 1)
+        elif self.manifest_file.exists():
+            os.remove(self.manifest_file)
+        self._changed = False
+        log.debug(f'Saved {len(self._files)} references: {self.manifest_file}')
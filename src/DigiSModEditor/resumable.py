@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Union, Callable, List
+
+from . import digest
+from . import store as shared_store
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'LARGE_FILE_SIZE',
+    'copy_file_resumable',
+    'get_partial_files',
+    'is_partial_file',
+]
+
+# files from this size on are copied in chunks and can be resumed
+LARGE_FILE_SIZE = 256 * 1024 * 1024  # 256MB
+CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+# the journal is committed every this many chunks or seconds, whichever comes first
+JOURNAL_CHUNKS = 8
+JOURNAL_INTERVAL = 2.0
+JOURNAL_VERSION = 1
+PARTIAL_SUFFIXES = ('.partial', '.partial.json', '.partial.json.tmp')
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def get_partial_files(dest_path: Union[PathLike, Path]):
+    """
+    Returns the partial file and the journal file of a resumable copy.
+
+    :param dest_path: The destination file of the copy
+    :return: A tuple of the partial file path and the journal file path
+    """
+    dest_path = Path(dest_path)
+    return dest_path.with_name(f'{dest_path.name}.partial'), dest_path.with_name(f'{dest_path.name}.partial.json')
+
+
+def is_partial_file(file_path: Union[PathLike, Path]) -> bool:
+    """
+    Whether a file is left by an interrupted resumable copy, it must not be packed.
+
+    :param file_path: The file path
+    :return: True if the file is a partial file or its journal
+    """
+    return Path(file_path).name.endswith(PARTIAL_SUFFIXES)
+
+
+def _hash_chunk(data) -> str:
+    return hashlib.blake2b(data, digest_size = digest.DIGEST_SIZE).hexdigest()
+
+
+def _write_journal(journal_path: Path, journal: dict):
+    temp_path = journal_path.with_name(f'{journal_path.name}.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(journal, f)
+    os.replace(temp_path, journal_path)
+
+
+def _commit_journal(dest, journal_path: Path, journal: dict):
+    # the recorded chunks must be on disk before the journal claims them
+    os.fsync(dest.fileno())
+    _write_journal(journal_path, journal)
+
+
+def _replace_file(src_path: Path, dest_path: Path):
+    try:
+        os.replace(src_path, dest_path)
+    except PermissionError:
+        if not dest_path.exists():
+            raise
+        # Windows refuses to replace a read only file, e.g. a link to a shared store object, but not to rename it
+        old_path = dest_path.with_name(f'{dest_path.name}.old')
+        if old_path.exists():
+            shared_store.remove_file(old_path)
+        os.replace(dest_path, old_path)
+        try:
+            os.replace(src_path, dest_path)
+        except OSError:
+            os.replace(old_path, dest_path)
+            raise
+        shared_store.remove_file(old_path)
+
+
+def _get_verified_offset(partial_path: Path, journal: dict) -> int:
+    # walk back from the last checkpoint until a chunk of the partial file matches its recorded digest
+    chunk_size = journal['chunk_size']
+    chunk_digests: List[str] = journal['chunk_digests']
+    try:
+        partial_size = os.stat(partial_path).st_size
+    except FileNotFoundError:
+        return 0
+    with open(partial_path, 'rb') as f:
+        for index in range(len(chunk_digests) - 1, -1, -1):
+            offset = index * chunk_size
+            if offset >= partial_size:
+                continue
+            f.seek(offset)
+            if _hash_chunk(f.read(chunk_size)) == chunk_digests[index]:
+                del chunk_digests[index + 1:]
+                return min(offset + chunk_size, journal['size'])
+    chunk_digests.clear()
+    return 0
+
+
+def copy_file_resumable(
+        src_path: Union[PathLike, Path],
+        dest_path: Union[PathLike, Path],
+        chunk_size: int = CHUNK_SIZE,
+        on_progress: Union[ProgressCallback, None] = None,
+        checkpoint: Union[Callable[[], None], None] = None
+) -> int:
+    """
+    Copies a large file in chunks, so an interrupted copy resumes where it stopped instead of from zero.
+
+    The chunks are written to '<dest>.partial' and their digests are checkpointed in the '<dest>.partial.json'
+    journal, every `JOURNAL_CHUNKS` chunks or `JOURNAL_INTERVAL` seconds and when the copy is interrupted, after
+    syncing the partial file. A new copy of the same, unchanged, source resumes from the last chunk whose digest
+    still matches, a crash only loses the chunks written since the last checkpoint. Once complete, the partial file
+    is renamed over the destination in a single step, so the destination is either the previous file or the complete
+    new file, never a mix.
+
+    :param src_path: The file to copy
+    :param dest_path: The destination file, replaced if it exists
+    :param chunk_size: The size of each chunk, ignored when resuming a copy started with another size
+    :param on_progress: Called with (copied bytes, total bytes) after each chunk
+    :param checkpoint: Called before each chunk, e.g. `IoScheduler.checkpoint`, it may raise to interrupt the copy
+    :return: The number of bytes copied by this call, less than the file size when resumed
+    :raises OSError: If the copy fails, the partial file is kept to be resumed
+    """
+    src_path = Path(src_path)
+    dest_path = Path(dest_path)
+    partial_path, journal_path = get_partial_files(dest_path)
+    src_stat = os.stat(src_path)
+    source = {'source': os.path.abspath(src_path), 'size': src_stat.st_size, 'mtime_ns': src_stat.st_mtime_ns}
+
+    journal = None
+    if journal_path.exists():
+        try:
+            with open(journal_path, 'r') as f:
+                journal = json.load(f)
+        except ValueError:
+            journal = None
+        if journal is not None and {k: journal.get(k) for k in source} != source:
+            log.info(f'Source changed since the partial copy, restarting: {src_path}')
+            journal = None
+
+    offset = 0
+    if journal is None:
+        journal = {'version': JOURNAL_VERSION, **source, 'chunk_size': chunk_size, 'chunk_digests': []}
+        with open(partial_path, 'wb'):
+            pass
+    else:
+        offset = _get_verified_offset(partial_path, journal)
+        log.info(f'Resuming copy at {offset} of {journal["size"]} bytes: {dest_path}')
+    chunk_size = journal['chunk_size']
+    total_size = journal['size']
+    start_offset = offset
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(src_path, 'rb', buffering = 0) as src, open(partial_path, 'r+b', buffering = 0) as dest:
+        src.seek(offset)
+        dest.seek(offset)
+        dest.truncate()
+        uncommitted = 0
+        committed_time = time.monotonic()
+        try:
+            while offset < total_size:
+                if checkpoint is not None:
+                    checkpoint()
+                size = src.readinto(buffer)
+                if not size:
+                    raise OSError(f'Source file is shorter than expected: {src_path}')
+                dest.write(view[:size])
+                journal['chunk_digests'].append(_hash_chunk(view[:size]))
+                offset += size
+                uncommitted += 1
+                if uncommitted >= JOURNAL_CHUNKS or time.monotonic() - committed_time >= JOURNAL_INTERVAL:
+                    _commit_journal(dest, journal_path, journal)
+                    uncommitted = 0
+                    committed_time = time.monotonic()
+                if on_progress is not None:
+                    on_progress(offset, total_size)
+        except BaseException:
+            # interrupted, e.g. cancelled, keep the chunks written since the last checkpoint for the resume
+            if uncommitted:
+                _commit_journal(dest, journal_path, journal)
+            raise
+        os.fsync(dest.fileno())
+
+    shutil.copystat(src_path, partial_path)
+    _replace_file(partial_path, dest_path)
+    # a short copy completes before its first checkpoint
+    journal_path.unlink(missing_ok = True)
+    return offset - start_offset
@@ -0,0 +1,242 @@
+import bisect
+import collections
+import itertools
+import re
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from . import memory
+from . import constants as const
+
+_NATURAL_DIGITS = re.compile(r'\d+')
+_ANIM_CODE = re.compile(rf'{const.Pattern.ANIM}$')
+
+
+def natural_sort_key(text: str) -> str:
+    """
+    Returns a natural sort key for the given text.
+
+    Every digit run is zero padded so plain string comparison orders 'chr2' before 'chr10'.
+    The key is a string on purpose, it can be stored in an item data role and compared
+    by Qt without calling back into Python.
+
+    :param text: The text to create the key from
+    :return: The natural sort key
+    """
+    return _NATURAL_DIGITS.sub(lambda m: m.group(0).zfill(10), text.lower())
+
+
+def get_anim_code(file_name: str) -> str:
+    """
+    Returns the animation code of an animation file name, e.g. 'bt01' for 'chr001_bt01.anim'.
+
+    :param file_name: The animation file name
+    :return: The animation code without the leading underscore, or an empty string if there is none
+    """
+    found = _ANIM_CODE.search(file_name)
+    if found is None:
+        return ''
+    return found.group(1).lstrip('_')
+
+
+def get_asset_search_terms(asset_name: str, asset_groups: Dict) -> Tuple[str, ...]:
+    """
+    Collects the searchable terms of an asset: its name, group names, file names and animation codes.
+
+    :param asset_name: The name of the asset
+    :param asset_groups: A dictionary where the keys are the asset group names and the values are lists of asset file names
+    :return: A tuple of lowercase terms
+    """
+    terms = {asset_name.lower()}
+    for group_name, file_list in asset_groups.items():
+        terms.add(group_name.lower())
+        for file_name in file_list:
+            terms.add(file_name.lower())
+            anim_code = get_anim_code(file_name)
+            if anim_code:
+                terms.add(anim_code.lower())
+    return tuple(terms)
+
+
+class AssetSearchIndex:
+    """
+    Prefix and trigram index over asset names, group contents and animation codes.
+
+    Queries shorter than a trigram are prefix matches on the asset names, answered by bisecting
+    the sorted names. Longer queries intersect the posting sets of their trigrams and only
+    verify the remaining candidates as substrings of the asset terms. A query which extends
+    the previous one is answered from the previous result, and recent results are cached
+    until the index changes, so deleting characters costs nothing.
+    """
+    GRAM_SIZE = 3
+    CACHE_SIZE = 32
+
+    def __init__(self):
+        self._grams: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._text: Dict[str, str] = {}
+        self._sort_keys: Dict[str, str] = {}
+        self._sorted_names: List[Tuple[str, str]] = []
+        self._sorted_dirty = False
+        self._last_query = ''
+        self._last_result: Union[Set[str], None] = None
+        self._cache: Dict[str, Set[str]] = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, asset_name: str):
+        return asset_name in self._terms
+
+    @property
+    def asset_names(self) -> Set[str]: return set(self._terms)
+
+    def _get_grams(self, terms: Iterable[str]) -> Set[str]:
+        size = self.GRAM_SIZE
+        return {term[i:i + size] for term in terms for i in range(len(term) - size + 1)}
+
+    def _mark_changed(self):
+        self._sorted_dirty = True
+        self._last_result = None
+        self._cache.clear()
+
+    def add_asset(self, asset_name: str, asset_groups: Dict):
+        """
+        Add or replace an asset in the index.
+
+        :param asset_name: The name of the asset
+        :param asset_groups: A dictionary where the keys are the asset group names and the values are lists of asset file names
+        """
+        if asset_name in self._terms:
+            self.remove_asset(asset_name)
+
+        terms = get_asset_search_terms(asset_name, asset_groups)
+        grams = self._grams
+        for gram in self._get_grams(terms):
+            grams[gram].add(asset_name)
+
+        self._terms[asset_name] = terms
+        self._text[asset_name] = '\n'.join(terms)
+        self._sort_keys[asset_name] = natural_sort_key(asset_name)
+        self._mark_changed()
+
+    def remove_asset(self, asset_name: str):
+        """
+        Remove an asset from the index. Unknown asset names are ignored.
+
+        :param asset_name: The name of the asset
+        """
+        terms = self._terms.pop(asset_name, None)
+        if terms is None:
+            return
+        for gram in self._get_grams(terms):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(asset_name)
+                if not postings:
+                    del self._grams[gram]
+        del self._text[asset_name]
+        del self._sort_keys[asset_name]
+        self._mark_changed()
+
+    def clear(self):
+        self._grams.clear()
+        self._terms.clear()
+        self._text.clear()
+        self._sort_keys.clear()
+        self._sorted_names = []
+        self._mark_changed()
+
+    def get_memory_size(self) -> int:
+        """
+        Estimates the memory used by the index, see `memory.get_container_size`.
+
+        :return: The estimated size in bytes
+        """
+        return sum(
+            memory.get_container_size(o, depth = 2)
+            for o in (self._grams, self._terms, self._text, self._sort_keys, self._sorted_names)
+        )
+
+    def sort_key(self, asset_name: str) -> str:
+        """
+        Returns the precomputed natural sort key of an asset.
+
+        :param asset_name: The name of the asset
+        :return: The natural sort key
+        """
+        return self._sort_keys[asset_name]
+
+    def matches(self, asset_name: str, query: str) -> bool:
+        """
+        Check a single asset against a query without touching the rest of the index.
+
+        :param asset_name: The name of the asset
+        :param query: The search text
+        :return: True if the asset matches the query, False otherwise
+        """
+        query = query.strip().lower()
+        if not query:
+            return True
+        if len(query) < self.GRAM_SIZE:
+            return asset_name.lower().startswith(query)
+        text = self._text.get(asset_name)
+        return text is not None and query in text
+
+    def prepare(self):
+        """
+        Sort the asset names for prefix queries ahead of time, instead of on the first short query.
+        """
+        if self._sorted_dirty:
+            self._sorted_names = sorted((o.lower(), o) for o in self._terms)
+            self._sorted_dirty = False
+
+    def _search_prefix(self, prefix: str) -> Set[str]:
+        self.prepare()
+        start = bisect.bisect_left(self._sorted_names, (prefix,))
+        end = bisect.bisect_left(self._sorted_names, (prefix + '\uffff',))
+        return {o for _, o in self._sorted_names[start:end]}
+
+    def search(self, query: str) -> Set[str]:
+        """
+        Find all assets matching the query.
+
+        Queries shorter than three characters match the start of the asset name,
+        longer queries match a substring of the asset name, file names or animation codes.
+
+        :param query: The search text, matched case-insensitively
+        :return: A set of matching asset names, every asset if the query is empty
+        """
+        query = query.strip().lower()
+        if not query:
+            return set(self._terms)
+        cached = self._cache.get(query)
+        if cached is not None:
+            self._cache.move_to_end(query)
+            return cached
+        if len(query) < self.GRAM_SIZE:
+            return self._cache_result(query, self._search_prefix(query))
+
+        if self._last_result is not None and self._last_query in query:
+            candidates = self._last_result
+        else:
+            postings = sorted((self._grams.get(gram, set()) for gram in self._get_grams((query,))), key = len)
+            candidates = postings[0].intersection(*postings[1:])
+
+        if len(query) == self.GRAM_SIZE and candidates is not self._last_result:
+            # every trigram of every term is indexed, so the posting set is already exact
+            result = candidates
+        else:
+            # keep the verification loop in C, it is the hot path for broad queries
+            names = list(candidates)
+            texts = map(self._text.__getitem__, names)
+            result = set(itertools.compress(names, map(str.__contains__, texts, itertools.repeat(query))))
+
+        self._last_query = query
+        self._last_result = result
+        return self._cache_result(query, result)
+
+    def _cache_result(self, query: str, result: Set[str]) -> Set[str]:
+        self._cache[query] = result
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last = False)
+        return result
@@ -0,0 +1,392 @@
+"""
+Optional long-lived catalog service, it keeps the scan indexes, asset catalogs and digest cache of a process warm.
+
+The service listens on a Unix domain socket, requests and responses are JSON objects, one per line:
+
+    {"op": "query", "args": {"dir_path": "...", "prefix": "chr"}}
+    {"ok": true, "result": [...]}
+
+Start it with `python -m DigiSModEditor serve`, the command line tools and the GUI use it while it is running.
+"""
+import collections
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Union, Dict, List, Tuple, Callable
+
+from . import core
+from . import catalog
+from . import layers
+from . import digest
+from . import diff
+from . import utils as utl
+from . import errors as err
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'CatalogService',
+    'ServiceClient',
+    'connect',
+    'get_socket_path',
+    'is_supported',
+]
+
+# set to a socket path to run and reach the service somewhere else than the application directory
+SOCKET_ENV_VAR = 'DIGIS_SERVICE_SOCKET'
+SOCKET_FILE_NAME = 'service.sock'
+PROTOCOL_VERSION = 1
+DEFAULT_TIMEOUT = 600.0
+CONNECT_TIMEOUT = 0.5
+
+
+def is_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+
+def get_socket_path() -> Path:
+    """
+    Returns the socket path of the service, from the `SOCKET_ENV_VAR` environment variable or in the application directory.
+
+    :return: The socket path
+    """
+    socket_path = os.environ.get(SOCKET_ENV_VAR)
+    if socket_path:
+        return Path(socket_path)
+    return utl.get_app_dir() / SOCKET_FILE_NAME
+
+
+def _to_json(value):
+    # the namedtuples of the results are sent as objects, the paths as strings
+    if hasattr(value, '_asdict'):
+        return {k: _to_json(v) for k, v in value._asdict().items()}
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_to_json(o) for o in value]
+    if isinstance(value, PathLike):
+        return os.fspath(value)
+    return value
+
+
+def _optional_path(value: Union[str, None]) -> Union[Path, None]:
+    return Path(value) if value is not None else None
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = {'ok': True, 'result': self.server.service.handle(request.get('op'), request.get('args', {}))}
+            except err.BaseDigiSException as e:
+                response = {'ok': False, 'type': type(e).__name__, 'error': str(e)}
+            except Exception as e:
+                log.exception(f'Catalog service request failed: {line[:200]!r}')
+                response = {'ok': False, 'type': type(e).__name__, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: 'CatalogService'):
+        self.service = service
+        super().__init__(socket_path, _RequestHandler)
+
+
+class CatalogService:
+    """
+    Serves the scan, query, diff, transfer and pack requests of the clients from warm caches.
+
+    Every directory is scanned once and kept with the mtime stamp of its directories, see `layers.LayeredIndex`,
+    so a request only walks a directory again after a file was added or removed in it.
+    """
+    def __init__(
+            self,
+            socket_path: Union[PathLike, Path, None] = None,
+            cache: Union[digest.DigestCache, None] = None
+    ):
+        """
+        :param socket_path: The path of the Unix domain socket, see `get_socket_path` by default
+        :param cache: The digest cache of the diff and pack requests, the application digest cache by default
+        :raises err.ServiceError: If the platform has no Unix domain sockets
+        """
+        if not is_supported():
+            raise err.ServiceError('The catalog service needs Unix domain sockets, which this platform does not have')
+        self._socket_path = Path(socket_path) if socket_path is not None else get_socket_path()
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._scans: Dict[Path, layers.LayerScan] = {}
+        # incremented by `invalidate`, a scan started before is not published
+        self._generation = 0
+        # directory to the scan the catalog was built from, and the catalog
+        self._catalogs: Dict[Path, Tuple[layers.LayerScan, catalog.AssetCatalog]] = {}
+        self._counter = collections.Counter()
+        self._started = time.time()
+        self._server: Union[_UnixServer, None] = None
+        self._ops: Dict[str, Callable] = {
+            'ping': self.ping,
+            'index': self.get_index,
+            'query': self.query,
+            'diff': self.diff,
+            'transfer': self.transfer,
+            'pack': self.pack,
+            'invalidate': self.invalidate,
+            'shutdown': self.shutdown,
+        }
+
+    @property
+    def socket_path(self) -> Path: return self._socket_path
+
+    def handle(self, op: str, args: Dict):
+        """
+        Runs a request.
+
+        :param op: The name of the operation, e.g. 'query'
+        :param args: The keyword arguments of the operation
+        :return: The result of the operation, JSON serializable
+        :raises err.ServiceError: If the operation is unknown
+        """
+        func = self._ops.get(op)
+        if func is None:
+            raise err.ServiceError(f'Unknown catalog service operation: {op}')
+        self._counter[op] += 1
+        return _to_json(func(**args))
+
+    def _get_scan(self, dir_path: Path) -> Tuple[layers.LayerScan, List[str], str]:
+        # the walk runs outside the lock, the requests on other directories don't wait for it
+        with self._lock:
+            generation = self._generation
+            scans = {dir_path: self._scans[dir_path]} if dir_path in self._scans else {}
+        name_list, files_text = layers.LayeredIndex([dir_path], scans).scan()
+        scan = scans[dir_path]
+        with self._lock:
+            current = self._scans.get(dir_path)
+            if current is not None and current.stamp == scan.stamp:
+                # an unchanged directory, or walked meanwhile by another request, keep the scan its catalog is built from
+                scan = current
+            elif generation == self._generation:
+                self._scans[dir_path] = scan
+        return scan, name_list, files_text
+
+    def ping(self) -> Dict:
+        return {
+            'version': PROTOCOL_VERSION,
+            'pid': os.getpid(),
+            'uptime': time.time() - self._started,
+            'directories': len(self._scans),
+            'requests': dict(self._counter),
+        }
+
+    def get_index(self, dir_path: str) -> Tuple[List[str], str]:
+        """
+        Returns the scan index of a directory, the same tuple as `core.walk_asset_files`.
+
+        :param dir_path: The DSDB directory or 'modfiles' directory of a project mods
+        :return: The '*.name' file names and a text of all file names separated by ';'
+        """
+        _, name_list, files_text = self._get_scan(Path(dir_path))
+        return name_list, files_text
+
+    def get_catalog(self, dir_path: Union[PathLike, Path]) -> catalog.AssetCatalog:
+        dir_path = Path(dir_path)
+        scan, name_list, files_text = self._get_scan(dir_path)
+        with self._lock:
+            cached = self._catalogs.get(dir_path)
+            if cached is not None and cached[0] is scan:
+                return cached[1]
+        # the sizes are indexed once, every later query is answered from memory
+        asset_catalog = catalog.create_catalog_from_index(dir_path, name_list, files_text, with_sizes = True)
+        with self._lock:
+            self._catalogs[dir_path] = (scan, asset_catalog)
+        return asset_catalog
+
+    def query(self, dir_path: str, **criteria) -> List[Dict]:
+        """
+        Queries the catalog of a directory, see `catalog.AssetCatalog.query`.
+
+        :param dir_path: The DSDB directory or 'modfiles' directory of a project mods
+        :param criteria: The criteria of `catalog.AssetCatalog.query`
+        :return: The matching entries, see `catalog.AssetEntry.to_dict`
+        """
+        return [o.to_dict() for o in self.get_catalog(dir_path).query(**criteria)]
+
+    def diff(self, project_dir: str, dsdb_dir: str) -> List[diff.FileDiff]:
+        return core.diff_project_mods(Path(project_dir), Path(dsdb_dir), self._cache)
+
+    def transfer(self, src_dir: str, dest_dir: str, file_names: List[str]) -> List[core.CopyResult]:
+        """
+        Copies asset files, see `core.copy_asset_file`.
+
+        :param src_dir: The source directory
+        :param dest_dir: The destination directory
+        :param file_names: The names of the files to copy
+        :return: A `core.CopyResult` per file
+        """
+        results = [core.copy_asset_file(Path(src_dir), Path(dest_dir), o) for o in file_names]
+        self.invalidate(dest_dir)
+        return results
+
+    def pack(
+            self,
+            project_dir: str,
+            dest_dir: str,
+            zip_file_name: str,
+            dsdb_dir: Union[str, None] = None
+    ) -> core.PackResult:
+        return core.pack_project_mods(
+            Path(project_dir), Path(dest_dir), zip_file_name, _optional_path(dsdb_dir), self._cache
+        )
+
+    def invalidate(self, dir_path: Union[str, None] = None):
+        """
+        Drops the cached scan and catalog of a directory, or of every directory.
+
+        :param dir_path: The directory, or None for every directory
+        """
+        with self._lock:
+            self._generation += 1
+            if dir_path is None:
+                self._scans.clear()
+                self._catalogs.clear()
+            else:
+                self._scans.pop(Path(dir_path), None)
+                self._catalogs.pop(Path(dir_path), None)
+
+    def shutdown(self):
+        if self._server is not None:
+            # shutdown waits for serve_forever, which waits for this request
+            threading.Thread(target = self._server.shutdown, daemon = True).start()
+
+    def serve_forever(self):
+        """
+        Listens on the socket until a 'shutdown' request, or KeyboardInterrupt.
+
+        :raises err.ServiceError: If another service is already listening on the socket
+        """
+        if self._socket_path.exists():
+            if connect(self._socket_path) is not None:
+                raise err.ServiceError(f'The catalog service is already running: {self._socket_path}')
+            # left over by a service which did not stop cleanly
+            self._socket_path.unlink()
+
+        self._server = _UnixServer(os.fspath(self._socket_path), self)
+        os.chmod(self._socket_path, 0o600)
+        log.info(f'Catalog service listening: {self._socket_path}')
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+            self._socket_path.unlink(missing_ok = True)
+            log.info(f'Catalog service stopped: {self._socket_path}')
+
+
+class ServiceClient:
+    """Thin client of the `CatalogService`, every request opens its own connection so it can be shared between threads."""
+    def __init__(self, socket_path: Union[PathLike, Path, None] = None, timeout: float = DEFAULT_TIMEOUT):
+        self._socket_path = Path(socket_path) if socket_path is not None else get_socket_path()
+        self._timeout = timeout
+
+    @property
+    def socket_path(self) -> Path: return self._socket_path
+
+    def request(self, op: str, timeout: Union[float, None] = None, **args):
+        """
+        Sends a request to the service and waits for its result.
+
+        :param op: The name of the operation, e.g. 'query'
+        :param timeout: The timeout in seconds, the timeout of the client by default
+        :param args: The keyword arguments of the operation
+        :return: The result of the operation, decoded from JSON
+        :raises err.ServiceError: If the service cannot be reached or the request fails
+        """
+        payload = json.dumps({'op': op, 'args': _to_json(args)}).encode() + b'\n'
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout or self._timeout)
+                sock.connect(os.fspath(self._socket_path))
+                sock.sendall(payload)
+                with sock.makefile('rb') as f:
+                    line = f.readline()
+        except OSError as e:
+            raise err.ServiceError(f'Cannot reach the catalog service: {self._socket_path}, {e}')
+        if not line:
+            raise err.ServiceError(f'The catalog service closed the connection: {self._socket_path}')
+
+        response = json.loads(line)
+        if not response['ok']:
+            raise err.ServiceError(f'{response["type"]}: {response["error"]}')
+        return response['result']
+
+    def ping(self, timeout: Union[float, None] = None) -> Dict:
+        return self.request('ping', timeout)
+
+    def get_index(self, dir_path: Union[PathLike, Path]) -> Tuple[List[str], str]:
+        name_list, files_text = self.request('index', dir_path = dir_path)
+        return name_list, files_text
+
+    def query(self, dir_path: Union[PathLike, Path], **criteria) -> List[Dict]:
+        return self.request('query', dir_path = dir_path, **criteria)
+
+    def diff(self, project_dir: Union[PathLike, Path], dsdb_dir: Union[PathLike, Path]) -> List[diff.FileDiff]:
+        return [
+            diff.FileDiff(
+                o['relative_path'], const.DiffStatus(o['status']), Path(o['mods_file']),
+                _optional_path(o['source_file']), o['size']
+            )
+            for o in self.request('diff', project_dir = project_dir, dsdb_dir = dsdb_dir)
+        ]
+
+    def transfer(self, src_dir: Union[PathLike, Path], dest_dir: Union[PathLike, Path], file_names: List[str]) -> List[core.CopyResult]:
+        return [
+            core.CopyResult(o['success'], Path(o['source']), Path(o['destination']), o['message'])
+            for o in self.request('transfer', src_dir = src_dir, dest_dir = dest_dir, file_names = file_names)
+        ]
+
+    def pack(
+            self,
+            project_dir: Union[PathLike, Path],
+            dest_dir: Union[PathLike, Path],
+            zip_file_name: str,
+            dsdb_dir: Union[PathLike, Path, None] = None
+    ) -> core.PackResult:
+        o = self.request('pack', project_dir = project_dir, dest_dir = dest_dir, zip_file_name = zip_file_name, dsdb_dir = dsdb_dir)
+        return core.PackResult(Path(o['zip_file']), o['packed_files'], o['skipped_files'], o['bytes_saved'])
+
+    def invalidate(self, dir_path: Union[PathLike, Path, None] = None):
+        self.request('invalidate', dir_path = dir_path)
+
+    def shutdown(self):
+        self.request('shutdown')
+
+
+def connect(socket_path: Union[PathLike, Path, None] = None) -> Union[ServiceClient, None]:
+    """
+    Attaches to the catalog service if it is running.
+
+    :param socket_path: The socket path, see `get_socket_path`
+    :return: A client of the running service, or None if there is no service
+    """
+    if not is_supported():
+        return None
+    client = ServiceClient(socket_path)
+    if not client.socket_path.exists():
+        return None
+    try:
+        client.ping(CONNECT_TIMEOUT)
+    except err.ServiceError as e:
+        log.debug(f'No catalog service: {e}')
+        return None
+    return client
@@ -0,0 +1,189 @@
+import logging
+import os
+import shutil
+import stat
+import sys
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import Union
+
+from . import digest
+from . import utils as utl
+from . import constants as const
+
+log = logging.getLogger(const.LogName.MAIN)
+
+__all__ = [
+    'SharedAssetStore',
+    'detach_file',
+    'remove_file',
+]
+
+# Linux ioctl to clone a file range, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# the objects are read only, so are the mods files hard linked to them
+OBJECT_MODE = 0o444
+
+
+def _reflink(src_path: Path, dest_path: Path) -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if dest_path.exists():
+            os.remove(dest_path)
+        return False
+    return True
+
+
+def _hard_link(src_path: Path, dest_path: Path) -> bool:
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        return False
+    return True
+
+
+def remove_file(file_path: Union[PathLike, Path]):
+    """
+    Removes a file which may be read only, e.g. a mods file hard linked to a store object.
+
+    :param file_path: The file to remove
+    """
+    # Windows refuses to remove a read only file
+    os.chmod(file_path, stat.S_IWRITE | stat.S_IREAD)
+    os.remove(file_path)
+
+
+def detach_file(file_path: Union[PathLike, Path]) -> bool:
+    """
+    Breaks a hard linked file out into a private copy, so it can be modified without
+    changing the other links, e.g. the shared store object and the other mods.
+
+    :param file_path: The file to detach
+    :return: True if the file was hard linked and has been detached, False if it was already private
+    """
+    file_path = Path(file_path)
+    if os.stat(file_path).st_nlink < 2:
+        return False
+    temp_path = file_path.with_name(f'{file_path.name}.{uuid.uuid4().hex}.tmp')
+    shutil.copy2(file_path, temp_path)
+    # the private copy is for editing, unlike the read only store object it was linked to
+    os.chmod(temp_path, stat.S_IMODE(os.stat(temp_path).st_mode) | stat.S_IWUSR)
+    os.replace(temp_path, file_path)
+    log.debug(f'Detached shared file: {file_path}')
+    return True
+
+
+class SharedAssetStore:
+    """
+    Content-addressed store of unmodified asset files, shared by every project mods.
+
+    A file is stored once under its content digest, and placed into the mods with a reflink where the
+    file system supports it, with a hard link otherwise, and with a plain copy as the last resort
+    (e.g. across drives). Hard linked files must be detached with `detach_file` before they are modified.
+
+    A hard link shares the object itself, an in-place edit of the mods file by an external tool would
+    rewrite the object and every other mods linked to it. The objects are made read only to refuse such
+    edits, and an object whose content no longer matches its digest is quarantined instead of reused.
+    """
+    def __init__(self, store_dir: Union[PathLike, Path, None] = None, cache: Union[digest.DigestCache, None] = None):
+        self._store_dir = Path(store_dir) if store_dir is not None else utl.get_app_dir() / 'SharedStore'
+        self._objects_dir = self._store_dir / 'objects'
+        self._objects_dir.mkdir(parents = True, exist_ok = True)
+        self._cache = cache
+
+    @property
+    def store_dir(self) -> Path: return self._store_dir
+
+    def _get_cache(self) -> digest.DigestCache:
+        return self._cache if self._cache is not None else digest.get_digest_cache()
+
+    def get_object_path(self, file_digest: str) -> Path:
+        """
+        Returns the path of a stored object.
+
+        :param file_digest: The content digest of the object
+        :return: The object path, which may not exist yet
+        """
+        return self._objects_dir / file_digest[:2] / file_digest
+
+    def add_file(self, file_path: Union[PathLike, Path]) -> str:
+        """
+        Add a file to the store, unless a file with the same content is already stored.
+
+        :param file_path: The file to add
+        :return: The content digest of the file
+        """
+        file_digest = self._get_cache().get_digest(file_path)
+        object_path = self.get_object_path(file_digest)
+        if object_path.exists() and not self._verify_object(object_path, file_digest):
+            self._quarantine_object(object_path)
+        if not object_path.exists():
+            object_path.parent.mkdir(exist_ok = True)
+            temp_path = object_path.with_name(f'{file_digest}.{uuid.uuid4().hex}.tmp')
+            # never hard link the source itself, an in-place update of it would change every mods
+            if not _reflink(Path(file_path), temp_path):
+                shutil.copyfile(file_path, temp_path)
+            os.chmod(temp_path, OBJECT_MODE)
+            os.replace(temp_path, object_path)
+            log.debug(f'Stored shared object {file_digest}: {file_path}')
+        return file_digest
+
+    def _verify_object(self, object_path: Path, file_digest: str) -> bool:
+        # the digest cache is keyed by size and mtime, an untouched object is not read again
+        try:
+            return self._get_cache().get_digest(object_path) == file_digest
+        except OSError:
+            return False
+
+    def _quarantine_object(self, object_path: Path):
+        quarantine_dir = self._store_dir / 'quarantine'
+        quarantine_dir.mkdir(exist_ok = True)
+        quarantine_path = quarantine_dir / f'{object_path.name}.{uuid.uuid4().hex}'
+        os.replace(object_path, quarantine_path)
+        log.warning(f'Shared object was modified in place, moved to quarantine: {quarantine_path}')
+
+    def link_file(self, src_path: Union[PathLike, Path], dest_path: Union[PathLike, Path]) -> bool:
+        """
+        Place the stored copy of a source file at the destination path.
+
+        The destination must not exist, the caller decides what happens to an existing file.
+        A hard linked destination is read only like its object, see `detach_file` to edit it. The mods files
+        which were linked to a quarantined object keep its modified content, only new placements are fixed.
+
+        :param src_path: The source file, e.g. a DSDB file
+        :param dest_path: The destination file, e.g. a file in the 'modfiles' directory of a mods
+        :return: True if the file has been placed, False otherwise
+        """
+        dest_path = Path(dest_path)
+        try:
+            object_path = self.get_object_path(self.add_file(src_path))
+            if _reflink(object_path, dest_path) or _hard_link(object_path, dest_path):
+                return True
+            shutil.copyfile(object_path, dest_path)
+        except OSError as e:
+            log.error(f'Cannot place shared file {src_path} at {dest_path}: {e}')
+            return False
+        return True
+
+    def prune(self) -> int:
+        """
+        Remove the stored objects which are not hard linked from any mods anymore.
+
+        Objects placed with a reflink or a copy don't share their inode, they are removed as well.
+
+        :return: The number of bytes freed
+        """
+        freed = 0
+        for object_path in self._objects_dir.glob('*/*'):
+            object_stat = object_path.stat()
+            if object_stat.st_nlink < 2:
+                remove_file(object_path)
+                freed += object_stat.st_size
+        log.info(f'Pruned shared store, {freed} bytes freed: {self._store_dir}')
+        return freed
@@ -1,67 +1,765 @@
+import collections
+import contextlib
+import itertools
 import os
 import logging
+import sys
+import threading
 import time
+import traceback
+from pathlib import Path
+from typing import Union, Dict, List, Tuple, Callable, FrozenSet
 
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
 
 from . import core
+from . import batch
+from . import catalog
+from . import archive
+from . import references
+from . import store as shared_store
+from . import errors as err
+from . import decorators as deco
+from . import utils as utl
+from . import layers
+from . import service
 from . import constants as const
 
 log = logging.getLogger(const.LogName.THREAD)
 
+# the ids of the scan snapshots, a model applies a `core.ScanDelta` only on top of the snapshot it was computed from
+_snapshot_ids = itertools.count(1)
+
 
 class ScannerThread(QThread):
     scan_finished = Signal()
-    asset_file_found = Signal(dict)
+    files_indexed = Signal(str, str)
+    # a `core.ScanDelta` of every record of the scan and its difference with the previous scan,
+    # see `AsukaModel.apply_delta`, sent as a Python object, not converted to a QVariantList
+    assets_scanned = Signal(object)
     data_file_found = Signal(dict)
 
-    def __init__(self, dir_path):
+    def __init__(self, dir_path, layered_index: Union[layers.LayeredIndex, None] = None):
         super().__init__()
         self._dir_path = dir_path
+        self._layers = layered_index
+        self._service: Union[service.ServiceClient, None] = None
         self._last_scan_time = 0
         self._stop = False
+        self._seed_index = None
+        self._job = None
+        # the records of the last scan by asset name, the next scan is compared with them
+        self._snapshot: Dict[str, core.AssetRecord] = {}
+        self._snapshot_id = None
 
     @property
     def dir_path(self): return self._dir_path
 
+    @property
+    def layered_index(self) -> Union[layers.LayeredIndex, None]: return self._layers
+
     @property
     def last_scan_time(self) -> float: return self._last_scan_time
 
     def stop(self):
         self._stop = True
+        if self._job is not None:
+            get_io_scheduler().cancel(self._job)
 
-    def run(self):
+    def mark_scanned(self):
+        """
+        Record a scan done on behalf of this scanner, e.g. by the `ProjectModsScannerThread`.
+        """
         self._last_scan_time = time.time()
 
-        name_list = []
-        files_text = ''
+    def set_service(self, client: Union[service.ServiceClient, None]):
+        """
+        Get the scan index from the catalog service, which keeps it warm, instead of walking the directory.
+
+        :param client: A client of the running service, see `service.connect`, or None to walk the directory
+        """
+        self._service = client
+
+    def seed_index(self, name_list, files_text):
+        """
+        Use an already known scan index for the next scan instead of walking the directory,
+        e.g. the index read from the central directory of an imported mods archive.
+
+        :param name_list: The '*.name' file names
+        :param files_text: A text of all file names separated by ';'
+        """
+        self._seed_index = (name_list, files_text)
 
+    def run(self):
+        self._last_scan_time = time.time()
+        self._stop = False
+        scheduler = get_io_scheduler()
+        try:
+            with deco.span('ScannerThread.run'), \
+                    scheduler.job(f'Scan {self.dir_path}', const.IoJobClass.BACKGROUND, self.dir_path) as self._job:
+                self._scan(scheduler)
+        except err.IoJobCancelled:
+            log.info('Stop scanning')
+        finally:
+            self._job = None
+
+    def _scan(self, scheduler: 'IoScheduler'):
         log.info(f'Prepare for scanning: {self.dir_path}')
-        for root, dirs, files in os.walk(self.dir_path):
-            if files:
-                name_list.extend([o for o in files if o.endswith('.name')])
-                temp_text = ';'.join(files)
-                if files_text:
-                    files_text += f';{temp_text}'
-                else:
-                    files_text += f'{temp_text}'
+        changed = frozenset()
+        if self._seed_index is not None:
+            name_list, files_text = self._seed_index
+            self._seed_index = None
+        elif self._layers is not None:
+            name_list, files_text, changed = self._scan_layers(scheduler)
+        else:
+            name_list, files_text = self._get_index(scheduler)
+        self.files_indexed.emit(str(self.dir_path), files_text)
 
+        # the whole snapshot and its difference with the previous one are built here, the GUI thread only applies it
         log.info(f'Start scanning {len(name_list)} asset files: {self.dir_path}')
+        found_log = utl.RateLimitedLog(log)
+        asset_records = []
         for name in name_list:
             if self._stop:
                 log.info('Stop scanning')
-                break
+                return
+            scheduler.checkpoint()
             # if not name.startswith('chr'):
             #     continue
 
-            asset_files = core.get_asset_related_files(name, files_text)
-            if asset_files:
-                ast_file_path = os.path.join(self.dir_path, name)
-                log.info(f'Found asset file: {ast_file_path}')
+            asset_record = core.get_asset_record(name, files_text)
+            if asset_record:
+                found_log.info('Found asset file: %s', os.path.join(self.dir_path, name))
+                asset_records.append(asset_record)
+                deco.trace_add(items = 1)
+
+        log.info(f'Found {len(asset_records)} asset files: {self.dir_path}')
+        updated, removed = core.get_scan_delta(self._snapshot, asset_records, changed)
+        delta = core.ScanDelta(asset_records, updated, removed, self._snapshot_id, next(_snapshot_ids))
+        self._snapshot = {o.stem: o for o in asset_records}
+        self._snapshot_id = delta.snapshot_id
+        self.assets_scanned.emit(delta)
+        self.scan_finished.emit()
+
+    def _get_index(self, scheduler: 'IoScheduler') -> Tuple[List[str], str]:
+        if self._service is not None:
+            try:
+                return self._service.get_index(Path(self.dir_path).resolve())
+            except err.ServiceError as e:
+                log.warning(f'Scan without the catalog service: {e}')
+        return core.walk_asset_files(self.dir_path, scheduler.checkpoint)
+
+    def _scan_layers(self, scheduler: 'IoScheduler') -> Tuple[List[str], str, FrozenSet[str]]:
+        # only the changed layers are walked, the assets with a file moved to another layer must be rebuilt
+        old_winners = self._layers.winners
+        name_list, files_text = self._layers.scan(scheduler.checkpoint)
+        if not old_winners:
+            return name_list, files_text, frozenset()
+
+        changed = self._layers.get_changed_assets(old_winners)
+        log.info(f'Source layers changed {len(changed)} assets: {self.dir_path}')
+        return name_list, files_text, frozenset(changed)
+
+
+class ProjectModsScannerThread(QThread):
+    """Scans every project mods of a directory with a single walk, see `core.walk_project_mods_files`."""
+    mods_scanned = Signal(str, object, str)
+    scan_finished = Signal()
+
+    def __init__(self, dir_path):
+        super().__init__()
+        self._dir_path = dir_path
+        self._stop = False
+
+    @property
+    def dir_path(self): return self._dir_path
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        scheduler = get_io_scheduler()
+        try:
+            with deco.span('ProjectModsScannerThread.run'), \
+                    scheduler.job(f'Scan {self.dir_path}', const.IoJobClass.BACKGROUND, self.dir_path):
+                self._scan(scheduler)
+        except err.IoJobCancelled:
+            log.info('Stop scanning')
+
+    def _scan(self, scheduler: 'IoScheduler'):
+        log.info(f'Prepare for scanning all project mods: {self.dir_path}')
+        mods_index = core.walk_project_mods_files(self.dir_path, scheduler.checkpoint)
 
-                self.asset_file_found.emit(asset_files)
+        log.info(f'Start scanning {len(mods_index)} project mods: {self.dir_path}')
+        for mods_dir, (name_list, files_text) in mods_index.items():
+            if self._stop:
+                log.info('Stop scanning')
+                break
+            scheduler.checkpoint()
+            asset_records = [core.get_asset_record(o, files_text) for o in name_list]
+            log.info(f'Found {len(asset_records)} asset files: {mods_dir}')
+            self.mods_scanned.emit(str(mods_dir), asset_records, files_text)
+            deco.trace_add(items = len(asset_records))
 
         if not self._stop:
             self.scan_finished.emit()
 
 
+class BatchPackThread(QThread):
+    mods_packed = Signal(int, int, str)
+    batch_finished = Signal(str)
+
+    def __init__(self, project_dirs, dest_dir, dsdb_dir = None):
+        super().__init__()
+        self._project_dirs = list(project_dirs)
+        self._dest_dir = dest_dir
+        self._dsdb_dir = dsdb_dir
+
+    def _on_progress(self, done: int, total: int, result: batch.BatchPackResult):
+        self.mods_packed.emit(done, total, result.project_dir.name)
+
+    def run(self):
+        with get_io_scheduler().job('Pack all mods', const.IoJobClass.PACK, self._dest_dir):
+            results = batch.pack_many(self._project_dirs, self._dest_dir, self._dsdb_dir, on_progress = self._on_progress)
+        report_file = batch.write_batch_report(results, self._dest_dir / 'pack_report.json')
+        self.batch_finished.emit(str(report_file))
+
+
+class TransferThread(QThread):
+    """
+    Copies the files of the checked source assets into a project mods, out of the GUI thread.
+
+    The files are listed by the GUI before the transfer starts, see `MainWindow.copy_src_asset_to_mods`, the thread
+    never reads the models. `asset_transferred` is emitted once all the files of an asset are done, with the
+    relative paths of the transferred files, for the GUI to update the mods model and the conflict index.
+    """
+    asset_transferred = Signal(str, object)
+    copy_progress = Signal(int, int)
+    transfer_finished = Signal(int, int)
+
+    def __init__(
+            self,
+            name: str,
+            asset_files: List[Tuple[str, List[Path]]],
+            manifest: references.ReferenceManifest,
+            mods_archive: Union[archive.ModsArchive, None] = None,
+            reference: bool = False,
+            store: Union[shared_store.SharedAssetStore, None] = None
+    ):
+        """
+        :param name: The name of the project mods, shown to the user
+        :param asset_files: The asset names and the paths of their files
+        :param manifest: The reference manifest of the project mods, its 'modfiles' directory is the destination
+        :param mods_archive: The packed mods the files are extracted from, None to copy files from disk
+        :param reference: Whether to reference the files instead of copying them, see `core.reference_asset_file`
+        :param store: A shared asset store, if given the files are linked from the store instead of copied
+        """
+        super().__init__()
+        self._name = name
+        self._asset_files = asset_files
+        self._manifest = manifest
+        self._archive = mods_archive
+        self._reference = reference
+        self._store = store
+
+    def _transfer_file(self, file_path: Path) -> core.CopyResult:
+        file_name = file_path.name
+        # with source layers, the file may not be under the source path of the model
+        dest_dir = self._manifest.mods_dir.joinpath(*catalog.get_relative_file_path(file_name).parent.parts)
+        if self._archive is not None:
+            # packed mods files are decompressed one by one, only the checked assets
+            result = self._archive.extract_file(file_name, dest_dir)
+        elif self._reference:
+            return core.reference_asset_file(file_path.parent, dest_dir, file_name, self._manifest)
+        else:
+            result = core.copy_asset_file(
+                file_path.parent, dest_dir, file_name, store = self._store, on_progress = self.copy_progress.emit
+            )
+        self._manifest.remove(self._manifest.get_relative_path(dest_dir / file_name))
+        return result
+
+    def run(self):
+        copy_counter = collections.Counter()
+        scheduler = get_io_scheduler()
+        try:
+            # interactive transfers go first, background scans of the same disk pause meanwhile
+            with scheduler.job(f'Transfer to {self._name}', const.IoJobClass.INTERACTIVE, self._manifest.mods_dir):
+                for asset_name, file_paths in self._asset_files:
+                    transferred = []
+                    for file_path in file_paths:
+                        scheduler.checkpoint()
+                        result = self._transfer_file(file_path)
+                        copy_counter[result.success] += 1
+                        if result.success:
+                            log.debug(result.message)
+                            transferred.append(self._manifest.get_relative_path(result.destination))
+                        else:
+                            log.warning(result.message)
+                    self.asset_transferred.emit(asset_name, transferred)
+                self._manifest.save()
+        except err.IoJobCancelled:
+            log.info(f'Transfer cancelled: {self._name}')
+            self._manifest.save()
+        finally:
+            self.transfer_finished.emit(copy_counter[True], copy_counter[False])
+
+
+class PackThread(QThread):
+    """Packs a single project mods out of the GUI thread, see `core.pack_project_mods`."""
+    pack_finished = Signal(object)
+    pack_failed = Signal(str)
+
+    def __init__(self, project_dir: Path, dest_dir: Path, zip_file_name: str, dsdb_dir: Union[Path, None] = None):
+        super().__init__()
+        self._project_dir = project_dir
+        self._dest_dir = dest_dir
+        self._zip_file_name = zip_file_name
+        self._dsdb_dir = dsdb_dir
+
+    def run(self):
+        scheduler = get_io_scheduler()
+        try:
+            with scheduler.job(f'Pack {self._project_dir.name}', const.IoJobClass.PACK, self._dest_dir):
+                pack_result = core.pack_project_mods(
+                    self._project_dir,
+                    self._dest_dir,
+                    self._zip_file_name,
+                    self._dsdb_dir,
+                    checkpoint = scheduler.checkpoint
+                )
+        except (err.BaseDigiSException, OSError) as e:
+            log.error(f'Packing failed: {self._project_dir}, {e}')
+            self.pack_failed.emit(str(e))
+            return
+        self.pack_finished.emit(pack_result)
+
+
+def get_device_id(path) -> int:
+    """
+    Returns the id of the device a path lives on. The path may not exist yet, e.g. a copy destination.
+
+    :param path: The path of a file or directory
+    :return: The device id, the same for every path on the same disk
+    """
+    path = Path(path).absolute()
+    for o in (path, *path.parents):
+        try:
+            return os.stat(o).st_dev
+        except OSError:
+            continue
+    return 0
+
+
+IoJobInfo = collections.namedtuple(
+    'IoJobInfo',
+    (
+        'job_id',
+        'name',
+        'job_class',
+        'state',
+        'device'
+    )
+)
+
+
+class IoJob:
+    """A long-running job of the I/O scheduler, see `IoScheduler`."""
+    def __init__(self, job_id: int, name: str, job_class: const.IoJobClass, device: int):
+        self.job_id = job_id
+        self.name = name
+        self.job_class = job_class
+        self.device = device
+        self.state = const.IoJobState.QUEUED
+        self.result = None
+        self.error = None
+        self._cancelled = False
+        self._finished = threading.Event()
+
+    def __repr__(self):
+        return f'<IoJob {self.job_id} {self.name}: {self.job_class.name} {self.state}>'
+
+    @property
+    def cancelled(self) -> bool: return self._cancelled
+
+    @property
+    def is_foreground(self) -> bool: return self.job_class != const.IoJobClass.BACKGROUND
+
+    def info(self) -> IoJobInfo:
+        return IoJobInfo(self.job_id, self.name, self.job_class, self.state, self.device)
+
+    def wait(self, timeout: Union[float, None] = None) -> bool:
+        """
+        Wait for a submitted job to finish.
+
+        :param timeout: The maximum time to wait in seconds, or None to wait forever
+        :return: True if the job has finished, False on timeout
+        """
+        return self._finished.wait(timeout)
+
+
+class IoScheduler(QObject):
+    """
+    Coordinates the long-running disk jobs, scans, transfers and packing, so they don't fight over the same disk.
+
+    Every job has a class, interactive transfers first, then packing, then background scans, and runs once its
+    device has a free slot and no job of a higher class is waiting for that device. Background jobs never start
+    while a foreground job uses their device, and a running background job is paused at its next `checkpoint`
+    until the foreground I/O is over, or throttled if `throttle_delay` is set. A paused job doesn't hold its slot.
+
+    Jobs either run in the calling thread with the `job` context manager, e.g. inside a QThread, or in their own
+    thread with `submit`. `queue_changed` is emitted from any thread whenever the queue state changes, connect it
+    with a queued connection to update the UI from `get_state`.
+    """
+    queue_changed = Signal()
+
+    def __init__(self, device_limit: int = 2, device_limits: Union[Dict[int, int], None] = None, throttle_delay: float = 0.0):
+        super().__init__()
+        self._device_limit = device_limit
+        self._device_limits = dict(device_limits or {})
+        self._throttle_delay = throttle_delay
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._queue: List[IoJob] = []
+        self._active: List[IoJob] = []
+        self._running: Dict[int, int] = collections.defaultdict(int)
+        self._background_paused = False
+        self._local = threading.local()
+
+    @property
+    def throttle_delay(self) -> float: return self._throttle_delay
+
+    def set_throttle_delay(self, delay: float):
+        """
+        Sleep this long at every checkpoint of a background job, to leave the disk to the other applications.
+
+        :param delay: The delay in seconds, 0 to run background jobs at full speed
+        """
+        self._throttle_delay = delay
+
+    def set_device_limit(self, path, limit: int):
+        """
+        Limit the number of jobs running at once on the device of a path, e.g. 1 for a hard drive.
+
+        :param path: A path on the device
+        :param limit: The maximum number of running jobs
+        """
+        with self._condition:
+            self._device_limits[get_device_id(path)] = max(1, limit)
+            self._condition.notify_all()
+
+    def pause_background(self):
+        with self._condition:
+            self._background_paused = True
+        self.queue_changed.emit()
+
+    def resume_background(self):
+        with self._condition:
+            self._background_paused = False
+            self._condition.notify_all()
+        self.queue_changed.emit()
+
+    def get_state(self) -> List[IoJobInfo]:
+        """
+        Returns a snapshot of the queued, running and paused jobs, in priority order.
+
+        :return: A list of `IoJobInfo`
+        """
+        with self._condition:
+            return [o.info() for o in self._active + self._queue]
+
+    def current_job(self) -> Union[IoJob, None]:
+        """
+        Returns the job running in the calling thread.
+
+        :return: The job, or None if the calling thread doesn't run a job
+        """
+        return getattr(self._local, 'job', None)
+
+    def _has_foreground(self, device: int) -> bool:
+        return any(o.is_foreground and o.device == device for o in itertools.chain(self._active, self._queue))
+
+    def _can_run(self, job: IoJob) -> bool:
+        device = job.device
+        if self._running[device] >= self._device_limits.get(device, self._device_limit):
+            return False
+        if not job.is_foreground and (self._background_paused or self._has_foreground(device)):
+            return False
+        # the queue is in priority order, never overtake a waiting job of the same device
+        for o in self._queue:
+            if o is job:
+                return True
+            if o.device == device:
+                return False
+        return True
+
+    def _enqueue(self, name: str, job_class: const.IoJobClass, path) -> IoJob:
+        job = IoJob(next(self._ids), name, const.IoJobClass(job_class), get_device_id(path))
+        with self._condition:
+            self._queue.append(job)
+            self._queue.sort(key = lambda o: (o.job_class, o.job_id))
+            # background jobs may have to pause for a new foreground job
+            self._condition.notify_all()
+        self.queue_changed.emit()
+        return job
+
+    def _start(self, job: IoJob, timeout: Union[float, None] = None):
+        with self._condition:
+            started = self._condition.wait_for(lambda: job.cancelled or self._can_run(job), timeout)
+            self._queue.remove(job)
+            if not started:
+                job.state = const.IoJobState.CANCELLED
+                self._condition.notify_all()
+            elif job.cancelled:
+                job.state = const.IoJobState.CANCELLED
+                self._condition.notify_all()
+            else:
+                job.state = const.IoJobState.RUNNING
+                self._running[job.device] += 1
+                self._active.append(job)
+        self.queue_changed.emit()
+        if not started:
+            job._finished.set()
+            raise err.IoJobBusy(f'I/O job cannot start, the disk is busy: {job.name}')
+        if job.cancelled:
+            raise err.IoJobCancelled(f'I/O job cancelled: {job.name}')
+        log.debug('Start I/O job: %s', job)
+
+    def _finish(self, job: IoJob, state: const.IoJobState):
+        with self._condition:
+            if job.state == const.IoJobState.RUNNING:
+                self._running[job.device] -= 1
+            self._active.remove(job)
+            job.state = state
+            self._condition.notify_all()
+        job._finished.set()
+        self.queue_changed.emit()
+        log.debug('Finish I/O job: %s', job)
+
+    @contextlib.contextmanager
+    def job(self, name: str, job_class: const.IoJobClass, path, timeout: Union[float, None] = None):
+        """
+        Run a job in the calling thread. Blocks until the job is allowed to start, or until the timeout.
+
+        A timeout must leave the running background jobs of the device the time to pause at their next checkpoint.
+        The GUI thread never runs a job, it starts a worker thread instead, see `TransferThread`.
+
+        :param name: The name of the job, shown to the user
+        :param job_class: The class of the job, see `const.IoJobClass`
+        :param path: A path on the device the job reads or writes
+        :param timeout: The maximum time to wait for the job to start in seconds, or None to wait forever
+        :return: A context manager yielding the `IoJob`
+        :raises IoJobBusy: If the job cannot start before the timeout, it is removed from the queue
+        :raises IoJobCancelled: If the job is cancelled before it starts or at a checkpoint
+        """
+        job = self._enqueue(name, job_class, path)
+        self._start(job, timeout)
+        previous_job = self.current_job()
+        self._local.job = job
+        state = const.IoJobState.DONE
+        try:
+            yield job
+        except err.IoJobCancelled:
+            state = const.IoJobState.CANCELLED
+            raise
+        except BaseException:
+            state = const.IoJobState.FAILED
+            raise
+        finally:
+            self._local.job = previous_job
+            self._finish(job, state)
+
+    def submit(self, name: str, job_class: const.IoJobClass, path, func: Callable, *args, **kwargs) -> IoJob:
+        """
+        Run a job in its own thread once it is allowed to start.
+
+        :param name: The name of the job, shown to the user
+        :param job_class: The class of the job, see `const.IoJobClass`
+        :param path: A path on the device the job reads or writes
+        :param func: The function to run, its result is stored in `IoJob.result`
+        :return: The queued job
+        """
+        job = self._enqueue(name, job_class, path)
+
+        def _run():
+            try:
+                self._start(job)
+            except err.IoJobCancelled:
+                job._finished.set()
+                return
+            self._local.job = job
+            state = const.IoJobState.DONE
+            try:
+                job.result = func(*args, **kwargs)
+            except err.IoJobCancelled:
+                state = const.IoJobState.CANCELLED
+            except Exception as e:
+                log.error(f'I/O job failed: {job.name}, {e}')
+                job.error = e
+                state = const.IoJobState.FAILED
+            finally:
+                self._local.job = None
+                self._finish(job, state)
+
+        threading.Thread(target = _run, name = f'IoJob-{job.job_id}', daemon = True).start()
+        return job
+
+    def cancel(self, job: IoJob):
+        """
+        Cancel a job. A queued job never starts, a running job stops at its next checkpoint.
+
+        :param job: The job to cancel
+        """
+        with self._condition:
+            job._cancelled = True
+            self._condition.notify_all()
+
+    def checkpoint(self):
+        """
+        Called regularly by long-running jobs. Pauses a background job while foreground I/O uses its device,
+        throttles it otherwise, and stops a cancelled job. Does nothing outside of a job.
+
+        :raises IoJobCancelled: If the job of the calling thread has been cancelled
+        """
+        job = self.current_job()
+        if job is None:
+            return
+        if not job.is_foreground:
+            with self._condition:
+                paused = self._background_paused or self._has_foreground(job.device)
+                if paused:
+                    job.state = const.IoJobState.PAUSED
+                    self._running[job.device] -= 1
+                    self._condition.notify_all()
+            if paused:
+                # never emitted with the lock held, a direct connection may read the state
+                self.queue_changed.emit()
+                log.debug('Pause I/O job: %s', job)
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: job.cancelled or (
+                            not self._background_paused
+                            and not self._has_foreground(job.device)
+                            and self._running[job.device] < self._device_limits.get(job.device, self._device_limit)
+                        )
+                    )
+                    job.state = const.IoJobState.RUNNING
+                    self._running[job.device] += 1
+                self.queue_changed.emit()
+            if self._throttle_delay and not job.cancelled:
+                time.sleep(self._throttle_delay)
+        if job.cancelled:
+            raise err.IoJobCancelled(f'I/O job cancelled: {job.name}')
+
+
+_io_scheduler: Union[IoScheduler, None] = None
+_io_scheduler_lock = threading.Lock()
+
+
+def get_io_scheduler() -> IoScheduler:
+    """
+    Returns the I/O scheduler of the application, every long-running disk job goes through it.
+
+    :return: The shared IoScheduler instance of this process
+    """
+    global _io_scheduler
+    with _io_scheduler_lock:
+        if _io_scheduler is None:
+            _io_scheduler = IoScheduler()
+        return _io_scheduler
+
+
+# set to a stall threshold in milliseconds to start the stall watchdog of the GUI, see `StallWatchdog`
+STALL_WATCHDOG_ENV_VAR = 'DIGIS_STALL_MS'
+
+StallRecord = collections.namedtuple(
+    'StallRecord',
+    (
+        'started',
+        'duration',
+        'stack'
+    )
+)
+
+
+class StallWatchdog(QObject):
+    """
+    Detects the stalls of the Qt event loop of the thread it is started from, e.g. a long synchronous call
+    in a slot of the main window.
+
+    A timer of the event loop beats regularly, and a watchdog thread checks the beats. When no beat comes
+    for longer than the threshold, the watchdog captures the Python stack of the stalled thread and logs it
+    at once, so a hang that never ends is logged too. Once the event loop beats again the stall is recorded
+    and logged with its duration.
+    """
+    def __init__(self, threshold: float = 0.2, max_stalls: int = 100, parent: Union[QObject, None] = None):
+        """
+        :param threshold: The stall duration in seconds from which a stall is recorded
+        :param max_stalls: The number of the latest stalls kept
+        :param parent: The parent QObject
+        """
+        super().__init__(parent)
+        self._threshold = threshold
+        self._last_beat = time.monotonic()
+        self._thread_id = None
+        self._watcher = None
+        self._stop_event = threading.Event()
+        self._stalls: collections.deque = collections.deque(maxlen = max_stalls)
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(10, int(threshold * 250)))
+        self._timer.timeout.connect(self._beat)
+
+    @property
+    def threshold(self) -> float: return self._threshold
+
+    @property
+    def stalls(self) -> List[StallRecord]: return list(self._stalls)
+
+    def is_running(self) -> bool:
+        return self._watcher is not None
+
+    def _beat(self):
+        self._last_beat = time.monotonic()
+
+    def start(self):
+        """
+        Starts watching the event loop of the calling thread.
+        """
+        if self._watcher is not None:
+            return
+        self._thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._timer.start()
+        self._watcher = threading.Thread(target = self._watch, name = 'StallWatchdog', daemon = True)
+        self._watcher.start()
+        log.info(f'Stall watchdog started, threshold {self._threshold * 1000:.0f} ms')
+
+    def stop(self):
+        if self._watcher is None:
+            return
+        self._stop_event.set()
+        self._watcher.join()
+        self._watcher = None
+        self._timer.stop()
+
+    def _watch(self):
+        stalled_beat = None
+        stack = None
+        while not self._stop_event.wait(self._timer.interval() / 1000):
+            last_beat = self._last_beat
+            if stalled_beat is not None and last_beat != stalled_beat:
+                # the event loop is back, the stall lasted until the first beat after it
+                self._record(stalled_beat, last_beat, stack)
+                stalled_beat = None
+            elif stalled_beat is None and time.monotonic() - last_beat > self._threshold:
+                frame = sys._current_frames().get(self._thread_id)
+                stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+                stalled_beat = last_beat
+                log.warning(f'Event loop stalled for more than {self._threshold * 1000:.0f} ms, stack:\n{stack}')
+
+    def _record(self, stalled_beat: float, resumed_beat: float, stack: str):
+        # a beat is due every interval, anything longer is the stall
+        duration = resumed_beat - stalled_beat - self._timer.interval() / 1000
+        record = StallRecord(time.time() - (time.monotonic() - stalled_beat), duration, stack)
+        self._stalls.append(record)
+        log.warning(f'Event loop resumed after a stall of {duration * 1000:.0f} ms')
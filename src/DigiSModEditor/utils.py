@@ -1,3 +1,5 @@
+import logging
+import time
 from os import PathLike
 from pathlib import Path
 from typing import Union
@@ -126,3 +128,39 @@ def tuple_to_float(value: tuple[int, int]) -> float:
     :return: A float
     """
     return value[0] + value[1] / 10
+
+
+class RateLimitedLog:
+    """
+    Logs a per-item message of a hot loop at most once per interval, the skipped messages are counted.
+
+    The message is formatted with %-style arguments only when it is actually logged, e.g.
+    `found_log.info('Found asset file: %s', file_path)` in a loop over thousands of files.
+    """
+    def __init__(self, logger: logging.Logger, interval: float = 1.0):
+        self._logger = logger
+        self._interval = interval
+        self._last_time = 0.0
+        self._suppressed = 0
+
+    @property
+    def suppressed(self) -> int: return self._suppressed
+
+    def log(self, level: int, msg: str, *args):
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now - self._last_time < self._interval:
+            self._suppressed += 1
+            return
+        if self._suppressed:
+            msg = f'{msg} (+{self._suppressed} similar messages)'
+            self._suppressed = 0
+        self._last_time = now
+        self._logger.log(level, msg, *args)
+
+    def debug(self, msg: str, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args):
+        self.log(logging.INFO, msg, *args)
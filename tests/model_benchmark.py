@@ -0,0 +1,218 @@
+"""
+Headless benchmarks of the Qt asset models and the selection counter of the main window.
+
+Runs on the 'offscreen' Qt platform, no display is needed:
+
+    python model_benchmark.py --assets 1000 10000 --output results.json
+    python model_benchmark.py --compare model_benchmark_baseline.json
+
+The results have the same shape as `scale_benchmark.py` and are compared with the same tolerances.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Union
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import Qt, QItemSelectionModel
+from PySide6.QtWidgets import QApplication
+
+from DigiSModEditor import core
+from DigiSModEditor.constants import UiPath as UIP
+from DigiSModEditor.gui import models
+
+import scale_benchmark
+import synthetic_dsdb
+
+DEFAULT_ASSETS = (1000, 10000)
+CHECK_COUNTS = (1, 100, 10000)
+
+
+def _get_rss() -> Union[int, None]:
+    # the Qt items live in C++, only the resident set size sees them
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _timed(func) -> float:
+    # the garbage left by the previous measure is not charged to this one, a full collection of the
+    # Qt item wrappers and the indexes of a large model takes hundreds of milliseconds
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _create_model(dsdb_dir: Path) -> models.AsukaModel:
+    model = models.AsukaModel(dsdb_dir)
+    # the queue is drained explicitly, not by the 5 ms timer
+    model._timer.stop()
+    return model
+
+
+def _get_records(structures: List[Dict], changed_share: float = 0.0) -> List[core.AssetRecord]:
+    # the rescan output of the same assets, the first `changed_share` of them lost their last animation
+    records = []
+    for i, o in enumerate(structures):
+        stem, groups = next(iter(o.items()))
+        anim_suffixes = tuple(f[len(stem):-len('.anim')] for f in groups['Animation'])
+        if i < len(structures) * changed_share:
+            anim_suffixes = anim_suffixes[:-1] if anim_suffixes else ('_bt01',)
+        image_suffixes = tuple(f[len(stem):-len('.img')] for f in groups['Image'])
+        records.append(core.AssetRecord(stem, anim_suffixes, image_suffixes))
+    return records
+
+
+def run_assets(app: QApplication, window, dsdb_dir: Path, asset_count: int) -> Dict[str, Dict]:
+    """
+    Populates an `AsukaModel` with `asset_count` synthetic assets and measures it.
+
+    :param app: The application
+    :param window: The main window, its selection counter is connected to the model
+    :param dsdb_dir: A directory to use as the model root, nothing is read from it
+    :param asset_count: The number of assets
+    :return: A dictionary of benchmark name to its seconds and items count, or bytes for the memory
+    """
+    structures = synthetic_dsdb.generate_asset_structures(asset_count)
+    names = [next(iter(o)) for o in structures]
+    results = {}
+
+    # memory first, on a model of its own, tracemalloc slows down everything it traces
+    rss_before = _get_rss()
+    tracemalloc.start()
+    memory_model = _create_model(dsdb_dir)
+    for o in structures:
+        memory_model.add_asset_item(o)
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss_after = _get_rss()
+    results['memory_per_asset'] = {
+        'python_bytes': python_bytes // asset_count,
+        'rss_bytes': (rss_after - rss_before) // asset_count if rss_before is not None else None,
+        'items': asset_count,
+    }
+    memory_model.deleteLater()
+
+    model = _create_model(dsdb_dir)
+    results['queue'] = {'seconds': _timed(lambda: [model.add_to_queue(o) for o in structures]), 'items': asset_count}
+
+    def _drain():
+        while model._queue:
+            model.process_queue()
+    results['drain'] = {'seconds': _timed(_drain), 'items': asset_count}
+    results['sort'] = {'seconds': _timed(model.sort_assets), 'items': asset_count}
+    # the drain timer of the GUI adds a 5 ms floor per asset on top of the drain cost
+    results['drain_timer_floor'] = {'seconds_estimate': asset_count * 0.005, 'items': asset_count}
+
+    # rescans, the time spent applying the difference computed by the scanner thread on the GUI thread
+    previous = _get_records(structures)
+    model.apply_snapshot(previous, snapshot_id = 1)
+    for snapshot_id, (name, changed_share) in enumerate(
+            (('rescan_same', 0.0), ('rescan_1pct', 0.01), ('rescan_50pct', 0.5)), start = 2
+    ):
+        records = _get_records(structures, changed_share)
+        updated, removed = core.get_scan_delta({o.stem: o for o in previous}, records)
+        delta = core.ScanDelta(records, updated, removed, snapshot_id - 1, snapshot_id)
+        results[name] = {'seconds': _timed(lambda: model.apply_delta(delta)), 'items': asset_count}
+        previous = records
+
+    results['lookup'] = {'seconds': _timed(lambda: [model.find_item_by_name(o) for o in names]), 'items': asset_count}
+    results['search'] = {'seconds': _timed(lambda: model.search_assets('chr00001')), 'items': asset_count}
+
+    # check rows the way the user does: select the rows, then check one of them
+    tree_view = window.ui(UIP.SRC_ASSET_TV)
+    window._set_source_model(model, {'asset_model': model, 'checked_index_list': []})
+    selection_model = tree_view.selectionModel()
+    for count in CHECK_COUNTS:
+        if count > asset_count:
+            continue
+        # reset without the counter, it is not part of the measure
+        model.blockSignals(True)
+        for i in range(asset_count):
+            model.item(i).setCheckState(Qt.Unchecked)
+        model.blockSignals(False)
+        selection_model.clearSelection()
+        for i in range(count):
+            selection_model.select(model.index(i, 0), QItemSelectionModel.Select)
+        app.processEvents()
+        seconds = _timed(lambda: model.item(0).setCheckState(Qt.Checked))
+        checked = len(window._asset_src_model_data['DSDB']['checked_index_list'])
+        results[f'check_{count}'] = {'seconds': seconds, 'items': checked}
+
+    model.dataChanged.disconnect(window.src_asset_selection_counter)
+    tree_view.setModel(None)
+    model.deleteLater()
+    app.processEvents()
+    return results
+
+
+def run_benchmarks(asset_counts: List[int]) -> Dict:
+    app = QApplication.instance() or QApplication([])
+    from DigiSModEditor.gui import window as gui_window
+    window = gui_window.MainWindow()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix = 'digis_model_benchmark_') as temp_dir:
+        for asset_count in asset_counts:
+            results[str(asset_count)] = run_assets(app, window, Path(temp_dir), asset_count)
+            for name, o in results[str(asset_count)].items():
+                if 'seconds' in o:
+                    print(f'{asset_count:>7} assets  {name:<12} {o["seconds"] * 1000:10.2f} ms  {o["items"]:>7} items')
+                else:
+                    print(f'{asset_count:>7} assets  {name:<12} {json.dumps({k: v for k, v in o.items() if k != "items"})}')
+    window.close()
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'system': platform.system(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = 'Headless benchmarks of the Qt asset models.')
+    parser.add_argument('--assets', type = int, nargs = '+', help = 'numbers of assets, the baseline ones or 1000 10000 by default')
+    parser.add_argument('--output', type = Path, help = 'file to write the results as JSON')
+    parser.add_argument('--compare', type = Path, metavar = 'BASELINE', help = 'fail on regressions against a baseline')
+    parser.add_argument('--update-baseline', type = Path, metavar = 'BASELINE', help = 'write the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    asset_counts = args.assets or ([int(o) for o in baseline['results']] if baseline else list(DEFAULT_ASSETS))
+
+    report = run_benchmarks(asset_counts)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 4)
+    if args.update_baseline is not None:
+        report['tolerance'] = scale_benchmark.DEFAULT_TOLERANCE
+        with open(args.update_baseline, 'w') as f:
+            json.dump(report, f, indent = 4)
+
+    if baseline is None:
+        return 0
+    if baseline.get('system') != report['system']:
+        print(f'Baseline measured on {baseline.get("system")}, not compared on {report["system"]}')
+        return 0
+    regressions = scale_benchmark.compare_results(report, baseline)
+    for o in regressions:
+        print(f'REGRESSION {o}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
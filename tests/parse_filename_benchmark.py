@@ -1,8 +1,12 @@
 import os
 import re
+import sys
+import tempfile
 import timeit
 from pathlib import Path
 
+import synthetic_dsdb
+
 
 def benchmark_regex(root_dir):
     r_name = re.compile(r'(\w+)\.(name)')
@@ -121,7 +125,12 @@ def benchmark_collect_iter_endswith(root_dir: Path):
 
 
 if __name__ == '__main__':
-    dir_path = Path(r'D:\IDrive\Project\2024\DigimonStory\original-content\DSDB')
+    # a DSDB directory as argument, or a synthetic DSDB of 10k files
+    if len(sys.argv) > 1:
+        dir_path = Path(sys.argv[1])
+    else:
+        dir_path = Path(tempfile.mkdtemp(prefix = 'digis_parse_')) / 'DSDB'
+        synthetic_dsdb.generate_dsdb(dir_path, 10000)
     # Benchmark os.walk
     start = timeit.default_timer()
     num_files_walk = benchmark_regex(dir_path)
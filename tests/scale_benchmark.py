@@ -0,0 +1,194 @@
+"""
+Scale benchmarks of scanning, grouping, copying and packing on synthetic DSDB trees.
+
+    python scale_benchmark.py --scales 1000 10000 100000 --output results.json
+    python scale_benchmark.py --compare benchmark_baseline.json
+    python scale_benchmark.py --scales 1000 10000 --update-baseline benchmark_baseline.json
+
+With --compare, the exit code is 1 when a benchmark is slower than its baseline times the tolerance,
+so a CI job catches the regressions. Baselines are only compared on the platform they were measured on.
+"""
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Callable
+
+from DigiSModEditor import core
+from DigiSModEditor import catalog
+
+import synthetic_dsdb
+
+DEFAULT_SCALES = (1000, 10000)
+DEFAULT_TOLERANCE = 1.5
+# the disk bound benchmarks are noisier
+DEFAULT_TOLERANCES = {'copy': 2.0, 'pack': 2.0, 'pack_delta': 2.0}
+# differences below this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.005
+# the grouping regex runs over the whole directory text per asset, a sample keeps large scales practical
+GROUP_SAMPLE = 2000
+COPY_SAMPLE = 100
+MODS_ASSETS = 100
+
+
+def _best_of(repeat: int, func: Callable, setup: Callable = None) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_scale(work_dir: Path, file_count: int, repeat: int) -> Dict[str, Dict]:
+    """
+    Generates a synthetic DSDB of `file_count` files and runs every benchmark on it.
+
+    :param work_dir: An empty directory for the generated trees
+    :param file_count: The number of DSDB files
+    :param repeat: The number of runs of every benchmark, the best run is kept
+    :return: A dictionary of benchmark name to its seconds and items count
+    """
+    dsdb_dir = work_dir / 'DSDB'
+    stems = synthetic_dsdb.generate_dsdb(dsdb_dir, file_count)
+    results = {}
+
+    scan = {}
+
+    def _scan():
+        scan['index'] = core.walk_asset_files(dsdb_dir)
+    results['scan'] = {'seconds': _best_of(repeat, _scan), 'items': file_count}
+    name_list, files_text = scan['index']
+
+    sample = sorted(name_list)[:GROUP_SAMPLE]
+    records = []
+
+    def _group():
+        records[:] = [core.get_asset_record(o, files_text) for o in sample]
+    results['group'] = {'seconds': _best_of(repeat, _group), 'items': len(sample)}
+
+    def _catalog():
+        asset_catalog = catalog.AssetCatalog(dsdb_dir)
+        for o in records:
+            asset_catalog.add_asset_structure(o)
+        asset_catalog.query(prefix = 'chr', anim_code = 'bt01')
+    results['catalog'] = {'seconds': _best_of(repeat, _catalog), 'items': len(records)}
+
+    copy_dir = work_dir / 'Copy'
+    copy_files = [
+        catalog.get_relative_file_path(file_name) for o in records[:COPY_SAMPLE] for _, file_name in o.iter_files()
+    ]
+    copy_files = [o for o in copy_files if (dsdb_dir / o).exists()]
+
+    def _copy():
+        for o in copy_files:
+            core.copy_asset_file(dsdb_dir / o.parent, copy_dir / o.parent, o.name)
+    results['copy'] = {
+        'seconds': _best_of(repeat, _copy, lambda: shutil.rmtree(copy_dir, ignore_errors = True)),
+        'items': len(copy_files),
+    }
+
+    mods_parent_dir = work_dir / 'ProjectMods'
+    mods_parent_dir.mkdir()
+    project_dir = synthetic_dsdb.generate_project_mods(mods_parent_dir, 'Mods', dsdb_dir, stems[:MODS_ASSETS])
+    pack_dir = work_dir / 'PackedMods'
+    pack_dir.mkdir()
+    results['pack'] = {
+        'seconds': _best_of(repeat, lambda: core.pack_project_mods(project_dir, pack_dir, 'Mods.zip')),
+        'items': MODS_ASSETS,
+    }
+    results['pack_delta'] = {
+        'seconds': _best_of(repeat, lambda: core.pack_project_mods(project_dir, pack_dir, 'Mods.zip', dsdb_dir)),
+        'items': MODS_ASSETS,
+    }
+    return results
+
+
+def run_benchmarks(scales: List[int], repeat: int) -> Dict:
+    results = {}
+    for file_count in scales:
+        work_dir = Path(tempfile.mkdtemp(prefix = f'digis_benchmark_{file_count}_'))
+        try:
+            results[str(file_count)] = run_scale(work_dir, file_count, repeat)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors = True)
+        for name, o in results[str(file_count)].items():
+            print(f'{file_count:>7} files  {name:<10} {o["seconds"] * 1000:10.2f} ms  {o["items"]:>7} items')
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'system': platform.system(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+
+def compare_results(report: Dict, baseline: Dict) -> List[str]:
+    """
+    Lists the benchmarks slower than their baseline times the tolerance.
+
+    :param report: The result of `run_benchmarks`
+    :param baseline: A previous report, with an optional 'tolerance' and per benchmark 'tolerances'
+    :return: A message per regression
+    """
+    default_tolerance = baseline.get('tolerance', DEFAULT_TOLERANCE)
+    tolerances = baseline.get('tolerances', {})
+    regressions = []
+    for scale, benchmarks in report['results'].items():
+        for name, o in benchmarks.items():
+            base = baseline['results'].get(scale, {}).get(name)
+            if base is None or 'seconds' not in o:
+                continue
+            tolerance = tolerances.get(name, default_tolerance)
+            if o['seconds'] > base['seconds'] * tolerance and o['seconds'] - base['seconds'] > MIN_REGRESSION_SECONDS:
+                regressions.append(
+                    f'{name} at {scale} files: {o["seconds"] * 1000:.2f} ms, '
+                    f'baseline {base["seconds"] * 1000:.2f} ms x {tolerance}'
+                )
+    return regressions
+
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = 'Scale benchmarks on synthetic DSDB trees.')
+    parser.add_argument('--scales', type = int, nargs = '+', help = 'numbers of DSDB files, the baseline scales or 1000 10000 by default')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'runs of every benchmark, the best is kept')
+    parser.add_argument('--output', type = Path, help = 'file to write the results as JSON')
+    parser.add_argument('--compare', type = Path, metavar = 'BASELINE', help = 'fail on regressions against a baseline')
+    parser.add_argument('--update-baseline', type = Path, metavar = 'BASELINE', help = 'write the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    scales = args.scales or ([int(o) for o in baseline['results']] if baseline else list(DEFAULT_SCALES))
+
+    report = run_benchmarks(scales, args.repeat)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 4)
+    if args.update_baseline is not None:
+        report['tolerance'] = DEFAULT_TOLERANCE
+        report['tolerances'] = DEFAULT_TOLERANCES
+        with open(args.update_baseline, 'w') as f:
+            json.dump(report, f, indent = 4)
+
+    if baseline is None:
+        return 0
+    if baseline.get('system') != report['system']:
+        print(f'Baseline measured on {baseline.get("system")}, not compared on {report["system"]}')
+        return 0
+    regressions = compare_results(report, baseline)
+    for o in regressions:
+        print(f'REGRESSION {o}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
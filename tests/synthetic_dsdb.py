@@ -0,0 +1,143 @@
+"""
+Generates synthetic DSDB and project mods trees for the benchmarks and tests.
+
+The trees follow the layout of the game data: '<stem>.name', '<stem>.geom', '<stem>.skel',
+'<stem>_<xx><00>.anim' files in the root directory and '<stem>_<kind>.img' files in 'images'.
+The same seed and file count always give the same tree.
+
+    python synthetic_dsdb.py <output dir> --files 100000 [--mods 3] [--seed 0]
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import List, Dict
+
+from DigiSModEditor import core
+
+ASSET_PREFIXES = ('chr', 'npc', 'mob', 'itm', 'eff', 'fld', 'obj', 'wpn')
+ANIM_CODES = ('bt', 'id', 'rn', 'wk', 'at', 'dm', 'sk', 'ev')
+IMAGE_KINDS = ('tex', 'nrm', 'spc', 'msk', 'emi')
+FILE_SIZE = 256
+
+
+def _get_asset_files(rng: random.Random, stem: str) -> List[str]:
+    files = [f'{stem}.name', f'{stem}.geom', f'{stem}.skel']
+    # the animation suffix is '_xx00', see const.Pattern.ANIM
+    codes = rng.sample(ANIM_CODES, rng.randint(0, 4))
+    files.extend(f'{stem}_{o}{n:02d}.anim' for o in codes for n in range(rng.randint(1, 3)))
+    files.extend(f'images/{stem}_{o}.img' for o in rng.sample(IMAGE_KINDS, rng.randint(1, 3)))
+    return files
+
+
+def generate_asset_structures(asset_count: int, seed: int = 0) -> List[Dict]:
+    """
+    Generates the scan output of a synthetic DSDB in memory, see `core.get_asset_related_files`.
+
+    :param asset_count: The number of assets
+    :param seed: The seed of the generator
+    :return: A list of asset structures, one per asset
+    """
+    rng = random.Random(seed)
+    structures = []
+    for i in range(asset_count):
+        stem = f'{ASSET_PREFIXES[i % len(ASSET_PREFIXES)]}{i // len(ASSET_PREFIXES):06d}'
+        files = _get_asset_files(rng, stem)
+        structures.append({
+            stem: {
+                'Name': [f'{stem}.name'],
+                'Geometry': [f'{stem}.geom'],
+                'Skeleton': [f'{stem}.skel'],
+                'Animation': sorted(o for o in files if o.endswith('.anim')),
+                'Image': sorted(o.split('/')[-1] for o in files if o.endswith('.img')),
+            }
+        })
+    return structures
+
+
+def generate_dsdb(dsdb_dir: Path, file_count: int, seed: int = 0, file_size: int = FILE_SIZE) -> List[str]:
+    """
+    Writes a synthetic DSDB of about `file_count` files, whole asset families are never split.
+
+    :param dsdb_dir: The DSDB directory to create
+    :param file_count: The number of files to generate
+    :param seed: The seed of the generator
+    :param file_size: The size of every file in bytes
+    :return: The asset stems, in generation order
+    """
+    rng = random.Random(seed)
+    dsdb_dir = Path(dsdb_dir)
+    (dsdb_dir / 'images').mkdir(parents = True, exist_ok = True)
+    content = rng.randbytes(file_size)
+
+    stems = []
+    written = 0
+    while written < file_count:
+        stem = f'{ASSET_PREFIXES[len(stems) % len(ASSET_PREFIXES)]}{len(stems) // len(ASSET_PREFIXES):06d}'
+        for o in _get_asset_files(rng, stem):
+            (dsdb_dir / o).write_bytes(content)
+            written += 1
+        stems.append(stem)
+    return stems
+
+
+def generate_project_mods(
+        parent_dir: Path,
+        project_name: str,
+        dsdb_dir: Path,
+        stems: List[str],
+        modified_ratio: float = 0.2,
+        seed: int = 0
+) -> Path:
+    """
+    Creates a project mods with the files of some DSDB assets, a part of them modified.
+
+    :param parent_dir: The directory to create the project mods in
+    :param project_name: The name of the project mods
+    :param dsdb_dir: The synthetic DSDB, see `generate_dsdb`
+    :param stems: The stems of the assets to copy into the mods
+    :param modified_ratio: The ratio of the copied files to modify
+    :param seed: The seed of the generator
+    :return: The project mods directory
+    """
+    rng = random.Random(seed)
+    parent_dir = Path(parent_dir)
+    dsdb_dir = Path(dsdb_dir)
+    core.create_project_mods(parent_dir, project_name, 'Benchmark', (1, 0), 'Benchmark', 'Synthetic mods')
+    mods_dir = parent_dir / project_name / 'modfiles'
+
+    for stem in stems:
+        for o in [*dsdb_dir.glob(f'{stem}.*'), *dsdb_dir.glob(f'{stem}_*.anim'), *dsdb_dir.glob(f'images/{stem}_*')]:
+            relative_path = o.relative_to(dsdb_dir)
+            dest_path = mods_dir / relative_path
+            dest_path.parent.mkdir(parents = True, exist_ok = True)
+            content = o.read_bytes()
+            if rng.random() < modified_ratio:
+                content = rng.randbytes(len(content))
+            dest_path.write_bytes(content)
+    return parent_dir / project_name
+
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = 'Generate a synthetic DSDB and project mods.')
+    parser.add_argument('output_dir', type = Path, help = 'directory to create the DSDB and ProjectMods in')
+    parser.add_argument('--files', type = int, default = 10000, help = 'number of DSDB files')
+    parser.add_argument('--mods', type = int, default = 0, help = 'number of project mods')
+    parser.add_argument('--mods-assets', type = int, default = 50, help = 'number of assets per project mods')
+    parser.add_argument('--file-size', type = int, default = FILE_SIZE, help = 'size of every file in bytes')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the generator')
+    args = parser.parse_args(argv)
+
+    stems = generate_dsdb(args.output_dir / 'DSDB', args.files, args.seed, args.file_size)
+    mods_parent_dir = args.output_dir / 'ProjectMods'
+    mods_parent_dir.mkdir(parents = True, exist_ok = True)
+    rng = random.Random(args.seed)
+    for i in range(args.mods):
+        mods_stems = rng.sample(stems, min(args.mods_assets, len(stems)))
+        generate_project_mods(mods_parent_dir, f'Mods{i:03d}', args.output_dir / 'DSDB', mods_stems, seed = args.seed + i)
+    print(f'Generated {len(stems)} assets and {args.mods} project mods: {args.output_dir}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, mock
+
+from DigiSModEditor import aio
+from DigiSModEditor import core
+from DigiSModEditor import diff
+
+import synthetic_dsdb
+
+
+class TestAio(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        stems = synthetic_dsdb.generate_dsdb(self.dsdb_dir, 200)
+        self.file_names = [f'{o}{k}' for o in stems for k in ('.name', '.geom', '.skel')]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    async def test_scan_assets(self):
+        name_list, files_text = core.walk_asset_files(self.dsdb_dir)
+        records = [o async for o in aio.scan_assets(self.dsdb_dir, batch_size = 7)]
+        self.assertEqual(records, [core.get_asset_record(o, files_text) for o in name_list])
+
+    async def test_transfer_files(self):
+        dest_dir = self.temp_dir / 'Copy'
+        file_names = [*self.file_names[:20], 'missing.name']
+        progress = []
+        results = await aio.transfer_files(self.dsdb_dir, dest_dir, file_names, concurrency = 3, on_progress = progress.append)
+
+        self.assertEqual([o.success for o in results], [True] * 20 + [False])
+        self.assertEqual([o.destination for o in results], [dest_dir / o for o in file_names])
+        self.assertEqual([o.done for o in progress], list(range(1, 22)))
+        self.assertTrue(all(o.total == 21 for o in progress))
+        self.assertTrue(all((dest_dir / o).exists() for o in self.file_names[:20]))
+
+    async def test_transfer_into_new_directory(self):
+        dest_dir = self.temp_dir / 'Copy'
+        file_names = sorted(o.name for o in self.dsdb_dir.iterdir() if o.is_file())[:4]
+        # every copy finds the directory missing before any of them creates it
+        barrier = threading.Barrier(len(file_names), timeout = 5)
+        mkdir = Path.mkdir
+
+        def _mkdir(path, *args, **kwargs):
+            if path == dest_dir:
+                barrier.wait()
+            return mkdir(path, *args, **kwargs)
+
+        with mock.patch.object(Path, 'mkdir', _mkdir):
+            results = await aio.transfer_files(self.dsdb_dir, dest_dir, file_names, concurrency = len(file_names))
+        self.assertEqual([o.message for o in results if not o.success], [])
+        self.assertTrue(all((dest_dir / o).exists() for o in file_names))
+
+    async def test_transfer_concurrency_limit(self):
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def _copy_asset_file(*args, **kwargs):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return core.CopyResult(True, None, None, '')
+
+        with mock.patch.object(core, 'copy_asset_file', _copy_asset_file):
+            await aio.transfer_files(self.dsdb_dir, self.temp_dir / 'Copy', self.file_names[:30], concurrency = 2)
+        self.assertEqual(peak, 2)
+
+    async def test_raising_copy_does_not_cancel_the_others(self):
+        copy_asset_file = core.copy_asset_file
+
+        def _copy_asset_file(src_dir, dest_dir, file_name, **kwargs):
+            if file_name == self.file_names[0]:
+                raise PermissionError('Access denied')
+            time.sleep(0.01)
+            return copy_asset_file(src_dir, dest_dir, file_name, **kwargs)
+
+        dest_dir = self.temp_dir / 'Copy'
+        with mock.patch.object(core, 'copy_asset_file', _copy_asset_file):
+            results = await aio.transfer_files(self.dsdb_dir, dest_dir, self.file_names[:6], concurrency = 2)
+        self.assertEqual([o.success for o in results], [False] + [True] * 5)
+        self.assertEqual(results[0].destination, dest_dir / self.file_names[0])
+        self.assertEqual(results[0].message, 'Access denied')
+
+    async def test_cancel_stops_blocking_diff(self):
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        stopped = threading.Event()
+
+        def _diff_mods_files(mods_dir, source_dir, cache, checkpoint):
+            try:
+                while True:
+                    checkpoint()
+                    time.sleep(0.001)
+            finally:
+                stopped.set()
+
+        with mock.patch.object(diff, 'diff_mods_files', _diff_mods_files):
+            task = asyncio.create_task(aio.diff_project_mods(self.temp_dir / 'TestMods', self.dsdb_dir))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertTrue(stopped.is_set())
+
+    async def test_cancel_stops_blocking_copy(self):
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def _copy_asset_file(*args, checkpoint = None, **kwargs):
+            # a large file copy, it only stops at its checkpoint
+            started.set()
+            try:
+                while True:
+                    checkpoint()
+                    time.sleep(0.001)
+            finally:
+                stopped.set()
+
+        with mock.patch.object(core, 'copy_asset_file', _copy_asset_file):
+            task = asyncio.create_task(aio.transfer_files(self.dsdb_dir, self.temp_dir / 'Copy', self.file_names[:4]))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        # the blocking copy has stopped by the time the cancellation returns
+        self.assertTrue(stopped.is_set())
+
+    async def test_cancelled_pack_removes_zip(self):
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        project_dir = self.temp_dir / 'TestMods'
+        for o in self.file_names[:50]:
+            shutil.copy(self.dsdb_dir / o, project_dir / 'modfiles')
+        started = threading.Event()
+        write = zipfile.ZipFile.write
+
+        def _write(zip_file, *args, **kwargs):
+            started.set()
+            time.sleep(0.01)
+            return write(zip_file, *args, **kwargs)
+
+        with mock.patch.object(zipfile.ZipFile, 'write', _write):
+            task = asyncio.create_task(aio.pack_project_mods(project_dir, self.temp_dir, 'TestMods.zip'))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertFalse((self.temp_dir / 'TestMods.zip').exists())
+
+        pack_result = await aio.pack_project_mods(project_dir, self.temp_dir, 'TestMods.zip')
+        self.assertEqual(pack_result.packed_files, 52)
+
+
+if __name__ == '__main__':
+    unittest.main()
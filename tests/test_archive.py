@@ -0,0 +1,137 @@
+import json
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+from DigiSModEditor import archive
+from DigiSModEditor import errors as err
+
+
+class TestImportModsArchive(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dest_dir = self.temp_dir / 'ProjectMods'
+        self.dest_dir.mkdir()
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        mods_dir = self.temp_dir / 'TestMods' / 'modfiles'
+        (mods_dir / 'images').mkdir()
+        for name in ('chr001.name', 'chr001.geom', 'chr001.skel', 'chr001_bt01.anim', 'chr002.name'):
+            (mods_dir / name).write_bytes(name.encode() * 1000)
+        (mods_dir / 'images' / 'chr001.img').write_bytes(b'image' * 1000)
+        self.zip_path = core.pack_project_mods(self.temp_dir / 'TestMods', self.temp_dir, 'TestMods.zip').zip_file
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_archive(self, entries: dict) -> Path:
+        zip_path = self.temp_dir / 'Broken.zip'
+        with zipfile.ZipFile(zip_path, 'w') as zip_file:
+            for name, data in entries.items():
+                zip_file.writestr(name, data)
+        return zip_path
+
+    def test_import_extracts_project_mods(self):
+        import_result = archive.import_mods_archive(self.zip_path, self.dest_dir, max_workers = 3)
+        project_dir = self.dest_dir / 'TestMods'
+        self.assertEqual(import_result.project_dir, project_dir)
+        self.assertTrue(core.is_project_mods_directory(project_dir))
+        self.assertEqual(import_result.extracted_files, 8)
+        self.assertEqual((project_dir / 'modfiles' / 'images' / 'chr001.img').read_bytes(), b'image' * 1000)
+        self.assertEqual(core.read_metadata_mods(project_dir / 'METADATA.json')['author'], 'Author')
+        self.assertEqual(list(self.dest_dir.iterdir()), [project_dir])
+
+    def test_index_matches_walk(self):
+        import_result = archive.import_mods_archive(self.zip_path, self.dest_dir, 'Imported')
+        name_list, files_text = core.walk_asset_files(self.dest_dir / 'Imported' / 'modfiles')
+        self.assertEqual(sorted(import_result.name_list), sorted(name_list))
+        self.assertEqual(sorted(import_result.files_text.split(';')), sorted(files_text.split(';')))
+
+    def test_existing_project_is_not_replaced(self):
+        archive.import_mods_archive(self.zip_path, self.dest_dir)
+        with self.assertRaises(err.CreateProjectModsError):
+            archive.import_mods_archive(self.zip_path, self.dest_dir)
+
+    def test_invalid_metadata(self):
+        zip_path = self._write_archive({'METADATA.json': json.dumps({'name': 'x'}), 'DESCRIPTION.html': ''})
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.import_mods_archive(zip_path, self.dest_dir)
+        self.assertEqual(list(self.dest_dir.iterdir()), [])
+
+    def test_missing_description(self):
+        metadata = {'name': 'x', 'author': 'a', 'version': [1, 0], 'category': 'c'}
+        zip_path = self._write_archive({'METADATA.json': json.dumps(metadata)})
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.import_mods_archive(zip_path, self.dest_dir)
+
+    def test_unsafe_path(self):
+        metadata = {'name': 'x', 'author': 'a', 'version': [1, 0], 'category': 'c'}
+        zip_path = self._write_archive({
+            'METADATA.json': json.dumps(metadata), 'DESCRIPTION.html': '', '../evil.geom': 'x'
+        })
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.import_mods_archive(zip_path, self.dest_dir)
+        self.assertFalse((self.temp_dir / 'evil.geom').exists())
+
+    def test_empty_member_name(self):
+        metadata = {'name': 'x', 'author': 'a', 'version': [1, 0], 'category': 'c'}
+        # zipfile refuses to write an empty name, '.' has no path parts either
+        zip_path = self._write_archive({'METADATA.json': json.dumps(metadata), 'DESCRIPTION.html': '', '.': 'x'})
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.import_mods_archive(zip_path, self.dest_dir)
+
+    def test_not_a_zip_file(self):
+        not_zip = self.temp_dir / 'NotZip.zip'
+        not_zip.write_text('not a zip')
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.import_mods_archive(not_zip, self.dest_dir)
+
+
+
+class TestModsArchive(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        mods_dir = self.temp_dir / 'TestMods' / 'modfiles'
+        (mods_dir / 'images').mkdir()
+        for name in ('chr001.name', 'chr001.geom', 'chr001_bt01.anim', 'chr002.name'):
+            (mods_dir / name).write_bytes(name.encode() * 1000)
+        (mods_dir / 'images' / 'chr001.img').write_bytes(b'image' * 1000)
+        self.zip_path = core.pack_project_mods(self.temp_dir / 'TestMods', self.temp_dir, 'TestMods.zip').zip_file
+        self.dest_dir = self.temp_dir / 'Dest'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_metadata_and_index(self):
+        with archive.ModsArchive(self.zip_path) as mods_archive:
+            self.assertEqual(mods_archive.metadata['version'], (1, 0))
+            self.assertEqual(mods_archive.description, 'Description')
+            name_list, files_text = mods_archive.get_asset_index()
+            self.assertEqual(sorted(name_list), ['chr001.name', 'chr002.name'])
+            self.assertIn('chr001.img', files_text.split(';'))
+            self.assertEqual(mods_archive.get_file_size('chr001.img'), len(b'image' * 1000))
+
+    def test_extract_single_file(self):
+        with archive.ModsArchive(self.zip_path) as mods_archive:
+            result = mods_archive.extract_file('chr001_bt01.anim', self.dest_dir)
+            self.assertTrue(result.success)
+            self.assertEqual(result.destination.read_bytes(), b'chr001_bt01.anim' * 1000)
+            self.assertEqual(list(self.dest_dir.iterdir()), [result.destination])
+
+            self.assertFalse(mods_archive.extract_file('chr001_bt01.anim', self.dest_dir, replace = False).success)
+            self.assertFalse(mods_archive.extract_file('chr003.geom', self.dest_dir).success)
+
+    def test_invalid_archive(self):
+        zip_path = self.temp_dir / 'Broken.zip'
+        with zipfile.ZipFile(zip_path, 'w') as zip_file:
+            zip_file.writestr('modfiles/chr001.name', 'x')
+        with self.assertRaises(err.InvalidModsArchive):
+            archive.ModsArchive(zip_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import TestCase
+
+from PySide6.QtWidgets import QApplication
+
+from DigiSModEditor import core
+from DigiSModEditor import catalog
+from DigiSModEditor import constants as const
+from DigiSModEditor.gui import models
+
+FILES_TEXT = ';'.join([
+    'chr001.name', 'chr001.geom', 'chr001.skel', 'chr001_wk01.anim', 'chr001_bt01.anim', 'chr001.anim',
+    'chr001_tex.img', 'chr001_nrm.img', 'chr002.name', 'chr002.geom', 'chr002.skel',
+])
+
+
+class TestAssetRecord(TestCase):
+    def test_same_files_as_asset_structure(self):
+        record = core.get_asset_record('chr001.name', FILES_TEXT)
+        self.assertEqual(record.to_structure(), {
+            'chr001': {
+                'Name': ['chr001.name'],
+                'Geometry': ['chr001.geom'],
+                'Skeleton': ['chr001.skel'],
+                'Animation': ['chr001.anim', 'chr001_bt01.anim', 'chr001_wk01.anim'],
+                'Image': ['chr001_nrm.img', 'chr001_tex.img'],
+            }
+        })
+        self.assertEqual(record.to_structure(), core.get_asset_related_files('chr001.name', FILES_TEXT))
+        self.assertEqual(len(record), 8)
+        self.assertEqual(len(list(record.iter_files())), 8)
+
+    def test_suffixes_are_interned(self):
+        first = core.get_asset_record('chr001.name', FILES_TEXT)
+        second = core.AssetRecord(''.join(['chr', '001']), ('', '_bt01', '_wk01'), ('_nrm', '_tex'))
+        self.assertEqual(first, second)
+        self.assertIs(first.stem, second.stem)
+        self.assertIs(first.anim_suffixes[1], second.anim_suffixes[1])
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def test_catalog_entry(self):
+        asset_catalog = catalog.AssetCatalog('.')
+        record = core.get_asset_record('chr002.name', FILES_TEXT)
+        entry = asset_catalog.add_asset_structure(record)[0]
+        self.assertEqual(entry.kinds, {const.FileKind.NAME, const.FileKind.GEOMETRY, const.FileKind.SKELETON})
+
+        structure_catalog = catalog.AssetCatalog('.')
+        record = core.get_asset_record('chr001.name', FILES_TEXT)
+        existing_files = set(FILES_TEXT.split(';')) - {'chr001_tex.img'}
+        self.assertEqual(
+            asset_catalog.add_asset_structure(record, existing_files)[0].files,
+            structure_catalog.add_asset_structure(record.to_structure(), existing_files)[0].files,
+        )
+
+
+class TestModelAssetRecord(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_record_and_structure_items(self):
+        record_model = models.AsukaModel('.')
+        structure_model = models.AsukaModel('.')
+        record = core.get_asset_record('chr001.name', FILES_TEXT)
+        record_model.add_asset_item(record)
+        structure_model.add_asset_item(record.to_structure())
+
+        record_item = record_model.find_item_by_name('chr001')
+        structure_item = structure_model.find_item_by_name('chr001')
+        self.assertEqual(
+            record_model.get_asset_structure_by_asset_item(record_item),
+            structure_model.get_asset_structure_by_asset_item(structure_item),
+        )
+        self.assertEqual(record_model.search_assets('bt01'), {'chr001'})
+
+
+if __name__ == '__main__':
+    unittest.main()
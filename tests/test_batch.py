@@ -0,0 +1,65 @@
+import json
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+from DigiSModEditor import batch
+
+
+class TestBatchPack(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mods_dir = self.temp_dir / 'ProjectMods'
+        self.mods_dir.mkdir()
+        self.dest_dir = self.temp_dir / 'PackedMods'
+        self.dest_dir.mkdir()
+        for i in range(3):
+            core.create_project_mods(self.mods_dir, f'Mods{i}', 'Author', (1, 0), 'Category', 'Description')
+            (self.mods_dir / f'Mods{i}' / 'modfiles' / f'chr00{i}.geom').write_bytes(b'geom')
+        (self.mods_dir / 'NotMods').mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_find_project_mods_dirs(self):
+        project_dirs = batch.find_project_mods_dirs(self.mods_dir)
+        self.assertEqual([o.name for o in project_dirs], ['Mods0', 'Mods1', 'Mods2'])
+
+    def test_pack_many_in_worker_processes(self):
+        progress = []
+        project_dirs = batch.find_project_mods_dirs(self.mods_dir)
+        results = batch.pack_many(
+            project_dirs, self.dest_dir, max_workers = 2, on_progress = lambda d, t, r: progress.append((d, t))
+        )
+        self.assertEqual([o.project_dir for o in results], project_dirs)
+        self.assertTrue(all(o.success for o in results))
+        self.assertEqual(sorted(progress), [(1, 3), (2, 3), (3, 3)])
+        with zipfile.ZipFile(self.dest_dir / 'Mods1.zip') as zip_file:
+            self.assertIn('modfiles/chr001.geom', zip_file.namelist())
+
+    def test_failure_does_not_stop_batch(self):
+        project_dirs = batch.find_project_mods_dirs(self.mods_dir) + [self.mods_dir / 'NotMods']
+        results = batch.pack_many(project_dirs, self.dest_dir, max_workers = 1)
+        self.assertEqual([o.success for o in results], [True, True, True, False])
+        self.assertIsNotNone(results[-1].error)
+
+        report_file = batch.write_batch_report(results, self.dest_dir / 'pack_report.json')
+        with open(report_file) as f:
+            report = json.load(f)
+        self.assertEqual(report['packed_count'], 3)
+        self.assertEqual(report['failed_count'], 1)
+        self.assertEqual(report['mods'][-1]['name'], 'NotMods')
+
+    def test_batch_workers_limit(self):
+        self.assertEqual(batch.get_batch_workers(1), 1)
+        self.assertEqual(batch.get_batch_workers(0), 1)
+        self.assertLessEqual(batch.get_batch_workers(150), batch.MAX_IO_WORKERS)
+        self.assertEqual(batch.get_batch_workers(150, max_workers = 6), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
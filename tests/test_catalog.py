@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor.catalog import AssetCatalog, create_catalog
+
+
+class TestCreateCatalog(TestCase):
+    def setUp(self):
+        self.dir_path = Path(tempfile.mkdtemp())
+        (self.dir_path / 'images').mkdir()
+        files = {
+            'chr001.name': 1, 'chr001.geom': 10, 'chr001.skel': 10,
+            'chr001_bt01.anim': 5, 'chr001_fi01.anim': 5,
+            'chr002.name': 1, 'chr002.geom': 10,
+            'chr002_bt01.anim': 5,
+            'mob001.name': 1, 'mob001.geom': 10, 'mob001.skel': 10,
+        }
+        for name, size in files.items():
+            (self.dir_path / name).write_bytes(b'0' * size)
+        (self.dir_path / 'images' / 'chr001_body.img').write_bytes(b'0' * 3000)
+        (self.dir_path / 'images' / 'mob001_body.img').write_bytes(b'0' * 100)
+
+        self.catalog = create_catalog(self.dir_path, with_sizes = True)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_path)
+
+    def test_all_assets_are_cataloged(self):
+        self.assertEqual(self.catalog.asset_names, {'chr001', 'chr002', 'mob001'})
+
+    def test_by_prefix(self):
+        self.assertEqual(self.catalog.by_prefix('chr'), {'chr001', 'chr002'})
+        self.assertEqual(self.catalog.by_prefix('x'), set())
+
+    def test_by_anim_code(self):
+        self.assertEqual(self.catalog.by_anim_code('bt01'), {'chr001', 'chr002'})
+        self.assertEqual(self.catalog.by_anim_code('_fi01'), {'chr001'})
+
+    def test_missing_kind(self):
+        self.assertEqual(self.catalog.missing_kind('skel'), {'chr002'})
+        self.assertEqual(self.catalog.by_kind('.img'), {'chr001', 'mob001'})
+
+    def test_by_size(self):
+        self.assertEqual(self.catalog.by_size(min_bytes = 1000, kind = 'img'), {'chr001'})
+        self.assertEqual(self.catalog.by_size(max_bytes = 100, kind = 'img'), {'chr002', 'mob001'})
+        self.assertEqual(self.catalog.get('chr001').size_of(), 3031)
+
+    def test_query_combines_criteria(self):
+        entries = self.catalog.query(prefix = 'chr', kind = 'skel', anim_code = 'bt01')
+        self.assertEqual([o.name for o in entries], ['chr001'])
+
+    def test_image_file_path(self):
+        self.assertEqual(self.catalog.get_file_path('chr001_body.img'), self.dir_path / 'images' / 'chr001_body.img')
+        self.assertEqual(self.catalog.get_file_path('chr001.geom'), self.dir_path / 'chr001.geom')
+
+
+class TestAssetCatalog(TestCase):
+    def test_replace_and_remove_asset(self):
+        asset_catalog = AssetCatalog(Path('root'))
+        asset_catalog.add_asset_structure({'chr001': {'Animation': ['chr001_bt01.anim']}})
+        asset_catalog.add_asset_structure({'chr001': {'Skeleton': ['chr001.skel']}})
+        self.assertEqual(asset_catalog.by_anim_code('bt01'), set())
+        self.assertEqual(asset_catalog.by_kind('skel'), {'chr001'})
+
+        asset_catalog.remove_asset('chr001')
+        self.assertEqual(len(asset_catalog), 0)
+        self.assertEqual(asset_catalog.by_prefix('chr'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
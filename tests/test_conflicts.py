@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+from DigiSModEditor import conflicts
+
+
+class TestConflictIndex(TestCase):
+    def test_conflict_report(self):
+        conflict_index = conflicts.ConflictIndex()
+        conflict_index.set_mods_files('ModsA', ['chr001.geom', 'chr001.skel', 'images/chr001.img'])
+        conflict_index.set_mods_files('ModsB', ['chr001.geom', 'chr002.geom', 'images/chr001.img'])
+        conflict_index.set_mods_files('ModsC', ['chr001.geom', 'chr003.geom'])
+
+        self.assertEqual(conflict_index.get_conflicted_files(), {
+            'chr001.geom': ['ModsA', 'ModsB', 'ModsC'],
+            'images/chr001.img': ['ModsA', 'ModsB'],
+        })
+        self.assertEqual(conflict_index.get_conflict_report(), [
+            conflicts.ModsConflict('ModsA', 'ModsB', ['chr001.geom', 'images/chr001.img']),
+            conflicts.ModsConflict('ModsA', 'ModsC', ['chr001.geom']),
+            conflicts.ModsConflict('ModsB', 'ModsC', ['chr001.geom']),
+        ])
+
+    def test_incremental_update(self):
+        conflict_index = conflicts.ConflictIndex()
+        conflict_index.set_mods_files('ModsA', ['chr001.geom'])
+        conflict_index.set_mods_files('ModsB', ['chr001.geom'])
+        self.assertEqual(len(conflict_index.get_conflict_report()), 1)
+
+        conflict_index.set_mods_files('ModsB', ['chr002.geom'])
+        self.assertEqual(conflict_index.get_conflict_report(), [])
+        self.assertEqual(conflict_index.get_providers('chr001.geom'), {'ModsA'})
+
+        conflict_index.add_file('ModsB', 'chr001.geom')
+        self.assertEqual(conflict_index.get_providers('chr001.geom'), {'ModsA', 'ModsB'})
+        conflict_index.remove_mods('ModsA')
+        self.assertEqual(conflict_index.get_conflicted_files(), {})
+        self.assertEqual(conflict_index.mods_names, {'ModsB'})
+
+    def test_set_mods_scan(self):
+        conflict_index = conflicts.ConflictIndex()
+        conflict_index.set_mods_scan('ModsA', 'chr001.name;chr001.img')
+        self.assertEqual(conflict_index.get_providers('images/chr001.img'), {'ModsA'})
+        self.assertEqual(conflict_index.get_providers('chr001.name'), {'ModsA'})
+
+
+class TestBuildConflictIndex(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for mods_name in ('ModsA', 'ModsB'):
+            core.create_project_mods(self.temp_dir, mods_name, 'Author', (1, 0), 'Category', 'Description')
+            mods_dir = self.temp_dir / mods_name / 'modfiles'
+            (mods_dir / 'images').mkdir()
+            (mods_dir / 'images' / 'chr001.img').write_bytes(b'img')
+            (mods_dir / f'{mods_name}.geom').write_bytes(b'geom')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_from_directory(self):
+        conflict_index = conflicts.build_conflict_index(self.temp_dir)
+        self.assertEqual(conflict_index.get_conflict_report(), [
+            conflicts.ModsConflict('ModsA', 'ModsB', ['images/chr001.img']),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import constants as const
+from DigiSModEditor import digest
+from DigiSModEditor.diff import diff_mods_files, summarize_diff
+from DigiSModEditor.digest import DigestCache
+
+
+class TestDiffModsFiles(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        self.mods_dir = self.temp_dir / 'mods' / 'modfiles'
+        for dir_path in (self.dsdb_dir / 'images', self.mods_dir / 'images'):
+            dir_path.mkdir(parents = True)
+        self.cache = DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+
+        files = {
+            'chr001.geom': b'geometry',
+            'chr001.skel': b'skeleton',
+            'chr001_bt01.anim': b'animation',
+            'images/chr001_body.img': b'image',
+        }
+        for rel_path, data in files.items():
+            (self.dsdb_dir / rel_path).write_bytes(data)
+            (self.mods_dir / rel_path).write_bytes(data)
+        (self.mods_dir / 'chr001.skel').write_bytes(b'skeletoN')
+        (self.mods_dir / 'chr001_bt01.anim').write_bytes(b'longer animation')
+        (self.mods_dir / 'chr001_bt02.anim').write_bytes(b'new animation')
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_status(self):
+        file_diffs = diff_mods_files(self.mods_dir, self.dsdb_dir, self.cache)
+        status = {Path(o.relative_path).as_posix(): o.status for o in file_diffs}
+        self.assertEqual(status, {
+            'chr001.geom': const.DiffStatus.UNCHANGED,
+            'chr001.skel': const.DiffStatus.MODIFIED,
+            'chr001_bt01.anim': const.DiffStatus.MODIFIED,
+            'chr001_bt02.anim': const.DiffStatus.NEW,
+            'images/chr001_body.img': const.DiffStatus.UNCHANGED,
+        })
+
+    def test_partial_files_are_skipped(self):
+        (self.mods_dir / 'chr001_bt03.anim.partial').write_bytes(b'partial')
+        (self.mods_dir / 'chr001_bt03.anim.partial.json').write_bytes(b'{}')
+        file_diffs = diff_mods_files(self.mods_dir, self.dsdb_dir, self.cache)
+        self.assertFalse([o for o in file_diffs if '.partial' in o.relative_path])
+
+    def test_files_of_different_size_are_not_hashed(self):
+        with mock.patch.object(digest, 'hash_file', wraps = digest.hash_file) as mock_hash_file:
+            diff_mods_files(self.mods_dir, self.dsdb_dir, self.cache)
+        hashed = {Path(o.args[0]).name for o in mock_hash_file.call_args_list}
+        self.assertNotIn('chr001_bt01.anim', hashed)
+        self.assertNotIn('chr001_bt02.anim', hashed)
+        self.assertIn('chr001.skel', hashed)
+
+    def test_summarize_diff(self):
+        summary = summarize_diff(diff_mods_files(self.mods_dir, self.dsdb_dir, self.cache))
+        self.assertEqual(summary[const.DiffStatus.UNCHANGED], (2, len(b'geometry') + len(b'image')))
+        self.assertEqual(summary[const.DiffStatus.NEW], (1, len(b'new animation')))
+        self.assertEqual(summary[const.DiffStatus.MODIFIED][0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
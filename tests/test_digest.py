@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import digest
+from DigiSModEditor.digest import DigestCache, hash_file
+
+
+class TestDigestCache(TestCase):
+    def setUp(self):
+        self.dir_path = Path(tempfile.mkdtemp())
+        self.cache = DigestCache(self.dir_path / 'digest_cache.sqlite3')
+        self.files = []
+        for i in range(5):
+            file_path = self.dir_path / f'chr00{i}.geom'
+            file_path.write_bytes(os.urandom(1024) * (i + 1))
+            self.files.append(file_path)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.dir_path)
+
+    def test_digests_match_file_content(self):
+        digests = self.cache.get_digests(self.files)
+        self.assertEqual(set(digests), set(self.files))
+        for file_path, file_digest in digests.items():
+            self.assertEqual(file_digest, hash_file(file_path))
+
+    def test_unchanged_files_are_not_hashed_again(self):
+        self.cache.get_digests(self.files)
+        with mock.patch.object(digest, 'hash_file', side_effect = AssertionError('hashed again')):
+            self.cache.get_digests(self.files)
+
+    def test_cache_is_persistent(self):
+        self.cache.get_digests(self.files)
+        with DigestCache(self.cache.db_path) as other_cache:
+            with mock.patch.object(digest, 'hash_file', side_effect = AssertionError('hashed again')):
+                other_cache.get_digests(self.files)
+
+    def test_changed_file_is_hashed_again(self):
+        old_digest = self.cache.get_digest(self.files[0])
+        self.files[0].write_bytes(b'modified')
+        self.assertNotEqual(self.cache.get_digest(self.files[0]), old_digest)
+        self.assertEqual(self.cache.get_digest(self.files[0]), hash_file(self.files[0]))
+
+    def test_file_rewritten_while_hashed_is_not_cached(self):
+        def _hash_file(file_path):
+            file_digest = hash_file(file_path)
+            Path(file_path).write_bytes(b'rewritten')
+            return file_digest
+
+        with mock.patch.object(digest, 'hash_file', _hash_file):
+            self.cache.get_digest(self.files[0])
+        self.assertEqual(self.cache._lookup([os.path.abspath(self.files[0])]), {})
+        self.assertEqual(self.cache.get_digest(self.files[0]), hash_file(self.files[0]))
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get_digest(self.dir_path / 'missing.geom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import tempfile
+import threading
+import time
+import unittest
+from unittest import TestCase
+
+from DigiSModEditor import constants as const
+from DigiSModEditor import errors as err
+from DigiSModEditor.threads import IoScheduler
+
+
+class TestIoScheduler(TestCase):
+    def setUp(self):
+        self.path = tempfile.gettempdir()
+        self.scheduler = IoScheduler(device_limit = 1)
+
+    def test_priority_order(self):
+        order = []
+        release = threading.Event()
+        blocker = self.scheduler.submit('blocker', const.IoJobClass.PACK, self.path, release.wait)
+        while blocker.state != const.IoJobState.RUNNING:
+            time.sleep(0.01)
+
+        jobs = [
+            self.scheduler.submit('scan', const.IoJobClass.BACKGROUND, self.path, order.append, 'scan'),
+            self.scheduler.submit('pack', const.IoJobClass.PACK, self.path, order.append, 'pack'),
+            self.scheduler.submit('transfer', const.IoJobClass.INTERACTIVE, self.path, order.append, 'transfer'),
+        ]
+        time.sleep(0.05)
+        self.assertEqual([o.name for o in self.scheduler.get_state()], ['blocker', 'transfer', 'pack', 'scan'])
+
+        release.set()
+        for o in jobs:
+            self.assertTrue(o.wait(5))
+        self.assertEqual(order, ['transfer', 'pack', 'scan'])
+        self.assertEqual(self.scheduler.get_state(), [])
+
+    def test_background_pauses_for_foreground(self):
+        events = []
+        scan_started = threading.Event()
+
+        def _scan():
+            scan_started.set()
+            for _ in range(20):
+                self.scheduler.checkpoint()
+                time.sleep(0.01)
+            events.append('scan')
+
+        scan_job = self.scheduler.submit('scan', const.IoJobClass.BACKGROUND, self.path, _scan)
+        scan_started.wait(5)
+        # the device allows a single job, the transfer starts once the scan pauses at a checkpoint
+        with self.scheduler.job('transfer', const.IoJobClass.INTERACTIVE, self.path) as job:
+            self.assertEqual(scan_job.state, const.IoJobState.PAUSED)
+            self.assertEqual(job.state, const.IoJobState.RUNNING)
+            time.sleep(0.05)
+            events.append('transfer')
+        self.assertTrue(scan_job.wait(5))
+        self.assertEqual(events, ['transfer', 'scan'])
+        self.assertEqual(scan_job.state, const.IoJobState.DONE)
+
+    def test_cancel_running_job(self):
+        started = threading.Event()
+
+        def _scan():
+            started.set()
+            while True:
+                self.scheduler.checkpoint()
+                time.sleep(0.01)
+
+        job = self.scheduler.submit('scan', const.IoJobClass.BACKGROUND, self.path, _scan)
+        started.wait(5)
+        self.scheduler.cancel(job)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, const.IoJobState.CANCELLED)
+
+    def test_failed_job(self):
+        with self.assertRaises(ValueError):
+            with self.scheduler.job('transfer', const.IoJobClass.INTERACTIVE, self.path):
+                raise ValueError('failed')
+        job = self.scheduler.submit('pack', const.IoJobClass.PACK, self.path, int, 'x')
+        self.assertTrue(job.wait(5))
+        self.assertEqual(job.state, const.IoJobState.FAILED)
+        self.assertIsInstance(job.error, ValueError)
+
+    def test_busy_device_timeout(self):
+        release = threading.Event()
+        blocker = self.scheduler.submit('pack', const.IoJobClass.PACK, self.path, release.wait)
+        while blocker.state != const.IoJobState.RUNNING:
+            time.sleep(0.01)
+        with self.assertRaises(err.IoJobBusy):
+            with self.scheduler.job('transfer', const.IoJobClass.INTERACTIVE, self.path, timeout = 0.05):
+                self.fail('the device is busy')
+        self.assertEqual([o.name for o in self.scheduler.get_state()], ['pack'])
+        release.set()
+        self.assertTrue(blocker.wait(5))
+        with self.scheduler.job('transfer', const.IoJobClass.INTERACTIVE, self.path, timeout = 0.05) as job:
+            self.assertEqual(job.state, const.IoJobState.RUNNING)
+
+    def test_checkpoint_outside_job(self):
+        self.scheduler.checkpoint()
+
+    def test_paused_background_does_not_start(self):
+        self.scheduler.pause_background()
+        job = self.scheduler.submit('scan', const.IoJobClass.BACKGROUND, self.path, lambda: None)
+        self.assertFalse(job.wait(0.1))
+        self.scheduler.resume_background()
+        self.assertTrue(job.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from PySide6.QtWidgets import QApplication
+
+from DigiSModEditor import core
+from DigiSModEditor import catalog
+from DigiSModEditor import layers
+from DigiSModEditor import threads as th
+
+
+def _write_files(dir_path: Path, file_names, content: bytes = b'base'):
+    for o in file_names:
+        path = dir_path / catalog.get_relative_file_path(o)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        path.write_bytes(content)
+
+
+def _touch_dir(dir_path: Path):
+    # make sure the directory stamp changes, whatever the file system time resolution
+    stat = os.stat(dir_path)
+    os.utime(dir_path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+class TestLayeredIndex(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.base_dir = self.temp_dir / 'DSDB'
+        self.patch_dir = self.temp_dir / 'Patch'
+        _write_files(self.base_dir, [
+            'chr001.name', 'chr001.geom', 'chr001.skel', 'chr001_bt01.anim', 'chr001_tex.img',
+            'chr002.name', 'chr002.geom', 'chr002.skel',
+        ])
+        _write_files(self.patch_dir, ['chr001.geom', 'chr001_wk01.anim', 'chr003.name', 'chr003.geom'], b'patch')
+        self.layered_index = layers.LayeredIndex([self.base_dir, self.patch_dir])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_later_layers_override(self):
+        name_list, files_text = self.layered_index.scan()
+        self.assertEqual(sorted(name_list), ['chr001.name', 'chr002.name', 'chr003.name'])
+        self.assertEqual(self.layered_index.get_file_path('chr001.geom'), self.patch_dir / 'chr001.geom')
+        self.assertEqual(self.layered_index.get_file_path('chr001.skel'), self.base_dir / 'chr001.skel')
+        self.assertEqual(self.layered_index.get_file_path('chr001_tex.img'), self.base_dir / 'images' / 'chr001_tex.img')
+
+        record = core.get_asset_record('chr001.name', files_text)
+        self.assertEqual(record.anim_suffixes, ('_bt01', '_wk01'))
+
+    def test_catalog_resolves_layers(self):
+        _, files_text = self.layered_index.scan()
+        asset_catalog = catalog.AssetCatalog(self.base_dir)
+        asset_catalog.set_layers(self.layered_index)
+        asset_catalog.add_asset_structure(core.get_asset_record('chr001.name', files_text))
+        paths = [asset_catalog.get_file_path(o) for o in asset_catalog.get('chr001').iter_files()]
+        self.assertIn(self.patch_dir / 'chr001_wk01.anim', paths)
+        self.assertEqual((self.patch_dir / 'chr001.geom').read_bytes(), asset_catalog.get_file_path('chr001.geom').read_bytes())
+
+    def test_only_changed_layers_are_walked(self):
+        scans = {}
+        with mock.patch.object(core, 'walk_asset_files', wraps = core.walk_asset_files) as walk:
+            layers.LayeredIndex([self.base_dir, self.patch_dir], scans).scan()
+            self.assertEqual(walk.call_count, 2)
+
+            # a new index over the same layers reuses their scans
+            layered_index = layers.LayeredIndex([self.base_dir, self.patch_dir], scans)
+            layered_index.scan()
+            self.assertEqual(walk.call_count, 2)
+
+            _write_files(self.patch_dir, ['chr002_bt01.anim'], b'patch')
+            _touch_dir(self.patch_dir)
+            old_winners = layered_index.winners
+            layered_index.scan()
+            self.assertEqual(walk.call_args[0][0], self.patch_dir)
+            self.assertEqual(walk.call_count, 3)
+            self.assertEqual(layered_index.get_changed_assets(old_winners), {'chr002'})
+
+    def test_invalidate_walks_again(self):
+        self.layered_index.scan()
+        with mock.patch.object(core, 'walk_asset_files', wraps = core.walk_asset_files) as walk:
+            # a file overwritten in place keeps the directory stamp
+            _write_files(self.patch_dir, ['chr003.geom'], b'changed')
+            self.layered_index.scan()
+            self.assertEqual(walk.call_count, 0)
+
+            self.layered_index.invalidate(self.patch_dir)
+            self.layered_index.scan()
+            self.assertEqual(walk.call_count, 1)
+
+            self.layered_index.invalidate()
+            self.layered_index.scan()
+            self.assertEqual(walk.call_count, 3)
+
+    def test_removed_asset_is_changed(self):
+        self.layered_index.scan()
+        old_winners = self.layered_index.winners
+        (self.patch_dir / 'chr003.name').unlink()
+        (self.patch_dir / 'chr003.geom').unlink()
+        _touch_dir(self.patch_dir)
+        name_list, _ = self.layered_index.scan()
+        self.assertNotIn('chr003.name', name_list)
+        self.assertEqual(self.layered_index.get_changed_assets(old_winners), {'chr003'})
+
+    def test_parse_layer_dirs(self):
+        text = os.pathsep.join([str(self.base_dir), f' {self.patch_dir} ', ''])
+        self.assertEqual(layers.parse_layer_dirs(text), [self.base_dir, self.patch_dir])
+
+
+class TestLayeredScanner(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.base_dir = self.temp_dir / 'DSDB'
+        self.patch_dir = self.temp_dir / 'Patch'
+        _write_files(self.base_dir, ['chr001.name', 'chr001.geom', 'chr002.name', 'chr002.geom'])
+        _write_files(self.patch_dir, ['chr003.name'], b'patch')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_rescan_sends_changed_assets(self):
+        scanner = th.ScannerThread(self.base_dir, layers.LayeredIndex([self.base_dir, self.patch_dir]))
+        deltas = []
+        scanner.assets_scanned.connect(deltas.append)
+
+        scanner.run()
+        self.assertEqual(sorted(o.stem for o in deltas[-1].records), ['chr001', 'chr002', 'chr003'])
+        self.assertEqual((deltas[-1].updated, deltas[-1].removed, deltas[-1].base_id), ([], [], None))
+
+        _write_files(self.patch_dir, ['chr001_bt01.anim'], b'patch')
+        (self.patch_dir / 'chr003.name').unlink()
+        _touch_dir(self.patch_dir)
+        scanner.run()
+        self.assertEqual(sorted(o.stem for o in deltas[-1].records), ['chr001', 'chr002'])
+        self.assertEqual([o.stem for o in deltas[-1].updated], ['chr001'])
+        self.assertEqual(deltas[-1].removed, ['chr003'])
+        self.assertEqual(deltas[-1].base_id, deltas[0].snapshot_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
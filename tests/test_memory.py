@@ -0,0 +1,110 @@
+import sys
+import unittest
+from unittest import TestCase
+
+from PySide6.QtWidgets import QApplication
+
+from DigiSModEditor import memory
+from DigiSModEditor.gui import models
+
+import synthetic_dsdb
+
+
+class TestEvictionCandidates(TestCase):
+    def test_least_recently_used_first(self):
+        entries = [
+            memory.EvictionEntry('DSDB', 500, 0.0, False),
+            memory.EvictionEntry('A', 300, 3.0, True),
+            memory.EvictionEntry('B', 300, 1.0, True),
+            memory.EvictionEntry('C', 300, 2.0, True),
+            memory.EvictionEntry('Current', 300, 0.5, False),
+        ]
+        self.assertEqual(memory.get_eviction_candidates(entries, 1200), ['B', 'C'])
+
+    def test_within_budget(self):
+        entries = [memory.EvictionEntry('A', 300, 1.0, True)]
+        self.assertEqual(memory.get_eviction_candidates(entries, 300), [])
+
+    def test_container_size_counts_shared_objects_once(self):
+        text = 'x' * 1000
+        self.assertLess(memory.get_container_size([text, text]), 2 * sys.getsizeof(text))
+        self.assertGreater(memory.get_container_size({'a': [text]}), sys.getsizeof(text))
+
+
+class TestModelMemory(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = models.AsukaModel('.')
+        for o in synthetic_dsdb.generate_asset_structures(50):
+            self.model.add_asset_item(o)
+
+    def test_memory_usage(self):
+        usage = self.model.get_memory_usage()
+        self.assertGreater(usage.items, 50 * 5)
+        self.assertEqual(usage.item_bytes, usage.items * memory.ESTIMATED_ITEM_BYTES)
+        self.assertEqual(
+            usage.total_bytes, usage.item_bytes + usage.string_bytes + usage.queue_bytes + usage.index_bytes
+        )
+        self.assertEqual(usage.queue_bytes, sys.getsizeof([]))
+
+    def test_memory_usage_estimate_is_close_to_exact(self):
+        usage = self.model.get_memory_usage()
+        exact = self.model.get_memory_usage(exact = True)
+        self.assertEqual((usage.items, usage.string_bytes), (exact.items, exact.string_bytes))
+        self.assertAlmostEqual(usage.index_bytes / exact.index_bytes, 1.0, delta = 0.25)
+        self.assertEqual(exact.queue_bytes, memory.get_container_size([]))
+
+    def test_memory_usage_follows_the_assets(self):
+        structures = synthetic_dsdb.generate_asset_structures(50)
+        usage = self.model.get_memory_usage()
+        self.model.remove_asset_item('chr000000')
+        self.assertLess(self.model.get_memory_usage().items, usage.items)
+        # replacing an asset doesn't count it twice
+        self.model.add_asset_item(structures[0])
+        self.model.add_asset_item(structures[0])
+        self.assertEqual(self.model.get_memory_usage(), usage)
+
+    def test_evict(self):
+        self.model.evict()
+        self.assertTrue(self.model.evicted)
+        self.assertEqual(self.model.rowCount(), 0)
+        self.assertEqual(self.model.get_memory_usage().items, 0)
+        self.assertIsNone(self.model.find_item_by_name('chr000000'))
+        self.assertEqual(self.model.search_assets('chr'), set())
+
+        self.model.add_asset_item(synthetic_dsdb.generate_asset_structures(1)[0])
+        self.assertFalse(self.model.evicted)
+        self.assertEqual(self.model.rowCount(), 1)
+
+
+class TestMemoryTracer(TestCase):
+    def test_snapshot_diff(self):
+        tracer = memory.MemoryTracer()
+        try:
+            self.assertEqual(tracer.snapshot('first'), [])
+            data = ['y' * 100 for _ in range(1000)]
+            diff = tracer.snapshot('second')
+            self.assertTrue(diff)
+            self.assertEqual(tracer.labels, ['first', 'second'])
+            del data
+        finally:
+            tracer.stop()
+        self.assertFalse(tracer.is_tracing())
+
+    def test_only_the_latest_snapshots_are_kept(self):
+        tracer = memory.MemoryTracer()
+        try:
+            for label in ('first', 'second', 'third'):
+                tracer.snapshot(label)
+            self.assertEqual(tracer.labels, ['second', 'third'])
+            with self.assertRaises(KeyError):
+                tracer.diff('first', 'third')
+        finally:
+            tracer.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+from unittest import TestCase, mock
+
+from PySide6.QtCore import Qt, QModelIndex
+from PySide6.QtWidgets import QApplication, QLineEdit, QTreeView
+
+from DigiSModEditor import core
+from DigiSModEditor import search
+from DigiSModEditor.gui import models, widgets
+
+
+def _get_records(count: int, anim_suffixes = ('_bt01',)):
+    return [core.AssetRecord(f'chr{i:03d}', anim_suffixes, ('_tex',)) for i in range(count)]
+
+
+class TestApplySnapshot(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = models.AsukaModel('.')
+        self.model._timer.stop()
+        self.model.apply_snapshot(_get_records(100))
+        # an empty model queues the first scan
+        while self.model._queue:
+            self.model.process_queue()
+        self.events = []
+        self.model.rowsInserted.connect(lambda *args: self.events.append('inserted'))
+        self.model.rowsRemoved.connect(lambda *args: self.events.append('removed'))
+        self.model.modelReset.connect(lambda: self.events.append('reset'))
+
+    def tearDown(self):
+        self.model.deleteLater()
+
+    def _get_names(self):
+        return [self.model.item(o).text() for o in range(self.model.rowCount())]
+
+    def test_unchanged_snapshot_is_a_no_op(self):
+        self.model.apply_snapshot(_get_records(100))
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.model.rowCount(), 100)
+
+    def test_small_diff_is_applied_in_place(self):
+        self.model.find_item_by_name('chr010').setCheckState(Qt.Checked)
+        records = _get_records(100)
+        records[10] = core.AssetRecord('chr010', ('_bt01', '_wk01'), ('_tex',))
+        del records[20]
+        records.append(core.AssetRecord('chr100', (), ('_tex',)))
+        self.model.apply_snapshot(records)
+
+        self.assertNotIn('reset', self.events)
+        self.assertEqual(self.events.count('inserted'), 2)
+        self.assertEqual(self._get_names(), [o.stem for o in sorted(records, key = lambda o: o.stem)])
+        item = self.model.find_item_by_name('chr010')
+        self.assertEqual(item.row(), 10)
+        self.assertEqual(item.checkState(), Qt.Checked)
+        self.assertIn('chr010_wk01.anim', list(self.model.get_files_name_by_asset_item(item)))
+        self.assertNotIn('chr020', self.model.search_assets('chr020'))
+
+    def test_large_diff_is_a_single_reset(self):
+        self.model.find_item_by_name('chr000').setCheckState(Qt.Checked)
+        records = _get_records(90, ('_bt01', '_wk01'))
+        self.model.apply_snapshot(records)
+
+        self.assertEqual(self.events, ['reset'])
+        self.assertEqual(self._get_names(), [o.stem for o in records])
+        self.assertEqual(self.model.find_item_by_name('chr000').checkState(), Qt.Checked)
+        self.assertIsNone(self.model.find_item_by_name('chr095'))
+
+    def test_changed_assets_are_rebuilt(self):
+        self.model.apply_snapshot(_get_records(100), {'chr005'})
+        self.assertEqual(self.events, ['removed', 'inserted'])
+
+
+class TestApplyDelta(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = models.AsukaModel('.')
+        self.model._timer.stop()
+        self.records = _get_records(100)
+        self.model.apply_delta(core.ScanDelta(self.records, [], [], None, 1))
+        while self.model._queue:
+            self.model.process_queue()
+        self.events = []
+        self.model.layoutChanged.connect(lambda *args: self.events.append('sorted'))
+        self.model.modelReset.connect(lambda: self.events.append('reset'))
+
+    def tearDown(self):
+        self.model.deleteLater()
+
+    def _get_names(self):
+        return [self.model.item(o).text() for o in range(self.model.rowCount())]
+
+    def test_delta_is_applied_without_sorting(self):
+        added = [core.AssetRecord('chr0505', (), ('_tex',)), core.AssetRecord('chr000', ('_wk01',), ('_tex',))]
+        records = [*self.records[1:], *added]
+        with mock.patch.object(self.model._catalog, 'has_same_files') as has_same_files:
+            self.model.apply_delta(core.ScanDelta(records, added, ['chr001'], 1, 2))
+        # the scanner thread already compared the scans
+        has_same_files.assert_not_called()
+        self.assertEqual(self.events, [])
+        self.assertEqual(self._get_names(), sorted((o.stem for o in records if o.stem != 'chr001'), key = search.natural_sort_key))
+        self.assertIn('chr000_wk01.anim', list(self.model.get_files_name_by_asset_item(self.model.find_item_by_name('chr000'))))
+
+    def test_delta_of_another_snapshot_compares_every_record(self):
+        records = [*self.records, core.AssetRecord('chr100', (), ('_tex',))]
+        self.model.remove_asset_item('chr050')
+        self.model.evict()
+        self.model.apply_delta(core.ScanDelta(records, records[-1:], [], 1, 2))
+        while self.model._queue:
+            self.model.process_queue()
+        self.assertEqual(self._get_names(), [o.stem for o in records])
+
+        # the model applied the snapshot 2, not 3
+        self.model.apply_delta(core.ScanDelta(self.records, [], ['chr100'], 3, 4))
+        self.assertEqual(self._get_names(), [o.stem for o in self.records])
+
+    def test_added_asset_is_inserted_sorted(self):
+        self.model.add_asset_item(core.AssetRecord('chr042a', (), ()))
+        self.assertEqual(self.model.find_item_by_name('chr042a').row(), 43)
+        self.assertEqual(self.events, [])
+
+
+class TestAssetTreeViewState(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = models.AsukaModel('.')
+        self.model._timer.stop()
+        self.model.apply_snapshot(_get_records(100))
+        while self.model._queue:
+            self.model.process_queue()
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.model)
+        self.expansion = widgets.AssetTreeExpansion(self.tree_view)
+
+    def tearDown(self):
+        self.tree_view.deleteLater()
+        self.model.deleteLater()
+
+    def _expand(self, asset_name: str):
+        item = self.model.find_item_by_name(asset_name)
+        self.tree_view.expand(item.index())
+        self.tree_view.expand(item.child(0).index())
+
+    def _is_expanded(self, asset_name: str) -> bool:
+        item = self.model.find_item_by_name(asset_name)
+        return self.tree_view.isExpanded(item.index()) and self.tree_view.isExpanded(item.child(0).index())
+
+    def test_replaced_rows_stay_expanded(self):
+        self._expand('chr010')
+        records = _get_records(100)
+        records[10] = core.AssetRecord('chr010', ('_bt01', '_wk01'), ('_tex',))
+        self.model.apply_snapshot(records)
+        self.assertTrue(self._is_expanded('chr010'))
+
+    def test_rows_stay_expanded_after_reset(self):
+        self._expand('chr001')
+        self._expand('chr050')
+        self.tree_view.collapse(self.model.find_item_by_name('chr050').index())
+        self.model.apply_snapshot(_get_records(100, ('_wk01',)))
+        self.assertTrue(self._is_expanded('chr001'))
+        self.assertFalse(self.tree_view.isExpanded(self.model.find_item_by_name('chr050').index()))
+
+    def test_rows_stay_filtered_after_reset(self):
+        search_txt = QLineEdit()
+        widgets.AssetTreeFilter(search_txt, self.tree_view)
+        search_txt.setText('chr01')
+        self.model.apply_snapshot(_get_records(100, ('_wk01',)))
+        hidden = [o for o in range(self.model.rowCount()) if self.tree_view.isRowHidden(o, QModelIndex())]
+        self.assertEqual(len(hidden), 90)
+        self.assertFalse(self.tree_view.isRowHidden(self.model.find_item_by_name('chr015').row(), QModelIndex()))
+        search_txt.deleteLater()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import core
+from DigiSModEditor.digest import DigestCache
+
+
+class TestPackProjectMods(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        self.dsdb_dir.mkdir()
+        self.dest_dir = self.temp_dir / 'PackedMods'
+        self.dest_dir.mkdir()
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        self.project_dir = self.temp_dir / 'TestMods'
+        self.cache = DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+
+        for name in ('chr001.geom', 'chr001.skel'):
+            (self.dsdb_dir / name).write_bytes(b'original ' * 100)
+            (self.project_dir / 'modfiles' / name).write_bytes(b'original ' * 100)
+        (self.project_dir / 'modfiles' / 'chr001.skel').write_bytes(b'modified ' * 100)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_pack_all_files(self):
+        pack_result = core.pack_project_mods(self.project_dir, self.dest_dir, 'TestMods.zip')
+        with zipfile.ZipFile(pack_result.zip_file) as zip_file:
+            names = set(zip_file.namelist())
+        self.assertEqual(names, {'METADATA.json', 'DESCRIPTION.html', 'modfiles/chr001.geom', 'modfiles/chr001.skel'})
+        self.assertEqual(pack_result.bytes_saved, 0)
+
+    def test_delta_pack_skips_unchanged_files(self):
+        pack_result = core.pack_project_mods(
+            self.project_dir, self.dest_dir, 'TestMods.zip', dsdb_dir = self.dsdb_dir, cache = self.cache
+        )
+        with zipfile.ZipFile(pack_result.zip_file) as zip_file:
+            names = set(zip_file.namelist())
+        self.assertEqual(names, {'METADATA.json', 'DESCRIPTION.html', 'modfiles/chr001.skel'})
+        self.assertEqual(pack_result.skipped_files, 1)
+        self.assertEqual(pack_result.bytes_saved, len(b'original ' * 100))
+
+    def test_failed_pack_removes_zip(self):
+        with mock.patch.object(zipfile.ZipFile, 'write', side_effect = OSError('No space left on device')):
+            with self.assertRaises(OSError):
+                core.pack_project_mods(self.project_dir, self.dest_dir, 'TestMods.zip')
+        self.assertFalse((self.dest_dir / 'TestMods.zip').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import logging
+import unittest
+from unittest import TestCase, mock
+
+from DigiSModEditor import utils as utl
+
+
+class TestRateLimitedLog(TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('DigiSModEditor.test_rate_limited_log')
+        self.logger.setLevel(logging.INFO)
+
+    def test_messages_within_interval_are_counted(self):
+        rate_log = utl.RateLimitedLog(self.logger, interval = 60.0)
+        with self.assertLogs(self.logger, logging.INFO) as cm:
+            for i in range(100):
+                rate_log.info('Found asset file: %s', i)
+        self.assertEqual(cm.output, ['INFO:DigiSModEditor.test_rate_limited_log:Found asset file: 0'])
+        self.assertEqual(rate_log.suppressed, 99)
+
+    def test_suppressed_count_is_reported(self):
+        rate_log = utl.RateLimitedLog(self.logger, interval = 1.0)
+        with mock.patch('time.monotonic', side_effect = [10.0, 10.5, 10.6, 12.0]), \
+                self.assertLogs(self.logger, logging.INFO) as cm:
+            for i in range(4):
+                rate_log.info('Found asset file: %s', i)
+        self.assertEqual(len(cm.output), 2)
+        self.assertTrue(cm.output[1].endswith('Found asset file: 3 (+2 similar messages)'))
+        self.assertEqual(rate_log.suppressed, 0)
+
+    def test_disabled_level_is_not_formatted(self):
+        rate_log = utl.RateLimitedLog(self.logger)
+        argument = mock.MagicMock()
+        rate_log.debug('Process queue: %s', argument)
+        argument.__str__.assert_not_called()
+        self.assertEqual(rate_log.suppressed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+from DigiSModEditor.digest import DigestCache
+from DigiSModEditor.references import ReferenceManifest
+
+
+class TestReferences(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        (self.dsdb_dir / 'images').mkdir(parents = True)
+        self.dest_dir = self.temp_dir / 'PackedMods'
+        self.dest_dir.mkdir()
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        self.project_dir = self.temp_dir / 'TestMods'
+        self.mods_dir = self.project_dir / 'modfiles'
+        self.cache = DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+
+        for name in ('chr001.name', 'chr001.geom', 'chr001.skel'):
+            (self.dsdb_dir / name).write_bytes(b'original ' * 100)
+        (self.dsdb_dir / 'images' / 'chr001.img').write_bytes(b'image ' * 100)
+
+        self.manifest = ReferenceManifest.load(self.project_dir)
+        for name in ('chr001.name', 'chr001.geom', 'chr001.skel'):
+            core.reference_asset_file(self.dsdb_dir, self.mods_dir, name, self.manifest, cache = self.cache)
+        core.reference_asset_file(
+            self.dsdb_dir / 'images', self.mods_dir / 'images', 'chr001.img', self.manifest, cache = self.cache
+        )
+        self.manifest.save()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_reference_is_recorded_without_copy(self):
+        manifest = ReferenceManifest.load(self.project_dir)
+        self.assertEqual(len(manifest), 4)
+        self.assertIn('images/chr001.img', manifest)
+        self.assertEqual(manifest.get_source('chr001.geom'), self.dsdb_dir / 'chr001.geom')
+        self.assertFalse((self.mods_dir / 'chr001.geom').exists())
+
+    def test_reference_keeps_modified_file(self):
+        (self.mods_dir / 'chr002.geom').write_bytes(b'modified ' * 100)
+        (self.dsdb_dir / 'chr002.geom').write_bytes(b'original ' * 100)
+        result = core.reference_asset_file(
+            self.dsdb_dir, self.mods_dir, 'chr002.geom', self.manifest, cache = self.cache
+        )
+        self.assertFalse(result.success)
+        self.assertEqual((self.mods_dir / 'chr002.geom').read_bytes(), b'modified ' * 100)
+        self.assertNotIn('chr002.geom', self.manifest)
+
+        # an unmodified copy is replaced by the reference
+        (self.mods_dir / 'chr002.geom').write_bytes(b'original ' * 100)
+        result = core.reference_asset_file(
+            self.dsdb_dir, self.mods_dir, 'chr002.geom', self.manifest, cache = self.cache
+        )
+        self.assertTrue(result.success)
+        self.assertFalse((self.mods_dir / 'chr002.geom').exists())
+        self.assertIn('chr002.geom', self.manifest)
+
+    def test_scan_includes_referenced_files(self):
+        name_list, files_text = core.walk_asset_files(self.mods_dir)
+        self.assertEqual(name_list, ['chr001.name'])
+        self.assertEqual(set(files_text.split(';')), {'chr001.name', 'chr001.geom', 'chr001.skel', 'chr001.img'})
+
+    def test_prepare_for_edit_materializes_reference(self):
+        file_path = core.prepare_asset_file_for_edit(self.mods_dir / 'chr001.skel')
+        self.assertEqual(file_path.read_bytes(), b'original ' * 100)
+        manifest = ReferenceManifest.load(self.project_dir)
+        self.assertNotIn('chr001.skel', manifest)
+        self.assertEqual(len(manifest), 3)
+
+    def test_empty_manifest_removes_file(self):
+        for relative_path, _ in list(self.manifest.items()):
+            core.materialize_reference(self.manifest, relative_path)
+        self.assertFalse(self.manifest.manifest_file.exists())
+
+    def test_pack_resolves_references(self):
+        pack_result = core.pack_project_mods(self.project_dir, self.dest_dir, 'TestMods.zip')
+        with zipfile.ZipFile(pack_result.zip_file) as zip_file:
+            names = set(zip_file.namelist())
+            self.assertEqual(zip_file.read('modfiles/images/chr001.img'), b'image ' * 100)
+        self.assertEqual(names, {
+            'METADATA.json', 'DESCRIPTION.html', 'modfiles/chr001.name', 'modfiles/chr001.geom',
+            'modfiles/chr001.skel', 'modfiles/images/chr001.img',
+        })
+
+    def test_delta_pack_skips_references(self):
+        core.prepare_asset_file_for_edit(self.mods_dir / 'chr001.skel')
+        (self.mods_dir / 'chr001.skel').write_bytes(b'modified ' * 100)
+        pack_result = core.pack_project_mods(
+            self.project_dir, self.dest_dir, 'TestMods.zip', dsdb_dir = self.dsdb_dir, cache = self.cache
+        )
+        with zipfile.ZipFile(pack_result.zip_file) as zip_file:
+            names = set(zip_file.namelist())
+        self.assertEqual(names, {'METADATA.json', 'DESCRIPTION.html', 'modfiles/chr001.skel'})
+        self.assertEqual(pack_result.skipped_files, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
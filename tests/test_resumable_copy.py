@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import core, digest, resumable
+
+CHUNK_SIZE = 1024
+
+
+class Interrupted(Exception):
+    pass
+
+
+class TestResumableCopy(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.src_path = self.temp_dir / 'chr001.geom'
+        self.src_path.write_bytes(os.urandom(CHUNK_SIZE * 10 + 100))
+        self.dest_path = self.temp_dir / 'modfiles' / 'chr001.geom'
+        self.dest_path.parent.mkdir()
+        self.partial_path, self.journal_path = resumable.get_partial_files(self.dest_path)
+        # the verified copies hash through the application digest cache, keep it out of the user's directory
+        self.cache = digest.DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+        patcher = mock.patch.object(digest, '_digest_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _interrupt_after(self, chunks: int):
+        calls = []
+
+        def _checkpoint():
+            if len(calls) == chunks:
+                raise Interrupted()
+            calls.append(None)
+
+        with self.assertRaises(Interrupted):
+            resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE, checkpoint = _checkpoint)
+
+    def test_copy_in_chunks(self):
+        progress = []
+        copied = resumable.copy_file_resumable(
+            self.src_path, self.dest_path, CHUNK_SIZE, on_progress = lambda *args: progress.append(args)
+        )
+        self.assertEqual(copied, self.src_path.stat().st_size)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+        self.assertEqual(len(progress), 11)
+        self.assertEqual(progress[-1], (copied, copied))
+        self.assertFalse(self.partial_path.exists())
+        self.assertFalse(self.journal_path.exists())
+
+    def test_interrupted_copy_keeps_destination(self):
+        self.dest_path.write_bytes(b'previous')
+        self._interrupt_after(4)
+        self.assertEqual(self.dest_path.read_bytes(), b'previous')
+        self.assertEqual(self.partial_path.stat().st_size, CHUNK_SIZE * 4)
+        self.assertTrue(resumable.is_partial_file(self.partial_path))
+        self.assertTrue(resumable.is_partial_file(self.journal_path))
+
+    def test_resume_from_last_checkpoint(self):
+        self._interrupt_after(4)
+        copied = resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        self.assertEqual(copied, self.src_path.stat().st_size - CHUNK_SIZE * 4)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+
+    def test_resume_from_last_verified_chunk(self):
+        self._interrupt_after(4)
+        # the last chunk got corrupted, e.g. not flushed before a crash
+        with open(self.partial_path, 'r+b') as f:
+            f.seek(CHUNK_SIZE * 3)
+            f.write(b'\0' * 10)
+        copied = resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        self.assertEqual(copied, self.src_path.stat().st_size - CHUNK_SIZE * 3)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+
+    def test_restart_when_source_changed(self):
+        self._interrupt_after(4)
+        self.src_path.write_bytes(os.urandom(CHUNK_SIZE * 3))
+        copied = resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        self.assertEqual(copied, CHUNK_SIZE * 3)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+
+    def test_journal_records_chunks(self):
+        self._interrupt_after(2)
+        with open(self.journal_path) as f:
+            journal = json.load(f)
+        self.assertEqual(journal['size'], self.src_path.stat().st_size)
+        self.assertEqual(journal['chunk_size'], CHUNK_SIZE)
+        self.assertEqual(len(journal['chunk_digests']), 2)
+
+    @mock.patch.object(resumable, 'JOURNAL_CHUNKS', 4)
+    def test_journal_is_committed_every_few_chunks(self):
+        with mock.patch.object(resumable, '_write_journal', wraps = resumable._write_journal) as write_journal:
+            resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        # 11 chunks, the completed copy needs no journal
+        self.assertEqual(write_journal.call_count, 2)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+
+    @mock.patch.object(resumable, 'JOURNAL_CHUNKS', 4)
+    def test_interrupted_copy_commits_the_journal(self):
+        self._interrupt_after(6)
+        with open(self.journal_path) as f:
+            self.assertEqual(len(json.load(f)['chunk_digests']), 6)
+        copied = resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        self.assertEqual(copied, self.src_path.stat().st_size - CHUNK_SIZE * 6)
+
+    def test_replace_read_only_destination(self):
+        self.dest_path.write_bytes(b'previous')
+        os.chmod(self.dest_path, stat.S_IREAD)
+        replace = os.replace
+
+        def _replace(src, dest):
+            # like Windows, a read only file can be renamed but not replaced
+            if os.path.exists(dest) and not os.stat(dest).st_mode & stat.S_IWRITE:
+                raise PermissionError(f'Access is denied: {dest}')
+            replace(src, dest)
+
+        with mock.patch.object(os, 'replace', _replace):
+            resumable.copy_file_resumable(self.src_path, self.dest_path, CHUNK_SIZE)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+        self.assertEqual(sorted(o.name for o in self.dest_path.parent.iterdir()), [self.dest_path.name])
+
+    def test_copy_asset_file_uses_resumable_copy(self):
+        self.dest_path.write_bytes(b'previous')
+        with mock.patch.object(resumable, 'LARGE_FILE_SIZE', CHUNK_SIZE):
+            result = core.copy_asset_file(self.temp_dir, self.dest_path.parent, self.src_path.name, verify = True)
+        self.assertTrue(result.success)
+        self.assertEqual(self.dest_path.read_bytes(), self.src_path.read_bytes())
+        self.assertFalse(self.dest_path.with_name(f'{self.dest_path.name}.old').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
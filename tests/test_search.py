@@ -0,0 +1,78 @@
+import unittest
+from unittest import TestCase
+
+from DigiSModEditor.search import AssetSearchIndex, natural_sort_key, get_anim_code
+
+
+def make_asset_groups(asset_name, anim_codes = ()):
+    return {
+        'Name': [f'{asset_name}.name'],
+        'Geometry': [f'{asset_name}.geom'],
+        'Skeleton': [f'{asset_name}.skel'],
+        'Animation': [f'{asset_name}_{o}.anim' for o in anim_codes],
+        'Image': [],
+    }
+
+
+class TestNaturalSortKey(TestCase):
+    def test_numbers_are_sorted_by_value(self):
+        names = ['chr10', 'chr2', 'chr1']
+        self.assertEqual(sorted(names, key = natural_sort_key), ['chr1', 'chr2', 'chr10'])
+
+    def test_key_is_case_insensitive(self):
+        self.assertEqual(natural_sort_key('CHR001'), natural_sort_key('chr001'))
+
+
+class TestGetAnimCode(TestCase):
+    def test_anim_code(self):
+        self.assertEqual(get_anim_code('chr001_bt01.anim'), 'bt01')
+
+    def test_no_anim_code(self):
+        self.assertEqual(get_anim_code('chr001.anim'), '')
+        self.assertEqual(get_anim_code('chr001.geom'), '')
+
+
+class TestAssetSearchIndex(TestCase):
+    def setUp(self):
+        self.index = AssetSearchIndex()
+        self.index.add_asset('chr001', make_asset_groups('chr001', ('bt01', 'fi01')))
+        self.index.add_asset('chr002', make_asset_groups('chr002', ('bt02',)))
+        self.index.add_asset('mob010', make_asset_groups('mob010'))
+
+    def test_empty_query_returns_all_assets(self):
+        self.assertEqual(self.index.search(''), {'chr001', 'chr002', 'mob010'})
+
+    def test_search_by_name(self):
+        self.assertEqual(self.index.search('chr00'), {'chr001', 'chr002'})
+        self.assertEqual(self.index.search('MOB'), {'mob010'})
+
+    def test_search_by_anim_code(self):
+        self.assertEqual(self.index.search('bt01'), {'chr001'})
+        self.assertEqual(self.index.search('bt0'), {'chr001', 'chr002'})
+
+    def test_short_query_matches_name_prefix(self):
+        self.assertEqual(self.index.search('mo'), {'mob010'})
+        self.assertEqual(self.index.search('C'), {'chr001', 'chr002'})
+        self.assertEqual(self.index.search('2'), set())
+
+    def test_refined_query_uses_previous_result(self):
+        self.assertEqual(self.index.search('chr'), {'chr001', 'chr002'})
+        self.assertEqual(self.index.search('chr002_b'), {'chr002'})
+        self.assertEqual(self.index.search('mob'), {'mob010'})
+
+    def test_replace_and_remove_asset(self):
+        self.index.add_asset('chr001', make_asset_groups('chr001'))
+        self.assertEqual(self.index.search('bt01'), set())
+
+        self.index.remove_asset('chr002')
+        self.assertEqual(self.index.search('chr'), {'chr001'})
+        self.assertNotIn('chr002', self.index)
+
+    def test_matches(self):
+        self.assertTrue(self.index.matches('chr001', 'fi01'))
+        self.assertFalse(self.index.matches('chr002', 'fi01'))
+        self.assertTrue(self.index.matches('chr002', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import core
+from DigiSModEditor import catalog
+from DigiSModEditor import service
+from DigiSModEditor import digest
+from DigiSModEditor import errors as err
+from DigiSModEditor import constants as const
+
+import synthetic_dsdb
+
+
+@unittest.skipUnless(service.is_supported(), 'Unix domain sockets are not supported')
+class TestCatalogService(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        synthetic_dsdb.generate_dsdb(self.dsdb_dir, 200)
+        self.socket_path = self.temp_dir / 'service.sock'
+        # the diff and pack requests would otherwise hash into the digest cache of the user
+        self.cache = digest.DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+        self.service = service.CatalogService(self.socket_path, self.cache)
+        self.thread = threading.Thread(target = self.service.serve_forever, daemon = True)
+        self.thread.start()
+        for _ in range(100):
+            self.client = service.connect(self.socket_path)
+            if self.client is not None:
+                break
+            time.sleep(0.01)
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            self.client.shutdown()
+            self.thread.join(5)
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_index_is_cached(self):
+        name_list, files_text = core.walk_asset_files(self.dsdb_dir)
+        with mock.patch.object(core, 'walk_asset_files', wraps = core.walk_asset_files) as walk:
+            self.assertEqual(self.client.get_index(self.dsdb_dir), (name_list, files_text))
+            self.assertEqual(self.client.get_index(self.dsdb_dir), (name_list, files_text))
+            self.assertEqual(walk.call_count, 1)
+        self.assertEqual(self.client.ping()['requests']['index'], 2)
+
+    def test_walk_does_not_hold_the_lock(self):
+        other_dir = self.temp_dir / 'Other'
+        synthetic_dsdb.generate_dsdb(other_dir, 10)
+        walking = threading.Event()
+        release = threading.Event()
+        walk_asset_files = core.walk_asset_files
+
+        def _slow_walk(dir_path, *args):
+            if Path(dir_path) == self.dsdb_dir:
+                walking.set()
+                release.wait(5)
+            return walk_asset_files(dir_path, *args)
+
+        with mock.patch.object(core, 'walk_asset_files', side_effect = _slow_walk):
+            slow = threading.Thread(target = self.service.get_index, args = (str(self.dsdb_dir),))
+            slow.start()
+            self.assertTrue(walking.wait(5))
+            # answered while the other directory is still being walked
+            self.assertEqual(self.service.get_index(str(other_dir)), walk_asset_files(other_dir))
+            self.assertTrue(slow.is_alive())
+            release.set()
+            slow.join(5)
+        self.assertEqual(self.service.get_index(str(self.dsdb_dir)), walk_asset_files(self.dsdb_dir))
+
+    def test_query(self):
+        expected = [o.to_dict() for o in catalog.create_catalog(self.dsdb_dir, with_sizes = True).query(prefix = 'chr')]
+        self.assertEqual(self.client.query(self.dsdb_dir, prefix = 'chr'), expected)
+        self.assertTrue(expected)
+
+    def test_transfer(self):
+        dest_dir = self.temp_dir / 'Copy'
+        results = self.client.transfer(self.dsdb_dir, dest_dir, ['chr000000.name', 'missing.name'])
+        self.assertEqual([o.success for o in results], [True, False])
+        self.assertTrue((dest_dir / 'chr000000.name').exists())
+
+    def test_diff_uses_the_service_cache(self):
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        modfiles_dir = self.temp_dir / 'TestMods' / 'modfiles'
+        shutil.copy(self.dsdb_dir / 'chr000000.name', modfiles_dir)
+        (modfiles_dir / 'zzz000000.name').write_bytes(b'new')
+        with mock.patch.object(digest, 'get_digest_cache', side_effect = AssertionError('application digest cache')):
+            diffs = self.client.diff(self.temp_dir / 'TestMods', self.dsdb_dir)
+        self.assertEqual(
+            {o.relative_path: o.status for o in diffs},
+            {'chr000000.name': const.DiffStatus.UNCHANGED, 'zzz000000.name': const.DiffStatus.NEW}
+        )
+        self.assertEqual(len(self.cache._lookup([str(modfiles_dir / 'chr000000.name')])), 1)
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(err.ServiceError):
+            self.client.request('unknown')
+        with self.assertRaises(err.ServiceError):
+            self.client.pack(self.dsdb_dir, self.temp_dir, 'DSDB.zip')
+
+    def test_single_service(self):
+        with self.assertRaises(err.ServiceError):
+            service.CatalogService(self.socket_path).serve_forever()
+
+    def test_shutdown(self):
+        self.client.shutdown()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(self.socket_path.exists())
+        self.assertIsNone(service.connect(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
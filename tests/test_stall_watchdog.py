@@ -0,0 +1,77 @@
+import logging
+import time
+import unittest
+from unittest import TestCase
+
+from PySide6.QtCore import QCoreApplication, QTimer
+
+from DigiSModEditor import constants as const
+from DigiSModEditor.threads import StallWatchdog
+
+
+def _blocking_slot():
+    time.sleep(0.3)
+
+
+class TestStallWatchdog(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.watchdog = StallWatchdog(0.1)
+
+    def tearDown(self):
+        self.watchdog.stop()
+
+    def _run_event_loop(self, duration_ms: int):
+        QTimer.singleShot(duration_ms, self.app.quit)
+        self.app.exec()
+
+    def test_stall_is_recorded_with_stack(self):
+        self.watchdog.start()
+        QTimer.singleShot(50, _blocking_slot)
+        self._run_event_loop(600)
+        stalls = self.watchdog.stalls
+        self.assertEqual(len(stalls), 1)
+        self.assertGreater(stalls[0].duration, 0.15)
+        self.assertLess(stalls[0].duration, 0.5)
+        self.assertIn('_blocking_slot', stalls[0].stack)
+
+    def test_stall_is_logged_before_the_event_loop_resumes(self):
+        logged_during_stall = []
+
+        def hanging_slot():
+            time.sleep(0.4)
+            logged_during_stall.extend(record.getMessage() for record in logs.records)
+
+        self.watchdog.start()
+        with self.assertLogs(const.LogName.THREAD, logging.WARNING) as logs:
+            QTimer.singleShot(50, hanging_slot)
+            self._run_event_loop(700)
+        self.assertEqual(len(logged_during_stall), 1)
+        self.assertIn('stalled for more than 100 ms', logged_during_stall[0])
+        self.assertIn('hanging_slot', logged_during_stall[0])
+        self.assertIn('resumed after a stall', logs.records[-1].getMessage())
+
+    def test_stalls_are_capped(self):
+        watchdog = StallWatchdog(0.1, max_stalls = 2)
+        with self.assertLogs(const.LogName.THREAD, logging.WARNING):
+            for beat in range(3):
+                watchdog._record(float(beat), beat + 0.5, str(beat))
+        self.assertEqual([stall.stack for stall in watchdog.stalls], ['1', '2'])
+
+    def test_idle_event_loop_has_no_stall(self):
+        self.watchdog.start()
+        self._run_event_loop(300)
+        self.assertEqual(self.watchdog.stalls, [])
+
+    def test_start_and_stop(self):
+        self.watchdog.start()
+        self.assertTrue(self.watchdog.is_running())
+        self.watchdog.stop()
+        self.assertFalse(self.watchdog.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import core
+from DigiSModEditor import store
+from DigiSModEditor.digest import DigestCache
+from DigiSModEditor.store import SharedAssetStore, detach_file
+
+
+@mock.patch.object(store, '_reflink', return_value = False)
+class TestSharedAssetStore(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        self.dsdb_dir.mkdir()
+        (self.dsdb_dir / 'chr001.geom').write_bytes(os.urandom(4096))
+        self.cache = DigestCache(self.temp_dir / 'digest_cache.sqlite3')
+        self.store = SharedAssetStore(self.temp_dir / 'SharedStore', self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def copy_to_mods(self, mods_name):
+        mods_dir = self.temp_dir / mods_name / 'modfiles'
+        result = core.copy_asset_file(self.dsdb_dir, mods_dir, 'chr001.geom', store = self.store)
+        self.assertTrue(result.success)
+        return result.destination
+
+    def test_files_are_stored_once(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        second = self.copy_to_mods('ModsB')
+        self.assertEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+        self.assertEqual(first.read_bytes(), (self.dsdb_dir / 'chr001.geom').read_bytes())
+        # the DSDB file itself is never linked
+        self.assertEqual(os.stat(self.dsdb_dir / 'chr001.geom').st_nlink, 1)
+
+    def test_detach_before_edit(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        second = self.copy_to_mods('ModsB')
+        self.assertTrue(detach_file(first))
+        self.assertFalse(detach_file(first))
+        first.write_bytes(b'modified')
+        self.assertNotEqual(second.read_bytes(), b'modified')
+
+    def test_linked_files_are_read_only(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        self.assertEqual(stat.S_IMODE(os.stat(first).st_mode), store.OBJECT_MODE)
+        detach_file(self.copy_to_mods('ModsB'))
+        self.assertTrue(os.stat(self.temp_dir / 'ModsB' / 'modfiles' / 'chr001.geom').st_mode & stat.S_IWUSR)
+
+    def test_modified_object_is_quarantined(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        # an external tool writing through the link, e.g. as a user allowed to change the mode
+        os.chmod(first, 0o644)
+        first.write_bytes(b'modified')
+        second = self.copy_to_mods('ModsB')
+        self.assertEqual(second.read_bytes(), (self.dsdb_dir / 'chr001.geom').read_bytes())
+        self.assertNotEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+        self.assertEqual(len(list((self.store.store_dir / 'quarantine').iterdir())), 1)
+
+    def test_replace_shared_file(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        self.copy_to_mods('ModsA')
+        self.assertEqual(first.read_bytes(), (self.dsdb_dir / 'chr001.geom').read_bytes())
+
+    def test_prune_unused_objects(self, mock_reflink):
+        first = self.copy_to_mods('ModsA')
+        self.assertEqual(self.store.prune(), 0)
+        os.remove(first)
+        self.assertEqual(self.store.prune(), 4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
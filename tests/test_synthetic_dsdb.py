@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+
+import synthetic_dsdb
+import scale_benchmark
+
+
+class TestSyntheticDsdb(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_generated_assets_are_scanned(self):
+        dsdb_dir = self.temp_dir / 'DSDB'
+        stems = synthetic_dsdb.generate_dsdb(dsdb_dir, 500)
+        name_list, files_text = core.walk_asset_files(dsdb_dir)
+        self.assertEqual(sorted(name_list), sorted(f'{o}.name' for o in stems))
+        self.assertGreaterEqual(len(files_text.split(';')), 500)
+
+        asset_files = core.get_asset_related_files(f'{stems[0]}.name', files_text)[stems[0]]
+        self.assertTrue(asset_files['Image'])
+        for o in asset_files['Animation']:
+            self.assertTrue((dsdb_dir / o).exists())
+
+    def test_generation_is_reproducible(self):
+        stems = synthetic_dsdb.generate_dsdb(self.temp_dir / 'A', 200, seed = 1)
+        other_stems = synthetic_dsdb.generate_dsdb(self.temp_dir / 'B', 200, seed = 1)
+        self.assertEqual(stems, other_stems)
+        self.assertEqual(core.walk_asset_files(self.temp_dir / 'A'), core.walk_asset_files(self.temp_dir / 'B'))
+
+    def test_generated_project_mods(self):
+        dsdb_dir = self.temp_dir / 'DSDB'
+        stems = synthetic_dsdb.generate_dsdb(dsdb_dir, 200)
+        project_dir = synthetic_dsdb.generate_project_mods(self.temp_dir, 'Mods', dsdb_dir, stems[:5])
+        self.assertTrue(core.is_project_mods_directory(project_dir))
+        self.assertTrue((project_dir / 'modfiles' / f'{stems[0]}.name').exists())
+
+
+class TestCompareResults(TestCase):
+    def test_regression_beyond_tolerance(self):
+        baseline = {'tolerance': 1.5, 'tolerances': {'copy': 2.0}, 'results': {
+            '1000': {'scan': {'seconds': 0.1}, 'copy': {'seconds': 0.1}, 'group': {'seconds': 0.001}},
+        }}
+        report = {'results': {
+            '1000': {'scan': {'seconds': 0.16}, 'copy': {'seconds': 0.16}, 'group': {'seconds': 0.003}},
+        }}
+        regressions = scale_benchmark.compare_results(report, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('scan at 1000 files'))
+
+
+if __name__ == '__main__':
+    unittest.main()
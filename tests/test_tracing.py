@@ -0,0 +1,86 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from DigiSModEditor import core
+from DigiSModEditor import decorators as deco
+
+
+@deco.traced
+def _traced_function(value):
+    deco.trace_add(items = 1, bytes = value)
+    return value * 2
+
+
+class TestTracing(TestCase):
+    def setUp(self):
+        deco.reset_traces()
+        deco.set_tracing(True)
+
+    def tearDown(self):
+        deco.set_tracing(False)
+        deco.reset_traces()
+
+    def test_traced_function(self):
+        self.assertEqual(_traced_function(10), 20)
+        self.assertEqual(_traced_function(5), 10)
+        stats = deco.get_trace_stats()['test_tracing._traced_function']
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['items'], 2)
+        self.assertEqual(stats['bytes'], 15)
+        self.assertEqual(sum(stats['histogram_us'].values()), 2)
+        self.assertEqual(deco.get_trace_totals(), (2, 15))
+
+    def test_disabled_tracing_records_nothing(self):
+        deco.set_tracing(False)
+        self.assertEqual(_traced_function(10), 20)
+        with deco.span('disabled') as s:
+            deco.trace_add(items = 1)
+        self.assertEqual(deco.get_trace_stats(), {})
+        self.assertEqual(deco.get_trace_totals(), (0, 0))
+
+    def test_nested_spans_count_once(self):
+        with deco.span('outer'):
+            deco.trace_add(items = 1)
+            _traced_function(100)
+        stats = deco.get_trace_stats()
+        self.assertEqual(stats['outer']['items'], 1)
+        self.assertEqual(stats['outer']['bytes'], 0)
+        self.assertEqual(deco.get_trace_totals(), (2, 100))
+
+    def test_totals_are_live(self):
+        with deco.span('scan'):
+            deco.trace_add(items = 3, bytes = 30)
+            self.assertEqual(deco.get_trace_totals(), (3, 30))
+            self.assertEqual(deco.get_trace_stats(), {})
+        self.assertEqual(deco.get_trace_totals(), (3, 30))
+        self.assertEqual(deco.get_trace_stats()['scan']['items'], 3)
+
+    def test_span_records_on_exception(self):
+        with self.assertRaises(ValueError):
+            with deco.span('failing'):
+                raise ValueError()
+        self.assertEqual(deco.get_trace_stats()['failing']['count'], 1)
+
+    def test_copy_asset_file_bytes(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            (temp_dir / 'chr001.geom').write_bytes(b'geom' * 256)
+            result = core.copy_asset_file(temp_dir, temp_dir / 'modfiles', 'chr001.geom')
+            self.assertTrue(result.success)
+            stats = deco.get_trace_stats()['core.copy_asset_file']
+            self.assertEqual((stats['count'], stats['items'], stats['bytes']), (1, 1, 1024))
+
+            trace_file = temp_dir / 'trace.json'
+            deco.dump_traces(trace_file)
+            with open(trace_file) as f:
+                self.assertIn('core.copy_asset_file', json.load(f))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from PySide6.QtWidgets import QApplication
+
+from DigiSModEditor import core
+from DigiSModEditor import threads as th
+from DigiSModEditor.references import ReferenceManifest
+
+
+class TestTransferThread(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        (self.dsdb_dir / 'images').mkdir(parents = True)
+        for name in ('chr001.name', 'chr001.geom', 'chr002.name'):
+            (self.dsdb_dir / name).write_bytes(b'data')
+        (self.dsdb_dir / 'images' / 'chr001_tex.img').write_bytes(b'image')
+        core.create_project_mods(self.temp_dir, 'TestMods', 'Author', (1, 0), 'Category', 'Description')
+        self.project_dir = self.temp_dir / 'TestMods'
+        self.manifest = ReferenceManifest.load(self.project_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_transfer_reports_every_asset(self):
+        asset_files = [
+            ('chr001', [self.dsdb_dir / 'chr001.name', self.dsdb_dir / 'images' / 'chr001_tex.img']),
+            ('chr002', [self.dsdb_dir / 'chr002.name', self.dsdb_dir / 'chr002.missing']),
+        ]
+        transferred = []
+        finished = []
+        thread = th.TransferThread('TestMods', asset_files, self.manifest)
+        thread.asset_transferred.connect(lambda *args: transferred.append(args))
+        thread.transfer_finished.connect(lambda *args: finished.append(args))
+        thread.run()
+
+        self.assertEqual(transferred, [('chr001', ['chr001.name', 'images/chr001_tex.img']), ('chr002', ['chr002.name'])])
+        self.assertEqual(finished, [(3, 1)])
+        self.assertEqual((self.project_dir / 'modfiles' / 'images' / 'chr001_tex.img').read_bytes(), b'image')
+
+    def test_pack_thread(self):
+        results = []
+        thread = th.PackThread(self.project_dir, self.temp_dir, 'TestMods.zip')
+        thread.pack_finished.connect(results.append)
+        thread.run()
+        self.assertEqual(results[0].zip_file, self.temp_dir / 'TestMods.zip')
+
+        failures = []
+        thread = th.PackThread(self.dsdb_dir, self.temp_dir, 'DSDB.zip')
+        thread.pack_failed.connect(failures.append)
+        thread.run()
+        self.assertEqual(len(failures), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
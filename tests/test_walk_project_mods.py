@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from DigiSModEditor import core
+from DigiSModEditor.references import ReferenceManifest
+
+
+class TestWalkProjectMods(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.dsdb_dir = self.temp_dir / 'DSDB'
+        self.dsdb_dir.mkdir()
+        (self.dsdb_dir / 'chr009.name').write_bytes(b'name')
+        self.project_mods_dir = self.temp_dir / 'ProjectMods'
+        self.project_mods_dir.mkdir()
+        for i in range(3):
+            core.create_project_mods(self.project_mods_dir, f'Mods{i}', 'Author', (1, 0), 'Category', 'Description')
+            mods_dir = self.project_mods_dir / f'Mods{i}' / 'modfiles'
+            (mods_dir / 'images').mkdir()
+            for name in (f'chr00{i}.name', f'chr00{i}.geom', f'chr00{i}_bt01.anim'):
+                (mods_dir / name).write_bytes(b'data')
+            (mods_dir / 'images' / f'chr00{i}.img').write_bytes(b'data')
+        # neither a project mods nor its 'modfiles', never walked
+        (self.project_mods_dir / 'NotMods' / 'modfiles').mkdir(parents = True)
+        (self.project_mods_dir / 'NotMods' / 'modfiles' / 'chr100.name').write_bytes(b'data')
+        (self.project_mods_dir / 'Mods0' / 'backup').mkdir()
+        (self.project_mods_dir / 'Mods0' / 'backup' / 'chr200.name').write_bytes(b'data')
+
+        manifest = ReferenceManifest.load(self.project_mods_dir / 'Mods1')
+        core.reference_asset_file(self.dsdb_dir, self.project_mods_dir / 'Mods1' / 'modfiles', 'chr009.name', manifest)
+        manifest.save()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_single_walk_matches_walk_per_mods(self):
+        mods_index = core.walk_project_mods_files(self.project_mods_dir)
+        self.assertEqual(
+            sorted(mods_index),
+            [self.project_mods_dir / f'Mods{i}' / 'modfiles' for i in range(3)]
+        )
+        for mods_dir, (name_list, files_text) in mods_index.items():
+            expected_names, expected_text = core.walk_asset_files(mods_dir)
+            self.assertEqual(sorted(name_list), sorted(expected_names))
+            self.assertEqual(sorted(files_text.split(';')), sorted(expected_text.split(';')))
+
+    def test_references_are_included(self):
+        mods_index = core.walk_project_mods_files(self.project_mods_dir)
+        name_list, _ = mods_index[self.project_mods_dir / 'Mods1' / 'modfiles']
+        self.assertEqual(sorted(name_list), ['chr001.name', 'chr009.name'])
+
+    def test_checkpoint_interrupts_walk(self):
+        checkpoint = mock.Mock(side_effect = [None, None, InterruptedError])
+        with self.assertRaises(InterruptedError):
+            core.walk_project_mods_files(self.project_mods_dir, checkpoint)
+        checkpoint = mock.Mock(side_effect = [None, InterruptedError])
+        with self.assertRaises(InterruptedError):
+            core.walk_asset_files(self.project_mods_dir / 'Mods0' / 'modfiles', checkpoint)
+
+
+if __name__ == '__main__':
+    unittest.main()
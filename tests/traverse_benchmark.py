@@ -1,9 +1,17 @@
 import os
+import sys
+import tempfile
 import timeit
 from pathlib import Path
 
-# Define the directory path here
-dir_path = Path(r'D:\IDrive\Project\2024\DigimonStory\original-content\DSDB')
+import synthetic_dsdb
+
+# a DSDB directory as argument, or a synthetic DSDB of 10k files
+if len(sys.argv) > 1:
+    dir_path = Path(sys.argv[1])
+else:
+    dir_path = Path(tempfile.mkdtemp(prefix = 'digis_traverse_')) / 'DSDB'
+    synthetic_dsdb.generate_dsdb(dir_path, 10000)
 
 
 def benchmark_os_walk():